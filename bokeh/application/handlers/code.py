@@ -4,6 +4,7 @@ import logging
 log = logging.getLogger(__name__)
 
 import os
+import threading
 
 from bokeh.io import set_curdoc, curdoc
 
@@ -22,6 +23,11 @@ class CodeHandler(Handler):
     _io_functions = ['output_server', 'output_notebook', 'output_file',
                      'show', 'save', 'push', 'reset_output']
 
+    # running code changes the working directory, sys.path and sys.argv
+    # and patches bokeh.io, so documents built on worker threads (see the
+    # ``session_init_threads`` server option) must take turns
+    _run_lock = threading.Lock()
+
     def __init__(self, *args, **kwargs):
         super(CodeHandler, self).__init__(*args, **kwargs)
 
@@ -61,20 +67,21 @@ class CodeHandler(Handler):
             setattr(doc, '_CodeHandler__modules', [])
         doc.__modules.append(module)
 
-        old_doc = curdoc()
-        set_curdoc(doc)
-        old_io = self._monkeypatch_io()
-
-        try:
-            def post_check():
-                newdoc = curdoc()
-                # script is supposed to edit the doc not replace it
-                if newdoc is not doc:
-                    raise RuntimeError("%s at '%s' replaced the output document" % (self._origin, self._runner.path))
-            self._runner.run(module, post_check)
-        finally:
-            self._unmonkeypatch_io(old_io)
-            set_curdoc(old_doc)
+        with CodeHandler._run_lock:
+            old_doc = curdoc()
+            set_curdoc(doc)
+            old_io = self._monkeypatch_io()
+
+            try:
+                def post_check():
+                    newdoc = curdoc()
+                    # script is supposed to edit the doc not replace it
+                    if newdoc is not doc:
+                        raise RuntimeError("%s at '%s' replaced the output document" % (self._origin, self._runner.path))
+                self._runner.run(module, post_check)
+            finally:
+                self._unmonkeypatch_io(old_io)
+                set_curdoc(old_doc)
 
     # subclassess must define self._logger_text
     def _make_io_logger(self, name):
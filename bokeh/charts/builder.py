@@ -18,9 +18,12 @@ types on top of it.
 
 from __future__ import absolute_import
 
-import numpy as np
+from collections import OrderedDict
+import itertools
 import warnings
 
+import numpy as np
+
 from six import string_types
 from .attributes import AttrSpec, ColorAttr, CatAttr
 from .chart import Chart
@@ -29,8 +32,11 @@ from .models import CompositeGlyph
 from .properties import Dimension, ColumnLabel
 from .utils import collect_attribute_columns, label_from_index_dict, build_hover_tooltips
 from .data_source import OrderedAssigner
+from ..models.glyphs import Line, Patch
 from ..models.ranges import Range, Range1d, FactorRange
+from ..models.renderers import GlyphRenderer
 from ..models.sources import ColumnDataSource
+from ..models.transforms import CategoricalMap
 from ..core.properties import (HasProps, Instance, List, String, Dict,
                           Color, Bool, Tuple, Either, Enum)
 from ..core.enums import SortDirection
@@ -235,6 +241,17 @@ class Builder(HasProps):
 
     source = Instance(ColumnDataSource)
 
+    consolidate = Bool(default=False, help="""
+        Whether to draw the groups of data from a single ColumnDataSource. The
+        glyph renderers of the groups that only differ in visual properties
+        (e.g. color) are merged into one, with the index of the group of each
+        row in a ``chart_group`` column, and a
+        :class:`~bokeh.models.transforms.CategoricalMap` from it to the value of
+        each visual property. This makes charts with many groups much smaller
+        and faster to render. Renderers used by the legend are kept, without
+        any data.
+        """)
+
     tooltips = Either(List(Tuple(String, String)), List(String), Bool, default=None,
                       help="""
         Tells the builder to add tooltips to the chart by either using the columns
@@ -534,6 +551,10 @@ class Builder(HasProps):
         renderers = self.yield_renderers()
         if chart is None:
             chart = Chart()
+        if self.consolidate:
+            # without a legend, no renderer is needed to draw its items
+            legends = self._legends if chart._legend else []
+            renderers = consolidate_renderers(list(renderers), legends)
         chart.add_renderers(self, renderers)
 
         # handle ranges after renders, since ranges depend on aggregations
@@ -615,6 +636,122 @@ class Builder(HasProps):
         else:
             self.legend_sort_direction = "descending"
 
+GROUP_COLUMN = 'chart_group'
+
+
+def consolidate_renderers(renderers, legends):
+    """Merge the glyph renderers that only differ in visual properties.
+
+    The rows of the data sources of each set of merged renderers are
+    concatenated into one ColumnDataSource, with the index of the renderer
+    they came from in the ``chart_group`` column. Glyph properties that
+    differ between the renderers map that column to their values with a
+    :class:`~bokeh.models.transforms.CategoricalMap`.
+
+    Renderers that draw connected shapes (lines and patches), or that have
+    selection, nonselection or hover glyphs, are not merged.
+
+    Args:
+        renderers (list(GlyphRenderer)): the renderers of the chart
+        legends (list(tuple(str, list(GlyphRenderer)))): the legend items,
+            whose renderers are kept (with an empty data source) if merged
+
+    Returns:
+        list(GlyphRenderer)
+    """
+    in_legend = set(r._id for _, items in legends for r in items)
+
+    groups = OrderedDict()
+    for renderer in renderers:
+        key = _merge_key(renderer)
+        if key is None:
+            key = renderer._id
+        groups.setdefault(key, []).append(renderer)
+
+    result = []
+    for group in groups.values():
+        if len(group) == 1:
+            result.extend(group)
+            continue
+
+        result.append(_merge_renderers(group))
+
+        # keep the renderers drawn by the legend, without data
+        columns = list(group[0].data_source.data)
+        empty = ColumnDataSource(data=dict((name, []) for name in columns))
+        for renderer in group:
+            if renderer._id in in_legend:
+                renderer.data_source = empty
+                result.append(renderer)
+
+    return result
+
+
+def _merge_key(renderer):
+    """Identifies the renderers that can be merged, or returns None."""
+    if not isinstance(renderer, GlyphRenderer) or type(renderer.data_source) is not ColumnDataSource:
+        return None
+    if any(glyph is not None for glyph in (renderer.selection_glyph,
+                                           renderer.nonselection_glyph,
+                                           renderer.hover_glyph)):
+        return None
+
+    glyph = renderer.glyph
+    if glyph is None or isinstance(glyph, (Line, Patch)):
+        return None
+
+    specs = glyph.dataspecs()
+    props = []
+    for name, value in sorted(glyph.properties_with_values(include_defaults=True).items()):
+        if name in specs:
+            value = _spec(glyph, name)
+            # only the value may differ between merged renderers
+            value.pop('value', None)
+        props.append((name, repr(value)))
+
+    return (glyph.__class__, tuple(props), renderer.x_range_name, renderer.y_range_name,
+            renderer.level, tuple(sorted(renderer.data_source.data)))
+
+
+def _spec(glyph, name):
+    spec = glyph.lookup(name).serializable_value(glyph)
+    return dict(value=None) if spec is None else dict(spec)
+
+
+def _merge_renderers(renderers):
+    first = renderers[0]
+    sources = [renderer.data_source for renderer in renderers]
+    columns = list(first.data_source.data)
+
+    data = dict((name, _concat([source.data[name] for source in sources])) for name in columns)
+    sizes = [len(source.data[columns[0]]) for source in sources]
+    data[GROUP_COLUMN] = np.repeat(np.arange(len(renderers)), sizes)
+
+    glyph_kws = first.glyph.properties_with_values(include_defaults=False)
+    for name in first.glyph.dataspecs():
+        values = [_spec(renderer.glyph, name) for renderer in renderers]
+        if all(value == values[0] for value in values):
+            continue
+        spec = dict((k, v) for k, v in values[0].items() if k != 'value')
+        spec['field'] = GROUP_COLUMN
+        spec['transform'] = CategoricalMap(factors=list(range(len(renderers))),
+                                           values=[value['value'] for value in values])
+        glyph_kws[name] = spec
+
+    return GlyphRenderer(glyph=first.glyph.__class__(**glyph_kws),
+                         data_source=ColumnDataSource(data),
+                         x_range_name=first.x_range_name,
+                         y_range_name=first.y_range_name,
+                         level=first.level)
+
+
+def _concat(columns):
+    arrays = [np.asarray(column) for column in columns]
+    if all(array.dtype.kind in 'biufM' for array in arrays):
+        return np.concatenate(arrays)
+    return list(itertools.chain.from_iterable(columns))
+
+
 class XYBuilder(Builder):
     """Implements common functionality for XY Builders."""
 
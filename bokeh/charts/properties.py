@@ -11,10 +11,13 @@ from __future__ import absolute_import
 import numpy as np
 import pandas as pd
 
-from bokeh.core.properties import (HasProps, Either, String, Int, List, Bool,
+from bokeh.core.properties import (HasProps, Either, String, Int, Float, List, Bool,
                               PrimitiveProperty, bokeh_integer_types, Array)
 from .utils import special_columns, title_from_columns
 
+# NumPy dtype kinds whose items are all valid for a column item type
+_ITEM_DTYPE_KINDS = {Float: 'fiu', Int: 'iu', Bool: 'b'}
+
 
 class Column(Array):
     """Represents column-oriented data.
@@ -31,6 +34,15 @@ class Column(Array):
     def _new_instance(self, value):
         return pd.Series(value)
 
+    def validate(self, value):
+        kinds = _ITEM_DTYPE_KINDS.get(type(self.item_type))
+        if (kinds is not None and isinstance(value, (np.ndarray, pd.Series))
+                and value.dtype.kind in kinds):
+            # checking each item of a large column in Python is slow, and
+            # the dtype already says they are all valid
+            return
+        super(Column, self).validate(value)
+
     def transform(self, value):
         if value is None:
             return None
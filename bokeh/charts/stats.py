@@ -297,6 +297,11 @@ class BinnedStat(Stat):
 
     bin_width = Float()
 
+    bin_models = Bool(default=True, help="""
+        Whether to create a `Bin` model for each bin. Creating them takes time
+        for many bins, and the results are also available as arrays.
+        """)
+
     def __init__(self, values=None, column=None, bins=None,
                  stat='count', source=None, **properties):
 
@@ -342,7 +347,6 @@ class Bins(BinnedStat):
 
         bin_str = '_bin'
         self.bin_column = self.column + bin_str
-        bin_models = []
 
         data = self.bin_stat.get_data()
         bins = self.bin_stat.bins
@@ -355,34 +359,52 @@ class Bins(BinnedStat):
             margin = 0.01 * abs(float(data[0])) or 0.01
             bins = np.linspace(data[0] - margin, data[0] + margin, bins+1)
 
-        binned, bin_bounds = pd.cut(data, bins,
-                                    retbins=True, include_lowest=True, precision=0)
+        values = np.asarray(data)
+        self._counter = BinCounts(_cut_edges(values, bins), right=True)
+        codes = self._counter.update(values)
+        self._codes = codes
+        self._labels = _cut_labels(self._counter.edges)
 
+        bin_bounds = self._counter.edges
         self.bin_width = np.round(bin_bounds[2] - bin_bounds[1], 1)
 
+        # centers of the rounded bounds in the labels, like Bin.center
+        label_centers = [sum(Bin.binstr_to_list(label)) / 2.0 for label in self._labels]
+
+        # the extra last entry is picked by the code -1, for missing values
+        binned = np.array(self._labels + [np.nan], dtype=object)[codes]
+        centers = np.array(label_centers + [np.nan])[codes]
+
+        self.centers_column = self.column + '_center'
         if self.source is not None:
-            # add bin column to data source
-            self.source.add(binned.tolist(), name=self.bin_column)
-            df = self.source.to_df()
+            self.source.add(binned, name=self.bin_column)
+            self.source.add(centers, name=self.centers_column)
+
+        if self.bin_models:
+            self.bins = [Bin(bin_label=label, values=group, stat=self.stat)
+                         for label, group in zip(self._labels, _split_by_code(values, codes, len(self._labels)))]
         else:
-            df = pd.DataFrame({self.column: self.values, self.bin_column: binned})
+            self.bins = []
 
-        for name, group in df.groupby(self.bin_column):
-            bin_models.append(Bin(bin_label=name, values=group[self.column],
-                                  stat=self.stat))
+    @property
+    def labels(self):
+        """The label of each bin."""
+        return self._labels
 
-        self.bins = bin_models
+    @property
+    def codes(self):
+        """The index of the bin of each value, -1 for missing values."""
+        return self._codes
 
-        centers = binned.copy()
-        centers = centers.astype(str)
-        for bin in self.bins:
-            centers[binned == bin.label] = bin.center
+    @property
+    def edges(self):
+        """The bin edges, including the rightmost edge."""
+        return self._counter.edges
 
-        self.centers_column = self.column + '_center'
-        if self.source is not None:
-            self.source.add(centers.tolist(), name=self.centers_column)
-        else:
-            df[self.centers_column] = centers
+    @property
+    def counts(self):
+        """The number of values in each bin."""
+        return self._counter.counts
 
     def __getitem__(self, item):
         return self.bins[item]
@@ -417,6 +439,11 @@ class Histogram(BinnedStat):
     (default: False)
     """)
 
+    weights = EitherColumn(Column(Float), Column(Int), default=None, help="""
+    An optional weight for each value, to sum in the bins instead of counting
+    the values.
+    """)
+
     def calculate(self):
         bin_str = '_bin'
         self.bin_column = self.column + bin_str
@@ -424,21 +451,153 @@ class Histogram(BinnedStat):
         data = self.bin_stat.get_data()
         bins = self.bin_stat.bins
 
-        binned, bin_bounds = np.histogram(
-                        np.array(data), density=self.density, bins=bins
-                    )
+        weights = None if self.weights is None else np.asarray(self.weights)
+        counts, bin_bounds = np.histogram(np.asarray(data), bins=bins, weights=weights)
+        self._counter = BinCounts(bin_bounds, counts=counts)
 
         self.bin_width = np.round(bin_bounds[2] - bin_bounds[1], 1)
-        self.bins = []
+        self._update_bins()
+
+    def stream(self, values, weights=None):
+        """Add more values to the histogram, without recomputing it.
 
-        for i, b in enumerate(binned):
+        The bins stay the same, so values outside of them are not counted.
+        """
+        self._counter.update(values, weights)
+        self._update_bins()
+
+    def _update_bins(self):
+        if not self.bin_models:
+            self.bins = []
+            return
+
+        bin_bounds = self.edges
+        heights = self.heights
+        bins = []
+        for i in range(len(heights)):
             width = bin_bounds[i+1] - bin_bounds[i]
             if i == 0:
                 lbl = "[%.1f, %.1f]" % (bin_bounds[i], bin_bounds[i+1])
             else:
                 lbl = "(%.1f, %.1f]" % (bin_bounds[i], bin_bounds[i+1])
-            self.bins.append(Bin(bin_label=lbl, values=[binned[i]], stat=Max(),
+            bins.append(Bin(bin_label=lbl, values=[heights[i]], stat=Max(),
                 width=width))
+        self.bins = bins
+
+    @property
+    def edges(self):
+        """The bin edges, including the rightmost edge."""
+        return self._counter.edges
+
+    @property
+    def centers(self):
+        """The center of each bin."""
+        return self._counter.centers
+
+    @property
+    def counts(self):
+        """The number of values (or sum of weights) in each bin."""
+        return self._counter.counts
+
+    @property
+    def heights(self):
+        """The counts, or the densities if ``density`` is True."""
+        if self.density:
+            return self._counter.density()
+        return self._counter.counts
+
+
+class BinCounts(object):
+    """Counts (or sums of weights) of values in fixed bins, kept as arrays.
+
+    Values are binned with ``np.searchsorted`` and counted with
+    ``np.bincount``, so more values can be added cheaply at any time.
+
+    Args:
+        edges (seq[float]) : the bin edges, including the rightmost edge
+        right (bool, optional) : whether the bins include their right edge,
+            like ``pd.cut``, instead of their left edge, like ``np.histogram``.
+            Either way the outer edges are included.
+        counts (seq[float], optional) : the initial counts
+
+    Values outside of the edges, and NaNs, are not counted.
+    """
+
+    def __init__(self, edges, right=False, counts=None):
+        self.edges = np.asarray(edges, dtype=float)
+        self.right = right
+        if counts is None:
+            self.counts = np.zeros(len(self.edges) - 1)
+        else:
+            self.counts = np.asarray(counts, dtype=float)
+
+    @property
+    def centers(self):
+        return (self.edges[:-1] + self.edges[1:]) / 2.0
+
+    @property
+    def widths(self):
+        return np.diff(self.edges)
+
+    def indices(self, values):
+        """Return the bin index of each value, -1 for values outside the bins."""
+        values = np.asarray(values, dtype=float).ravel()
+        nbins = len(self.edges) - 1
+        if self.right:
+            indices = np.searchsorted(self.edges, values, side='left') - 1
+            indices[values == self.edges[0]] = 0
+        else:
+            indices = np.searchsorted(self.edges, values, side='right') - 1
+            indices[values == self.edges[-1]] = nbins - 1
+        indices[indices >= nbins] = -1
+        return indices
+
+    def update(self, values, weights=None):
+        """Count more values, weighted by ``weights`` if given.
+
+        Returns:
+            the bin index of each value, -1 for values that were not counted
+        """
+        indices = self.indices(values)
+        counted = indices >= 0
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float).ravel()[counted]
+        self.counts += np.bincount(indices[counted], weights=weights, minlength=len(self.counts))
+        return indices
+
+    def density(self):
+        """The counts normalized so that they integrate to 1 over the bins."""
+        return self.counts / self.widths / self.counts.sum()
+
+
+def _cut_edges(values, bins):
+    """The bin edges ``pd.cut(values, bins)`` uses."""
+    if np.ndim(bins) > 0:
+        return np.asarray(bins, dtype=float)
+
+    mn, mx = np.nanmin(values) + 0.0, np.nanmax(values) + 0.0
+    edges = np.linspace(mn, mx, bins + 1)
+    # extend the first bin a little to include the lowest value
+    edges[0] -= (mx - mn) * 0.001
+    return edges
+
+
+def _cut_labels(edges):
+    """The labels ``pd.cut`` gives to the bins, e.g. ``'(4, 7]'``."""
+    midpoints = pd.Series((edges[:-1] + edges[1:]) / 2.0)
+    binned = pd.cut(midpoints, edges, include_lowest=True, precision=0)
+    return [str(label) for label in binned.cat.categories]
+
+
+def _split_by_code(values, codes, count):
+    """Split the values into one array for each code up to ``count``, with
+    a single sort (the order of the values in each array is not kept).
+    """
+    order = np.argsort(codes)
+    ordered = codes[order]
+    bounds = np.searchsorted(ordered, np.arange(count + 1))
+    values = values[order]
+    return [values[bounds[i]:bounds[i+1]] for i in range(count)]
 
 
 def bins(data, values=None, column=None, bins=None, labels=None,
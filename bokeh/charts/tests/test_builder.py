@@ -28,7 +28,8 @@ except ImportError as e:
 from bokeh.charts.builder import Builder, XYBuilder
 from bokeh.charts.properties import Dimension
 from bokeh.charts.attributes import ColorAttr, DEFAULT_PALETTE
-from bokeh.models import Range1d, FactorRange
+from bokeh.charts import Scatter
+from bokeh.models import Range1d, FactorRange, GlyphRenderer, Legend
 
 #-----------------------------------------------------------------------------
 # Classes and functions
@@ -120,3 +121,34 @@ def test_sort_legend(test_builder, test_data):
 
     assert test_builder.legend_sort_field == 'color'
     assert test_builder.legend_sort_direction == 'ascending'
+
+def _glyph_renderers(chart):
+    return [r for r in chart.renderers if isinstance(r, GlyphRenderer)]
+
+@skipIf(not is_pandas, "pandas not installed")
+def test_consolidate_merges_groups():
+    df = pd.DataFrame(dict(x=[1, 2, 3, 4], y=[5, 6, 7, 8], g=['a', 'b', 'a', 'c']))
+
+    chart = Scatter(df, x='x', y='y', color='g', consolidate=True, legend=False)
+    renderers = _glyph_renderers(chart)
+    assert len(renderers) == 1
+    data = renderers[0].data_source.data
+    assert sorted(data['x_values']) == [1, 2, 3, 4]
+    assert list(data['g']) == [df.g[x - 1] for x in data['x_values']]
+    color = renderers[0].glyph.fill_color
+    assert color['field'] == 'chart_group'
+    assert [color['transform'].values[i] for i in data['chart_group']] == \
+        [{'a': '#f22c40', 'b': '#5ab738', 'c': '#407ee7'}[g] for g in data['g']]
+
+@skipIf(not is_pandas, "pandas not installed")
+def test_consolidate_keeps_legend_renderers():
+    df = pd.DataFrame(dict(x=[1, 2, 3, 4], y=[5, 6, 7, 8], g=['a', 'b', 'a', 'c']))
+
+    chart = Scatter(df, x='x', y='y', color='g', consolidate=True, legend=True)
+    renderers = _glyph_renderers(chart)
+    assert len(renderers) == 4
+    assert len(set(r.data_source for r in renderers)) == 2
+    legend = chart.select(type=Legend)[0]
+    for label, (renderer,) in legend.legends:
+        assert renderer in renderers
+        assert list(renderer.data_source.data['x_values']) == []
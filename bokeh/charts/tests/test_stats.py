@@ -1,8 +1,9 @@
 import pytest
 
-from bokeh.charts.stats import Bins, Histogram
+from bokeh.charts.stats import Bins, BinCounts, Histogram
 from bokeh.models import ColumnDataSource
 
+import numpy as np
 import pandas as pd
 
 
@@ -59,3 +60,40 @@ def test_histogram_ill_defined_data():
         assert len(h.bins) <= 3
         assert len(h.bins) >= 1
         assert sum([b.value for b in h.bins]) == 2
+
+
+def test_bins_arrays_without_models(ds):
+    b = Bins(source=ds, column='mpg', bins=4, bin_models=False)
+    assert b.bins == []
+    assert len(b.labels) == 4
+    assert b.counts.sum() == len(ds.data['mpg'])
+    assert list(b.codes) == list(pd.cut(ds.data['mpg'], 4, labels=False, include_lowest=True))
+    assert list(ds.data['mpg_bin']) == [b.labels[code] for code in b.codes]
+
+
+def test_bin_counts_matches_cut_and_histogram():
+    values = np.random.RandomState(0).randn(1000)
+    edges = np.linspace(-2, 2, 11)
+
+    counts = BinCounts(edges, right=True)
+    indices = counts.update(values)
+    expected = pd.cut(values, edges, labels=False, include_lowest=True)
+    assert np.array_equal(indices, np.where(np.isnan(expected), -1, expected))
+
+    counts = BinCounts(edges)
+    counts.update(values)
+    assert list(counts.counts) == list(np.histogram(values, edges)[0])
+
+
+def test_histogram_weights():
+    h = Histogram(values=list(range(10)), weights=[2]*10, bins=3)
+    assert list(h.counts) == [6, 6, 8]
+    assert [b.values[0] for b in h.bins] == [6, 6, 8]
+
+
+def test_histogram_stream():
+    h = Histogram(values=list(range(10)), bins=3)
+    h.stream([0, 1, 9, 100], weights=[1, 1, 2, 5])
+    assert list(h.counts) == [5, 3, 6]
+    assert [b.values[0] for b in h.bins] == [5, 3, 6]
+    assert np.allclose(h.centers, [1.5, 4.5, 7.5])
@@ -17,14 +17,16 @@ from tornado.concurrent import Future
 from bokeh.server.exceptions import MessageError, ProtocolError, ValidationError
 from bokeh.server.protocol.receiver import Receiver
 from bokeh.server.protocol import Protocol
+from bokeh.util.tornado import _WebSocketCompression
 
 class _WebSocketClientConnectionWrapper(object):
     ''' Used for compat across Tornado versions and to add write_lock'''
 
-    def __init__(self, socket):
+    def __init__(self, socket, compression=None):
         if socket is None:
             raise ValueError("socket must not be None")
         self._socket = socket
+        self._compression = compression
         # write_lock allows us to lock the connection to send multiple
         # messages atomically.
         self.write_lock = locks.Lock()
@@ -41,7 +43,10 @@ class _WebSocketClientConnectionWrapper(object):
                 # is closed.
                 raise WebSocketError("Connection to the server has been closed")
 
-            future = self._socket.write_message(message, binary)
+            if self._compression is None:
+                future = self._socket.write_message(message, binary)
+            else:
+                future = self._compression.write_message(self._socket.protocol, message, binary)
             if future is None:
                 # tornado >= 4.3 gives us a Future, simulate that
                 # with this fake Future on < 4.3
@@ -123,6 +128,8 @@ class ClientConnection(object):
         self._until_predicate = None
         self._protocol = Protocol("1.0")
         self._server_info = None
+        # only send binary buffers once the server says it can decode them
+        self._use_buffers = False
 
     @property
     def url(self):
@@ -192,7 +199,7 @@ class ClientConnection(object):
         raise gen.Return(None)
 
     def _send_patch_document(self, session_id, event):
-        msg = self._protocol.create('PATCH-DOC', [event])
+        msg = self._protocol.create('PATCH-DOC', [event], use_buffers=self._use_buffers)
         self.send_message(msg)
 
     def _send_message_wait_for_reply(self, message):
@@ -223,7 +230,7 @@ class ClientConnection(object):
         Returns:
              The server reply
         '''
-        msg = self._protocol.create('PUSH-DOC', document)
+        msg = self._protocol.create('PUSH-DOC', document, use_buffers=self._use_buffers)
         reply = self._send_message_wait_for_reply(msg)
         if reply is None:
             raise RuntimeError("Connection to server was lost")
@@ -315,11 +322,14 @@ class ClientConnection(object):
 
     @gen.coroutine
     def _connect_async(self):
-        versioned_url = "%s?bokeh-protocol-version=1.0&bokeh-session-id=%s" % (self._url, self._session.id)
+        # we can decode binary buffers, so ask the server to send array
+        # data that way
+        versioned_url = "%s?bokeh-protocol-version=1.0&bokeh-session-id=%s&bokeh-binary-buffers=1" % (self._url, self._session.id)
         request = HTTPRequest(versioned_url)
         try:
-            socket = yield websocket_connect(request)
-            self._socket = _WebSocketClientConnectionWrapper(socket)
+            # offer permessage-deflate; it's only used if the server enables it
+            socket = yield websocket_connect(request, compression_options={})
+            self._socket = _WebSocketClientConnectionWrapper(socket, compression=_WebSocketCompression())
         except Exception as e:
             log.info("Failed to connect to server: %r", e)
 
@@ -334,6 +344,7 @@ class ClientConnection(object):
         message = yield self._pop_message()
         if message and message.msgtype == 'ACK':
             log.debug("Received %r", message)
+            self._use_buffers = message.content.get('binary_buffers', False)
             yield self._transition(self.CONNECTED_AFTER_ACK())
         elif message is None:
             yield self._transition_to_disconnected()
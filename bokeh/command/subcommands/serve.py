@@ -144,6 +144,23 @@ processes
 
     bokeh serve app_script.py --num-procs 2
 
+Each session only exists in the process that created it, so with several
+processes, all requests for a session (including its websocket) must reach
+the same process. Usually this needs a load balancer in front of the
+processes with "sticky" sessions. Alternatively, set the
+``--route-sessions`` option:
+
+.. code-block:: sh
+
+    bokeh serve app_script.py --num-procs 4 --route-sessions
+
+The Bokeh server then starts the worker processes on the ports after
+``--port``, listening on 127.0.0.1 only, and a router process on ``--port``
+that forwards every request to the worker that owns its session (chosen by
+a consistent hash of the session ID). The router stops sending new
+sessions to workers that stop responding. This option is not available
+on Windows.
+
 By default, cross site connections to the Bokeh server websocket are not
 allowed. You can enable websocket connections originating from additional
 hosts by specifying them with the ``--allow-websocket-origin`` option:
@@ -188,6 +205,80 @@ To control how often statistic logs are written, set the
 The value is specified in milliseconds. The default interval for
 logging stats is 15 seconds. Only positive integer values are accepted.
 
+By default, the document for each new session is built on the server's
+main thread, so an application that takes a long time to load its data
+or build its layout holds up every other session while it runs. To build
+new session documents on a pool of worker threads instead, set the
+``--session-init-threads`` option:
+
+.. code-block:: sh
+
+    bokeh serve app_script.py --session-init-threads 4
+
+Application scripts still run one at a time, but the server keeps
+handling other sessions while they do. The default value of 0 builds
+documents on the main thread.
+
+To avoid making users wait for their document to be built at all, the
+Bokeh server can keep a pool of sessions built ahead of time for each
+application, set with the ``--session-pool-size`` option:
+
+.. code-block:: sh
+
+    bokeh serve app_script.py --session-pool-size 4 --session-pool-ttl 300000
+
+Page requests that don't ask for a particular session are then given one
+of the pooled sessions right away, and the pool is refilled in the
+background. Pooled sessions that are not used within ``--session-pool-ttl``
+milliseconds (10 minutes by default) are discarded and built again, so new
+sessions don't start from stale data. The session callbacks of a pooled
+session only start once it is used.
+
+Session pools can't be used together with ``--route-sessions``, because the
+router has to choose a session ID for every new page before it knows
+which worker to send the page to, so workers never see a request without
+one. ``--session-pool-size`` is ignored with ``--route-sessions``.
+
+To compress the messages the Bokeh server sends over its websocket
+connections (with permessage-deflate) for clients that support it, set
+the ``--websocket-compression`` option:
+
+.. code-block:: sh
+
+    bokeh serve app_script.py --websocket-compression --websocket-compression-min-bytes 2048
+
+Messages smaller than ``--websocket-compression-min-bytes`` (1024 by
+default), and messages that don't compress well, such as binary array
+data, are still sent uncompressed. This mostly helps clients on slow
+network links.
+
+The Bokeh server sends messages to each client from a queue, so that a
+slow client doesn't hold up the others. While a change to the document
+waits in a queue, later changes to the same property replace it. To limit
+how far a client may fall behind, set the ``--websocket-max-queued-bytes``
+option:
+
+.. code-block:: sh
+
+    bokeh serve app_script.py --websocket-max-queued-bytes 10000000 --slow-consumer-policy disconnect
+
+When more than that is waiting, the ``resync`` policy (the default)
+replaces the queued changes with the current values of everything they
+changed (for example, a column data source that was streamed to is sent
+in full), and the ``disconnect`` policy closes the connection.
+
+To publish metrics about the Bokeh server (message counts and sizes,
+serialization and document lock times, session counts and build times,
+and more) for Prometheus, set the ``--enable-metrics`` option:
+
+.. code-block:: sh
+
+    bokeh serve app_script.py --enable-metrics
+
+The metrics are then available at ``/metrics`` (after any ``--prefix``).
+With ``--num-procs``, each process keeps its own metrics, and a request
+gets those of whichever process answers it.
+
 To have the Bokeh server override the remote IP and URI scheme/protocol for
 all requests with ``X-Real-Ip``, ``X-Forwarded-For``, ``X-Scheme``,
 ``X-Forwarded-Proto``  headers (if they are provided), set the
@@ -321,6 +412,8 @@ import logging
 log = logging.getLogger(__name__)
 
 import argparse
+from multiprocessing import cpu_count
+import os
 
 from bokeh.application import Application
 from bokeh.resources import DEFAULT_SERVER_PORT
@@ -335,6 +428,7 @@ from ..util import build_single_handler_applications, die
 
 LOGLEVELS = ('debug', 'info', 'warning', 'error', 'critical')
 SESSION_ID_MODES = ('unsigned', 'signed', 'external-signed')
+SLOW_CONSUMER_POLICIES = ('resync', 'disconnect')
 DEFAULT_LOG_FORMAT = "%(asctime)s %(message)s"
 
 __doc__ = __doc__.format(
@@ -456,6 +550,59 @@ class Serve(Subcommand):
             default=None,
         )),
 
+        ('--session-init-threads', dict(
+            metavar='N',
+            type=int,
+            help="Number of worker threads used to build new session documents, 0 to build them on the main thread",
+            default=None,
+        )),
+
+        ('--session-pool-size', dict(
+            metavar='N',
+            type=int,
+            help="Number of sessions per application to build ahead of time, 0 to disable",
+            default=None,
+        )),
+
+        ('--session-pool-ttl', dict(
+            metavar='MILLISECONDS',
+            type=int,
+            help="How long a session built ahead of time can wait to be used",
+            default=None,
+        )),
+
+        ('--websocket-compression', dict(
+            action='store_true',
+            help="Compress websocket messages for clients that support it",
+        )),
+
+        ('--websocket-compression-min-bytes', dict(
+            metavar='BYTES',
+            type=int,
+            help="Smallest websocket message to compress",
+            default=None,
+        )),
+
+        ('--websocket-max-queued-bytes', dict(
+            metavar='BYTES',
+            type=int,
+            help="Most bytes of messages that can wait to be sent to one client (default: no limit)",
+            default=None,
+        )),
+
+        ('--slow-consumer-policy', dict(
+            metavar='POLICY',
+            action  = 'store',
+            default = None,
+            choices = SLOW_CONSUMER_POLICIES,
+            help    = "One of: %s" % nice_join(SLOW_CONSUMER_POLICIES),
+        )),
+
+        ('--enable-metrics', dict(
+            action='store_true',
+            help="Publish server metrics for Prometheus at /metrics",
+        )),
+
         ('--use-xheaders', dict(
             action='store_true',
             help="Prefer X-headers for IP/protocol information",
@@ -487,6 +634,11 @@ class Serve(Subcommand):
             default=1,
             type=int,
         )),
+
+        ('--route-sessions', dict(
+            action='store_true',
+            help="With --num-procs, route each session to the worker process that owns it",
+        )),
     )
 
 
@@ -524,6 +676,17 @@ class Serve(Subcommand):
             # rename to be compatible with Server
             args.stats_log_frequency_milliseconds = args.stats_log_frequency
 
+        if args.session_init_threads is not None:
+            log.info("Build new session documents on %d worker threads", args.session_init_threads)
+
+        if args.session_pool_size is not None:
+            log.info("Keep %d sessions per application built ahead of time", args.session_pool_size)
+
+        if args.session_pool_ttl is not None:
+            log.info("Pooled sessions last for %d milliseconds", args.session_pool_ttl)
+            # rename to be compatible with Server
+            args.session_pool_ttl_milliseconds = args.session_pool_ttl
+
         server_kwargs = { key: getattr(args, key) for key in ['port',
                                                               'address',
                                                               'allow_websocket_origin',
@@ -535,6 +698,14 @@ class Serve(Subcommand):
                                                               'check_unused_sessions_milliseconds',
                                                               'unused_session_lifetime_milliseconds',
                                                               'stats_log_frequency_milliseconds',
+                                                              'session_init_threads',
+                                                              'session_pool_size',
+                                                              'session_pool_ttl_milliseconds',
+                                                              'websocket_compression',
+                                                              'websocket_compression_min_bytes',
+                                                              'websocket_max_queued_bytes',
+                                                              'slow_consumer_policy',
+                                                              'enable_metrics',
                                                               'use_xheaders',
                                                             ]
                           if getattr(args, key, None) is not None }
@@ -563,6 +734,10 @@ class Serve(Subcommand):
         server_kwargs['use_index'] = not args.disable_index
         server_kwargs['redirect_root'] = not args.disable_index_redirect
 
+        if args.route_sessions:
+            self._invoke_routed(args, applications, server_kwargs)
+            return
+
         server = Server(applications, **server_kwargs)
 
         if args.show:
@@ -587,3 +762,56 @@ class Serve(Subcommand):
         log.info("Starting Bokeh server with process id: %d" % getpid())
 
         server.start()
+
+    def _invoke_routed(self, args, applications, server_kwargs):
+        from bokeh.server.router import Router, fork_workers
+
+        if not hasattr(os, 'fork'):
+            die("--route-sessions is not available on this platform")
+
+        num_procs = server_kwargs.pop('num_procs', 1)
+        if num_procs == 0:
+            num_procs = cpu_count()
+        if num_procs < 2:
+            die("--route-sessions needs --num-procs to be 2 or more")
+
+        if server_kwargs.get('session_pool_size'):
+            # every request reaches a worker with a session ID chosen by
+            # the router, so pooled sessions would never be claimed
+            log.warning("--session-pool-size is ignored with --route-sessions")
+            server_kwargs['session_pool_size'] = 0
+
+        port = server_kwargs.pop('port', DEFAULT_SERVER_PORT)
+        address = server_kwargs.pop('address', None)
+        # requests reach the workers with the router's Host and Origin
+        server_kwargs['host'] = server_kwargs.get('host') or ['localhost:%d' % port]
+        worker_ports = [port + 1 + i for i in range(num_procs)]
+
+        index = fork_workers(num_procs)
+        if index is not None:
+            server = Server(applications, port=worker_ports[index], address='127.0.0.1', **server_kwargs)
+            log.info("Starting Bokeh server worker on port %d with process id: %d", server.port, getpid())
+            server.start()
+            return
+
+        router = Router(["http://127.0.0.1:%d" % worker_port for worker_port in worker_ports],
+                        port=port,
+                        address=address,
+                        generate_session_ids=server_kwargs['generate_session_ids'],
+                        secret_key=server_kwargs['secret_key'],
+                        sign_sessions=server_kwargs['sign_sessions'],
+                        stats_log_frequency_milliseconds=server_kwargs.get('stats_log_frequency_milliseconds', 15000))
+
+        if args.show:
+            def show_callback():
+                from bokeh.util.browser import view
+                prefix = "/" + server_kwargs['prefix'].strip("/") if server_kwargs.get('prefix') else ""
+                for route in applications.keys():
+                    view("http://localhost:%d%s%s" % (port, prefix, route))
+            router.io_loop.add_callback(show_callback)
+
+        log.info("Routing sessions on port %d to %d worker processes on ports %d-%d",
+                 port, num_procs, worker_ports[0], worker_ports[-1])
+        log.info("Starting Bokeh router with process id: %d" % getpid())
+
+        router.start()
@@ -125,6 +125,59 @@ def test_args():
             default=None,
         )),
 
+        ('--session-init-threads', dict(
+            metavar='N',
+            type=int,
+            help="Number of worker threads used to build new session documents, 0 to build them on the main thread",
+            default=None,
+        )),
+
+        ('--session-pool-size', dict(
+            metavar='N',
+            type=int,
+            help="Number of sessions per application to build ahead of time, 0 to disable",
+            default=None,
+        )),
+
+        ('--session-pool-ttl', dict(
+            metavar='MILLISECONDS',
+            type=int,
+            help="How long a session built ahead of time can wait to be used",
+            default=None,
+        )),
+
+        ('--websocket-compression', dict(
+            action='store_true',
+            help="Compress websocket messages for clients that support it",
+        )),
+
+        ('--websocket-compression-min-bytes', dict(
+            metavar='BYTES',
+            type=int,
+            help="Smallest websocket message to compress",
+            default=None,
+        )),
+
+        ('--websocket-max-queued-bytes', dict(
+            metavar='BYTES',
+            type=int,
+            help="Most bytes of messages that can wait to be sent to one client (default: no limit)",
+            default=None,
+        )),
+
+        ('--slow-consumer-policy', dict(
+            metavar='POLICY',
+            action  = 'store',
+            default = None,
+            choices = scserve.SLOW_CONSUMER_POLICIES,
+            help    = "One of: %s" % nice_join(scserve.SLOW_CONSUMER_POLICIES),
+        )),
+
+        ('--enable-metrics', dict(
+            action='store_true',
+            help="Publish server metrics for Prometheus at /metrics",
+        )),
+
         ('--use-xheaders', dict(
             action='store_true',
             help="Prefer X-headers for IP/protocol information",
@@ -156,4 +209,9 @@ def test_args():
              default=1,
              type=int,
          )),
+
+        ('--route-sessions', dict(
+            action='store_true',
+            help="With --num-procs, route each session to the worker process that owns it",
+        )),
     )
@@ -0,0 +1,127 @@
+{#
+Renders JavaScript code that decodes the binary array data of standalone
+documents, then embeds them.
+
+The documents JSON contains placeholders of the form
+``{"__buffer__": <id>, "dtype": ..., "shape": ...}`` in place of arrays,
+and the data for each one is base64 encoded (and optionally zlib
+compressed) in a ``<script type="application/octet-stream">`` tag with
+the id ``buffer_element_prefix + <id>``.
+
+:param docs_json: embedded JSON serialization of documents
+:type docs_json: dict
+
+:param render_items: items to embed
+:type render_items: list
+
+:param buffer_element_prefix: prefix of the ids of the tags holding the data
+:type buffer_element_prefix: str
+
+#}
+var docs_json = {{ docs_json }};
+var render_items = {{ render_items }};
+
+var typed_arrays = {
+  "int8": Int8Array, "int16": Int16Array, "int32": Int32Array,
+  "uint8": Uint8Array, "uint16": Uint16Array, "uint32": Uint32Array,
+  "float32": Float32Array, "float64": Float64Array
+};
+
+function find_placeholders(obj, found) {
+  for (var key in obj) {
+    var value = obj[key];
+    if (value !== null && typeof value === "object") {
+      if (value.__buffer__ !== undefined) {
+        found.push({parent: obj, key: key, placeholder: value});
+      } else {
+        find_placeholders(value, found);
+      }
+    }
+  }
+}
+
+function base64_to_bytes(text) {
+  var binary = atob(text.replace(/\s+/g, ""));
+  var bytes = new Uint8Array(binary.length);
+  for (var i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+}
+
+function inflate(bytes, callback) {
+  if (typeof DecompressionStream === "undefined") {
+    throw new Error("This browser cannot decompress the compressed data of this Bokeh document");
+  }
+  var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"));
+  new Response(stream).arrayBuffer().then(function(buffer) { callback(new Uint8Array(buffer)); });
+}
+
+function bytes_to_array(bytes, dtype) {
+  if (dtype === "int64" || dtype === "uint64") {
+    // there are no 64 bit integer typed arrays, so combine 32 bit words
+    var words = new Uint32Array(bytes.buffer, bytes.byteOffset, bytes.byteLength / 4);
+    var result = new Array(words.length / 2);
+    for (var i = 0; i < result.length; i++) {
+      var high = words[2*i + 1];
+      if (dtype === "int64" && high >= 0x80000000) {
+        high -= 0x100000000;
+      }
+      result[i] = high * 0x100000000 + words[2*i];
+    }
+    return result;
+  }
+  var type = typed_arrays[dtype];
+  if (type === undefined) {
+    throw new Error("Unsupported array dtype " + dtype);
+  }
+  var typed = new type(bytes.buffer, bytes.byteOffset, bytes.byteLength / type.BYTES_PER_ELEMENT);
+  // BokehJS expects plain arrays
+  return Array.prototype.slice.call(typed);
+}
+
+function reshape(flat, shape) {
+  if (shape.length <= 1) {
+    return flat;
+  }
+  var inner = shape.slice(1);
+  var size = inner.reduce(function(a, b) { return a * b; }, 1);
+  var result = [];
+  for (var i = 0; i < shape[0]; i++) {
+    result.push(reshape(flat.slice(i*size, (i+1)*size), inner));
+  }
+  return result;
+}
+
+var found = [];
+find_placeholders(docs_json, found);
+var pending = found.length;
+
+function embed() {
+  Bokeh.embed.embed_items(docs_json, render_items);
+}
+
+function decoded(item, bytes) {
+  item.parent[item.key] = reshape(bytes_to_array(bytes, item.placeholder.dtype), item.placeholder.shape);
+  pending -= 1;
+  if (pending === 0) {
+    embed();
+  }
+}
+
+if (pending === 0) {
+  embed();
+}
+
+found.forEach(function(item) {
+  var element = document.getElementById("{{ buffer_element_prefix }}" + item.placeholder.__buffer__);
+  var bytes = base64_to_bytes(element.textContent);
+  var compression = element.getAttribute("data-compression");
+  // the text is no longer needed once decoded
+  element.parentNode.removeChild(element);
+  if (compression === "zlib") {
+    inflate(bytes, function(inflated) { decoded(item, inflated); });
+  } else {
+    decoded(item, bytes);
+  }
+});
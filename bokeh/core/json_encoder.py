@@ -12,6 +12,7 @@ import json
 import time
 
 import numpy as np
+from six import integer_types, iteritems, string_types, text_type
 
 from ..settings import settings
 from ..util.dependencies import import_optional
@@ -20,59 +21,116 @@ from ..util.serialization import transform_series, transform_array
 pd = import_optional('pandas')
 rd = import_optional("dateutil.relativedelta")
 
+simplejson = import_optional('simplejson')
+
+def _convert_timestamp(obj):
+    return obj.value / 10**6.0  #nanosecond to millisecond
+
+def _convert_datetime(obj):
+    return time.mktime(obj.timetuple()) * 1000. + obj.microsecond / 1000.
+
+def _convert_timedelta(obj):
+    return obj.total_seconds() * 1000.
+
+def _convert_date(obj):
+    return time.mktime(obj.timetuple()) * 1000.
+
+def _convert_datetime64(obj):
+    epoch_delta = obj - np.datetime64('1970-01-01T00:00:00Z')
+    return (epoch_delta / np.timedelta64(1, 'ms'))
+
+def _convert_time(obj):
+    return (obj.hour * 3600 + obj.minute * 60 + obj.second) * 1000 + obj.microsecond / 1000.
+
+def _convert_relativedelta(obj):
+    return dict(years=obj.years, months=obj.months, days=obj.days, hours=obj.hours,
+        minutes=obj.minutes, seconds=obj.seconds, microseconds=obj.microseconds)
+
+def _python_type_converter(obj_type):
+    ''' Return the function that converts instances of ``obj_type`` to a
+    JSON compatible value, or None if they can't be converted.
+
+    '''
+    # Pandas Timestamp
+    if pd and issubclass(obj_type, pd.tslib.Timestamp):
+        return _convert_timestamp
+    elif np.issubdtype(obj_type, np.float):
+        return float
+    elif np.issubdtype(obj_type, np.int):
+        return int
+    elif np.issubdtype(obj_type, np.bool_):
+        return bool
+    # Datetime (datetime is a subclass of date)
+    elif issubclass(obj_type, dt.datetime):
+        return _convert_datetime
+    # Timedelta (timedelta is class in the datetime library)
+    elif issubclass(obj_type, dt.timedelta):
+        return _convert_timedelta
+    # Date
+    elif issubclass(obj_type, dt.date):
+        return _convert_date
+    # Numpy datetime64
+    elif issubclass(obj_type, np.datetime64):
+        return _convert_datetime64
+    # Time
+    elif issubclass(obj_type, dt.time):
+        return _convert_time
+    elif rd and issubclass(obj_type, rd.relativedelta):
+        return _convert_relativedelta
+    # Decimal
+    elif issubclass(obj_type, decimal.Decimal):
+        return float
+    else:
+        return None
+
+_python_type_converters = {}
+
 class BokehJSONEncoder(json.JSONEncoder):
     ''' Encode values to be used in Bokeh documents or communicated to
     a Bokeh server.
 
+    Args:
+        buffers (list or None, optional) : if not None, NumPy arrays and
+            Pandas series are appended to this list as binary buffers
+            instead of being converted to JSON lists (default: None)
+
     '''
+    def __init__(self, *args, **kwargs):
+        self._buffers = kwargs.pop('buffers', None)
+        super(BokehJSONEncoder, self).__init__(*args, **kwargs)
+
     def transform_python_types(self, obj):
         ''' Handle special scalars, use default json encoder otherwise
 
         '''
-        # Pandas Timestamp
-        if pd and isinstance(obj, pd.tslib.Timestamp):
-            return obj.value / 10**6.0  #nanosecond to millisecond
-        elif np.issubdtype(type(obj), np.float):
-            return float(obj)
-        elif np.issubdtype(type(obj), np.int):
-            return int(obj)
-        elif np.issubdtype(type(obj), np.bool_):
-            return bool(obj)
-        # Datetime (datetime is a subclass of date)
-        elif isinstance(obj, dt.datetime):
-            return time.mktime(obj.timetuple()) * 1000. + obj.microsecond / 1000.
-        # Timedelta (timedelta is class in the datetime library)
-        elif isinstance(obj, dt.timedelta):
-            return obj.total_seconds() * 1000.
-        # Date
-        elif isinstance(obj, dt.date):
-            return time.mktime(obj.timetuple()) * 1000.
-        # Numpy datetime64
-        elif isinstance(obj, np.datetime64):
-            epoch_delta = obj - np.datetime64('1970-01-01T00:00:00Z')
-            return (epoch_delta / np.timedelta64(1, 'ms'))
-        # Time
-        elif isinstance(obj, dt.time):
-            return (obj.hour * 3600 + obj.minute * 60 + obj.second) * 1000 + obj.microsecond / 1000.
-        elif rd and isinstance(obj, rd.relativedelta):
-            return dict(years=obj.years, months=obj.months, days=obj.days, hours=obj.hours,
-                minutes=obj.minutes, seconds=obj.seconds, microseconds=obj.microseconds)
-        # Decimal
-        elif isinstance(obj, decimal.Decimal):
-            return float(obj)
-        else:
+        # the conversion only depends on the type, so it is looked up once
+        # per type and then kept in a dispatch table
+        obj_type = type(obj)
+        try:
+            converter = _python_type_converters[obj_type]
+        except KeyError:
+            converter = _python_type_converters[obj_type] = _python_type_converter(obj_type)
+
+        if converter is None:
             return super(BokehJSONEncoder, self).default(obj)
+        return converter(obj)
 
     def default(self, obj):
+        # scalar types that have been converted before can skip all of
+        # the checks below
+        converter = _python_type_converters.get(type(obj))
+        if converter is not None:
+            return converter(obj)
+
         #argh! local import!
         from ..model import Model
         from ..colors import Color
         from .properties import HasProps
         ## array types
         if pd and isinstance(obj, (pd.Series, pd.Index)):
-            return transform_series(obj)
+            return transform_series(obj, buffers=self._buffers)
         elif isinstance(obj, np.ndarray):
-            return transform_array(obj)
+            return transform_array(obj, buffers=self._buffers)
         elif isinstance(obj, Model):
             return obj.ref
         elif isinstance(obj, HasProps):
@@ -82,10 +140,47 @@ class BokehJSONEncoder(json.JSONEncoder):
         else:
             return self.transform_python_types(obj)
 
-def serialize_json(obj, encoder=BokehJSONEncoder, indent=None, **kwargs):
+def _stdlib_dumps(obj, encoder, encoder_kwargs, **options):
+    options.update(encoder_kwargs)
+    return json.dumps(obj, cls=encoder, **options)
+
+def _simplejson_dumps(obj, encoder, encoder_kwargs, **options):
+    if simplejson is None:
+        raise RuntimeError("The simplejson JSON backend was requested, but simplejson is not installed")
+    return simplejson.dumps(obj, default=encoder(**encoder_kwargs).default,
+                            use_decimal=False, namedtuple_as_object=False, **options)
+
+_JSON_BACKENDS = {
+    'stdlib'     : _stdlib_dumps,
+    'simplejson' : _simplejson_dumps,
+}
+
+def _json_backend():
+    name = settings.json_backend()
+    if name == "auto":
+        name = "simplejson" if simplejson is not None else "stdlib"
+    try:
+        return _JSON_BACKENDS[name]
+    except KeyError:
+        raise ValueError("Unknown JSON backend %r, expected 'auto' or one of: %s" % (name, ", ".join(sorted(_JSON_BACKENDS))))
+
+def serialize_json(obj, encoder=BokehJSONEncoder, indent=None, buffers=None, sort_keys=None, **kwargs):
     ''' Return a serialized JSON representation of a Bokeh model.
 
+    If ``buffers`` is a list, NumPy arrays are appended to it as binary
+    buffers and only placeholders for them appear in the JSON output.
+
+    If ``sort_keys`` is None, keys are sorted unless the
+    ``BOKEH_JSON_SORT_KEYS`` setting is false. Not sorting is faster, but
+    the output is then not guaranteed to be the same for the same input.
+
+    The library used to encode the JSON is selected with the
+    ``BOKEH_JSON_BACKEND`` setting.
+
     '''
+    if buffers is not None:
+        kwargs['buffers'] = buffers
+
     pretty = settings.pretty(False)
 
     if pretty:
@@ -96,4 +191,86 @@ def serialize_json(obj, encoder=BokehJSONEncoder, indent=None, **kwargs):
     if pretty and indent is None:
         indent = 2
 
-    return json.dumps(obj, cls=encoder, allow_nan=False, indent=indent, separators=separators, sort_keys=True, **kwargs)
+    if sort_keys is None:
+        sort_keys = settings.json_sort_keys()
+
+    dumps = _json_backend()
+    return dumps(obj, encoder, kwargs, allow_nan=False, indent=indent, separators=separators, sort_keys=sort_keys)
+
+_INFINITY = float('inf')
+
+# the exact types of string_types (basestring on python 2) instances
+_STRING_TYPES = (str, text_type)
+
+_PLAIN_TYPES = frozenset(_STRING_TYPES + integer_types + (bool, type(None)))
+
+_NUMBER_TYPES = frozenset(integer_types + (bool, float))
+
+def _plain_json_key(key):
+    # the same conversions json.dumps applies to non-string dict keys
+    if isinstance(key, string_types):
+        return key
+    elif key is True:
+        return 'true'
+    elif key is False:
+        return 'false'
+    elif key is None:
+        return 'null'
+    elif isinstance(key, float):
+        return repr(_plain_json_value(float(key), None))
+    elif isinstance(key, integer_types):
+        return str(int(key))
+    raise TypeError("keys must be a string")
+
+def _plain_json_value(obj, default):
+    t = type(obj)
+    if obj is None or t is bool or t in _STRING_TYPES:
+        return obj
+    elif t is float:
+        if obj != obj or obj == _INFINITY or obj == -_INFINITY:
+            raise ValueError("Out of range float values are not JSON compliant")
+        return obj
+    elif t in integer_types:
+        return obj
+    elif isinstance(obj, (list, tuple)):
+        # long lists of plain numbers and strings are common (e.g. data
+        # columns), so check them in bulk rather than item by item
+        types = set(map(type, obj))
+        if types <= _PLAIN_TYPES:
+            return list(obj)
+        if types <= _NUMBER_TYPES:
+            try:
+                total = sum(obj)
+            except OverflowError:
+                total = None
+            # any NaN or infinity makes the total non-finite
+            if total is not None and total - total == 0:
+                return list(obj)
+        return [_plain_json_value(item, default) for item in obj]
+    elif isinstance(obj, dict):
+        return dict((_plain_json_key(key), _plain_json_value(value, default)) for key, value in iteritems(obj))
+    elif isinstance(obj, string_types):
+        return obj
+    elif isinstance(obj, float):
+        return _plain_json_value(float(obj), default)
+    elif isinstance(obj, integer_types):
+        return int(obj)
+    else:
+        return _plain_json_value(default(obj), default)
+
+def to_plain_json(obj, encoder=BokehJSONEncoder, buffers=None):
+    ''' Return a representation of ``obj`` made only of plain JSON types
+    (dict, list, string, number, bool and None).
+
+    Values are converted exactly as ``serialize_json`` would encode them,
+    so the result is the same as ``json.loads(serialize_json(obj))``,
+    without the cost of producing and parsing a JSON string.
+
+    If ``buffers`` is a list, NumPy arrays are appended to it as binary
+    buffers and only placeholders for them appear in the result.
+
+    '''
+    kwargs = {}
+    if buffers is not None:
+        kwargs['buffers'] = buffers
+    return _plain_json_value(obj, encoder(**kwargs).default)
@@ -626,6 +626,18 @@ class MetaHasProps(type):
         return super(MetaHasProps, meta_cls).__new__(meta_cls, class_name, bases, class_dict)
 
     def __init__(cls, class_name, bases, nmspc):
+        # Gather the property metadata for the whole class hierarchy once,
+        # up front, so that instances never have to walk the MRO to find
+        # it. Classes can't gain properties after they are created, so this
+        # never needs to be invalidated.
+        names = accumulate_from_superclasses(cls, "__properties__")
+        accumulate_from_superclasses(cls, "__properties_with_refs__")
+        accumulate_from_superclasses(cls, "__container_props__")
+        dataspecs = accumulate_dict_from_superclasses(cls, "__dataspecs__")
+        accumulate_dict_from_superclasses(cls, "__overridden_defaults__")
+        cls.__property_lookup__ = dict((name, getattr(cls, name)) for name in names)
+        cls.__dataspec_names__ = frozenset(dataspecs)
+
         if class_name == 'HasProps':
             return
         # Check for improperly overriding a Property attribute.
@@ -663,10 +675,10 @@ def accumulate_from_superclasses(cls, propname):
     if cachename not in cls.__dict__:
         s = set()
         for c in inspect.getmro(cls):
-            if issubclass(c, HasProps) and hasattr(c, propname):
+            if isinstance(c, MetaHasProps) and hasattr(c, propname):
                 base = getattr(c, propname)
                 s.update(base)
-        setattr(cls, cachename, s)
+        setattr(cls, cachename, frozenset(s))
     return cls.__dict__[cachename]
 
 def accumulate_dict_from_superclasses(cls, propname):
@@ -676,7 +688,7 @@ def accumulate_dict_from_superclasses(cls, propname):
     if cachename not in cls.__dict__:
         d = dict()
         for c in inspect.getmro(cls):
-            if issubclass(c, HasProps) and hasattr(c, propname):
+            if isinstance(c, MetaHasProps) and hasattr(c, propname):
                 base = getattr(c, propname)
                 for k,v in base.items():
                     if k not in d:
@@ -703,18 +715,16 @@ class HasProps(with_metaclass(MetaHasProps, object)):
             setattr(self, name, value)
 
     def __setattr__(self, name, value):
-        # self.properties() below can be expensive so avoid it
-        # if we're just setting a private underscore field
+        # avoid looking up the properties at all if we're just
+        # setting a private underscore field
         if name.startswith("_"):
             super(HasProps, self).__setattr__(name, value)
             return
 
-        props = sorted(self.properties())
-        deprecated = getattr(self, '__deprecated_attributes__', [])
-
-        if name in props or name in deprecated:
+        if name in self.__property_lookup__ or name in getattr(self, '__deprecated_attributes__', []):
             super(HasProps, self).__setattr__(name, value)
         else:
+            props = sorted(self.properties())
             matches, text = difflib.get_close_matches(name.lower(), props), "similar"
 
             if not matches:
@@ -729,9 +739,9 @@ class HasProps(with_metaclass(MetaHasProps, object)):
         JSON contains references to models.
 
         """
-        if name in self.properties():
+        if name in self.__property_lookup__:
             #logger.debug("Patching attribute %s of %r", attr, patched_obj)
-            prop = self.lookup(name)
+            prop = self.__property_lookup__[name]
             prop.set_from_json(self, json, models)
         else:
             logger.warn("JSON had attr %r on obj %r, which is a client-only or invalid attribute that shouldn't have been sent", name, self)
@@ -754,6 +764,9 @@ class HasProps(with_metaclass(MetaHasProps, object)):
 
     @classmethod
     def lookup(cls, name):
+        props = cls.__property_lookup__
+        if name in props:
+            return props[name]
         return getattr(cls, name)
 
     @classmethod
@@ -801,7 +814,7 @@ class HasProps(with_metaclass(MetaHasProps, object)):
         """ Returns a set of the names of this object's dataspecs (and
         dataspec subclasses).  Traverses the class hierarchy.
         """
-        return set(cls.dataspecs_with_props().keys())
+        return cls.__dataspec_names__
 
     @classmethod
     def dataspecs_with_props(cls):
@@ -834,8 +847,9 @@ class HasProps(with_metaclass(MetaHasProps, object)):
             if self.themed_values():
                 keys |= set(self.themed_values().keys())
 
+        lookup = self.__property_lookup__
         for key in keys:
-            prop = self.lookup(key)
+            prop = lookup[key]
             if not prop.serialized:
                 continue
 
@@ -125,6 +125,8 @@ class PropertyValueDict(PropertyValueContainer, dict):
 
     '''
     def __init__(self, *args, **kwargs):
+        # backing arrays for ndarray columns that are appended to by _stream
+        self._column_buffers = {}
         return super(PropertyValueDict, self).__init__(*args, **kwargs)
 
     def _saved_copy(self):
@@ -165,15 +167,15 @@ class PropertyValueDict(PropertyValueContainer, dict):
 
         # NOTE: assumes stream data validity has already been verified
 
-        old = self._saved_copy()
+        # The columns are updated in-place, and the hint carries all the
+        # information about the change, so there is no "old" value worth
+        # copying: owners are notified with the current dict as "old"
 
         import numpy as np
 
         for k, v in new_data.items():
             if isinstance(self[k], np.ndarray):
-                data = np.append(self[k], new_data[k])
-                if rollover and len(data) > rollover:
-                    data = data[-rollover:]
+                data = self._append_to_column(k, v, rollover)
                 super(PropertyValueDict, self).__setitem__(k, data)
             else:
                 L = self[k]
@@ -183,7 +185,7 @@ class PropertyValueDict(PropertyValueContainer, dict):
 
         from ..document import ColumnsStreamedEvent
 
-        self._notify_owners(old,
+        self._notify_owners(self,
                             hint=ColumnsStreamedEvent(doc, source, new_data, rollover))
 
     # notifies owners explicitly
@@ -191,13 +193,62 @@ class PropertyValueDict(PropertyValueContainer, dict):
 
         # NOTE: assumes patch validity has already been verified
 
-        old = self._saved_copy()
-
         for name, patch in patches.items():
             for ind, value in patch:
                 self[name][ind] = value
 
         from ..document import ColumnsPatchedEvent
 
-        self._notify_owners(old,
+        self._notify_owners(self,
                             hint=ColumnsPatchedEvent(doc, source, patches))
+
+    def _append_to_column(self, k, new_data, rollover=None):
+        ''' Append streamed data to an ndarray column, returning the new
+        column value.
+
+        One dimensional columns are kept as views onto a larger backing
+        array, so that appending only has to copy the new data. When the
+        backing array is full, the (at most ``rollover``) values that are
+        kept are copied into a new array with twice that capacity, which
+        makes appends and rollover amortized O(k) in the length of the new
+        data. A new backing array is always allocated rather than reusing
+        the old one, so column values handed out earlier never change.
+
+        '''
+        import numpy as np
+
+        column = self[k]
+        new_data = np.asarray(new_data)
+
+        if column.ndim != 1 or new_data.ndim != 1:
+            data = np.append(column, new_data)
+            if rollover and len(data) > rollover:
+                data = data[-rollover:]
+            return data
+
+        dtype = np.result_type(column, new_data)
+
+        buf, end = None, 0
+        if k in self._column_buffers:
+            view, buf, end = self._column_buffers[k]
+            if view is not column or buf.dtype != dtype:
+                buf = None
+
+        n = len(new_data)
+        size = len(column) + n
+        if rollover:
+            size = min(size, rollover)
+
+        if buf is not None and end + n <= len(buf):
+            buf[end:end+n] = new_data
+            end += n
+        else:
+            kept_old = max(size - n, 0)
+            buf = np.empty(max(2 * size, 16), dtype=dtype)
+            buf[:kept_old] = column[len(column)-kept_old:]
+            buf[kept_old:size] = new_data[n-(size-kept_old):]
+            end = size
+
+        data = buf[end-size:end]
+        self._column_buffers[k] = (data, buf, end)
+        return data
@@ -156,6 +156,104 @@ def find(objs, selector, context=None):
     return (obj for obj in objs if match(obj, selector, context))
 
 
+def find_indexed(objs, selector, index, context=None):
+    ''' Like ``find``, but use ``index`` to only test the objects that can
+    match the ``type``, ``tags`` and ``name`` keys of the selector.
+
+    Args:
+        objs (seq[Model]) : all the objects to query
+        selector (JSON-like) : query selector
+            See module docs for details
+        index (object) : provides ``by_type(cls)``, ``by_tag(tag)`` and
+            ``by_name(name)`` methods that return a dict of the objects
+            (keyed by id) that have that type (or a subclass of it), tag or
+            name, or None if the index can't answer
+
+    Yields:
+        Model : objects that match the query
+
+    '''
+    candidates = _candidates(selector, index)
+    if candidates is not None:
+        objs = list(candidates.values())
+    return find(objs, selector, context)
+
+
+def _candidates(selector, index):
+    ''' Find the objects the indexes narrow the query to, or None if they
+    don't apply to any key of the selector.
+
+    '''
+    narrowed = []
+    for key, val in selector.items():
+        if key == "type":
+            found = _type_candidates(val, index)
+        elif key == "tags":
+            found = _tag_candidates(val, index)
+        elif key == "name":
+            found = _name_candidates(val, index)
+        elif key is OR:
+            found = _union([_candidates(sub_selector, index) for sub_selector in val])
+        else:
+            found = None
+
+        if found is not None:
+            narrowed.append(found)
+
+    if not narrowed:
+        return None
+    narrowed.sort(key=len)
+    smallest, others = narrowed[0], narrowed[1:]
+    if not others:
+        return smallest
+    return dict((key, obj) for key, obj in smallest.items() if all(key in other for other in others))
+
+
+def _type_candidates(val, index):
+    if isinstance(val, dict) and list(val.keys()) == [IN]:
+        types = val[IN]
+    elif isinstance(val, tuple):
+        types = val
+    else:
+        types = [val]
+    if not all(isinstance(t, type) for t in types):
+        return None
+    return _union([index.by_type(t) for t in types])
+
+
+def _tag_candidates(val, index):
+    # mirrors match(): a string is one tag, and other values are tested as
+    # a collection of tags if they can be, else as a single tag
+    if isinstance(val, string_types):
+        tags = [val]
+    else:
+        try:
+            tags = list(set(val))
+        except TypeError:
+            tags = [val]
+    return _union([index.by_tag(tag) for tag in tags])
+
+
+def _name_candidates(val, index):
+    if isinstance(val, string_types):
+        return index.by_name(val)
+    if isinstance(val, dict) and list(val.keys()) == [IN]:
+        if all(isinstance(name, string_types) for name in val[IN]):
+            return _union([index.by_name(name) for name in val[IN]])
+    return None
+
+
+def _union(found):
+    if any(f is None for f in found):
+        return None
+    if len(found) == 1:
+        return found[0]
+    result = {}
+    for f in found:
+        result.update(f)
+    return result
+
+
 def _or(obj, selectors):
     return any(match(obj, selector) for selector in selectors)
 
@@ -4,6 +4,7 @@ Bokeh models (e.g. plots, widgets, layouts) in various ways.
 .. bokeh-jinja:: bokeh.core.templates.AUTOLOAD_JS
 .. bokeh-jinja:: bokeh.core.templates.AUTOLOAD_TAG
 .. bokeh-jinja:: bokeh.core.templates.CSS_RESOURCES
+.. bokeh-jinja:: bokeh.core.templates.DOC_BINARY_JS
 .. bokeh-jinja:: bokeh.core.templates.DOC_JS
 .. bokeh-jinja:: bokeh.core.templates.FILE
 .. bokeh-jinja:: bokeh.core.templates.JS_RESOURCES
@@ -27,6 +28,7 @@ SCRIPT_TAG = _env.get_template("script_tag.html")
 PLOT_DIV = _env.get_template("plot_div.html")
 
 DOC_JS = _env.get_template("doc_js.js")
+DOC_BINARY_JS = _env.get_template("doc_binary_js.js")
 
 FILE = _env.get_template("file.html")
 
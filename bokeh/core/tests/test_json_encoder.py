@@ -4,6 +4,7 @@ import unittest
 from unittest import skipIf
 
 import datetime as dt
+import json
 import time
 
 import numpy as np
@@ -14,6 +15,12 @@ try:
 except ImportError as e:
     is_pandas = False
 
+try:
+    import simplejson # NOQA
+    is_simplejson = True
+except ImportError:
+    is_simplejson = False
+
 
 class TestBokehJSONEncoder(unittest.TestCase):
 
@@ -137,5 +144,85 @@ class TestSerializeJson(unittest.TestCase):
         deserialized = self.deserialize(serialized)
         assert deserialized == delta.total_seconds() * 1000
 
+class TestJsonBackends(unittest.TestCase):
+
+    def setUp(self):
+        from bokeh.core.json_encoder import serialize_json
+        self.serialize = serialize_json
+
+    def _serialize_with_env(self, obj, **env):
+        from mock import patch
+        with patch.dict('os.environ', env):
+            return self.serialize(obj)
+
+    def test_default_sorts_keys(self):
+        self.assertEqual(self.serialize({'b': 1, 'a': 2}), '{"a":2,"b":1}')
+
+    def test_sort_keys_argument(self):
+        value = dict((k, i) for i, k in enumerate("zyxwvu"))
+        self.assertEqual(self.serialize(value, sort_keys=False), json.dumps(value, separators=(",", ":")))
+
+    def test_sort_keys_setting(self):
+        from json import loads
+        value = {'b': 1, 'a': 2}
+        result = self._serialize_with_env(value, BOKEH_JSON_SORT_KEYS="false")
+        self.assertEqual(loads(result), value)
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, self._serialize_with_env, {'a': 1}, BOKEH_JSON_BACKEND="nope")
+
+    @skipIf(not is_simplejson, "simplejson is not installed")
+    def test_simplejson_backend(self):
+        value = {'a': [np.float32(1.5), np.int64(2), dt.timedelta(seconds=1)], 'b': np.arange(3), 'c': (1, 2)}
+        for backend in ["simplejson", "auto"]:
+            self.assertEqual(self._serialize_with_env(value, BOKEH_JSON_BACKEND=backend),
+                             self._serialize_with_env(value, BOKEH_JSON_BACKEND="stdlib"))
+        self.assertRaises(ValueError, self._serialize_with_env, {'a': float('nan')}, BOKEH_JSON_BACKEND="simplejson")
+
+    def test_python_type_converters_are_cached(self):
+        from bokeh.core.json_encoder import BokehJSONEncoder, _python_type_converters
+        encoder = BokehJSONEncoder()
+        self.assertEqual(encoder.transform_python_types(np.float32(1.5)), 1.5)
+        self.assertIs(_python_type_converters[np.float32], float)
+        self.assertRaises(TypeError, encoder.transform_python_types, object())
+        self.assertIsNone(_python_type_converters[object])
+
+class TestToPlainJson(unittest.TestCase):
+
+    def setUp(self):
+        from bokeh.core.json_encoder import serialize_json, to_plain_json
+        from json import loads
+        self.to_plain_json = to_plain_json
+        self.round_trip = lambda obj: loads(serialize_json(obj))
+
+    def test_matches_serialize_json(self):
+        from bokeh.models import ColumnDataSource, Range1d
+        values = [
+            {'a': [1, 2.5, None, "x", True], 'b': {1: 2, 2.5: 3}, 'c': {True: 1}, 'd': {None: 2}},
+            {'array': np.arange(5), 'floats': np.array([1.5, np.nan, np.inf])},
+            [np.float32(1.5), np.int64(3), np.bool_(True), (1, 2)],
+            [dt.date(2016, 4, 28), dt.datetime(2016, 4, 28, 2, 20, 50)],
+            Range1d(start=0, end=10),
+            {'source': ColumnDataSource(data=dict(x=[1, 2]))},
+        ]
+        for value in values:
+            self.assertEqual(self.to_plain_json(value), self.round_trip(value))
+
+    def test_plain_types_only(self):
+        result = self.to_plain_json({'a': (np.int64(1), np.float64(2.5))})
+        self.assertEqual(result, {'a': [1, 2.5]})
+        self.assertIs(type(result['a'][0]), int)
+        self.assertIs(type(result['a'][1]), float)
+
+    def test_nans_and_infs(self):
+        for value in [float('nan'), [1.0, float('inf')], {'a': [float('-inf')]}]:
+            self.assertRaises(ValueError, self.to_plain_json, value)
+
+    def test_buffers(self):
+        buffers = []
+        result = self.to_plain_json({'x': np.arange(3.0)}, buffers=buffers)
+        self.assertEqual(len(buffers), 1)
+        self.assertEqual(result['x']['__buffer__'], buffers[0][0]['id'])
+
 if __name__ == "__main__":
     unittest.main()
@@ -200,6 +200,26 @@ class Basictest(unittest.TestCase):
                                   sub_num=sub.lookup("sub_num")),
                              sub.dataspecs_with_props())
 
+    def test_property_metadata_is_precomputed(self):
+        class Base(HasProps):
+            num = NumberSpec(12)
+            child = Instance(HasProps)
+
+        class Sub(Base):
+            sub_num = Int(12)
+
+        for cls in (Base, Sub):
+            self.assertEqual(set(cls.__property_lookup__), cls.properties())
+            for name in cls.properties():
+                self.assertIs(cls.lookup(name), getattr(cls, name))
+        self.assertIsInstance(Sub.properties(), frozenset)
+        self.assertIsInstance(Sub.properties_with_refs(), frozenset)
+        self.assertIs(Sub.dataspecs(), Sub.dataspecs())
+        self.assertEqual(set(["num"]), Sub.dataspecs())
+
+        # subclasses don't change the metadata of their bases
+        self.assertEqual(set(["num", "child"]), Base.properties())
+
     def test_not_serialized(self):
         class NotSerialized(HasProps):
             x = Int(12, serialized=False)
@@ -3,6 +3,7 @@ from __future__ import absolute_import
 import unittest
 
 import bokeh.core.query as query
+from bokeh.document import Document
 
 from bokeh.models import (
     Axis, BoxZoomTool, ColumnDataSource, DatetimeAxis, GlyphRenderer, Grid, LinearAxis,
@@ -229,5 +230,43 @@ class TestFind(unittest.TestCase):
         )
         self.assertEqual(len(res), 0)
 
+class TestFindIndexed(unittest.TestCase):
+
+    def setUp(self):
+        self.plot = large_plot()
+        self.doc = Document()
+        self.doc.add_root(self.plot)
+
+    def test_same_as_find(self):
+        from bokeh.core.query import OR, IN
+        objs = self.doc._all_models.values()
+        selectors = [
+            {'type': Axis},
+            {'type': {IN: [Axis, Grid]}},
+            {'type': (Range1d, Tool)},
+            {'type': Glyph, 'fill_color': 'red'},
+            {'tags': 'foo'},
+            {'tags': ['foo', 'bar']},
+            {'tags': 'foo', 'type': Range1d, 'end': 1},
+            {'name': 'mycircle'},
+            {'name': {IN: ['mycircle', 'myrect']}},
+            {OR: [{'type': Axis}, {'name': 'myline'}]},
+            {OR: [{'type': Axis}, {'dimension': 0}]},
+            {'dimension': 1},
+        ]
+        for selector in selectors:
+            expected = list(query.find(objs, selector))
+            found = list(query.find_indexed(objs, selector, self.doc._all_models_index))
+            self.assertEqual(set(found), set(expected), selector)
+            self.assertEqual(len(found), len(expected), selector)
+
+    def test_narrows_candidates(self):
+        candidates = query._candidates({'type': Axis, 'tags': 'foo'}, self.doc._all_models_index)
+        self.assertEqual(candidates, {})
+        candidates = query._candidates({'type': Axis, 'major_label_orientation': 'horizontal'},
+                                       self.doc._all_models_index)
+        self.assertEqual(len(candidates), 3)
+        self.assertIsNone(query._candidates({'dimension': 0}, self.doc._all_models_index))
+
 if __name__ == "__main__":
     unittest.main()
@@ -16,6 +16,7 @@ logger = logging.getLogger(__file__)
 # this code snippet was originally posted in followig stack overflow discussion:
 # http://stackoverflow.com/a/28752007
 
+from collections import Counter, deque
 from functools import wraps, partial, WRAPPER_ASSIGNMENTS
 try:
     wraps(partial(wraps))(wraps)
@@ -29,8 +30,8 @@ from json import loads
 import jinja2
 from six import string_types
 
-from .core.json_encoder import serialize_json
-from .core.query import find
+from .core.json_encoder import serialize_json, to_plain_json
+from .core.query import find_indexed
 from .core.templates import FILE
 from .core.validation import check_integrity
 from .model import Model
@@ -39,7 +40,7 @@ from .themes import Theme
 from .util.callback_manager import _check_callback
 from .util.deprecate import deprecated
 from .util.version import __version__
-from .util.serialization import make_id
+from .util.serialization import decode_binary_dicts, make_id
 
 DEFAULT_TITLE = "Bokeh Application"
 
@@ -81,6 +82,41 @@ def without_document_lock(f):
     wrapper.nolock = True
     return wrapper
 
+class ReadOnlyDocumentProxy(UnlockedDocumentProxy):
+    ''' Wrap a Document object so that only methods that read it (and
+    add_next_tick_callback) are exposed. Attempts to otherwise access or
+    change the Document results in an exception.
+
+    '''
+
+    _read_only_attrs = frozenset(['roots', 'title', 'get_model_by_id', 'get_model_by_name',
+                                  'select', 'select_one', 'to_json', 'to_json_string'])
+
+    def __getattr__(self, attr):
+        if attr in self._read_only_attrs:
+            return getattr(self._doc, attr)
+        raise RuntimeError(
+            "Only reading the document and add_next_tick_callback may be used from a callback "
+            "holding the document read lock; to make changes to the document, add a next tick "
+            "callback and make your changes from that callback.")
+
+def with_document_read_lock(f):
+    ''' Mark a callback function to execute while holding the document
+    lock only for reading. Other such callbacks, and clients pulling the
+    document, can run at the same time.
+
+    .. warning::
+        The value of curdoc() inside the callback will only allow reading
+        the document. Changing the document or its models inside the
+        callback raises an error.
+
+    '''
+    @wraps(f)
+    def wrapper(*args, **kw):
+        return f(*args, **kw)
+    wrapper.readlock = True
+    return wrapper
+
 class DocumentChangedEvent(object):
     def __init__(self, document):
         self.document = document
@@ -192,17 +228,96 @@ class SessionCallback(object):
         """ Internal API used to wrap the callback with decorators."""
         raise NotImplementedError("_copy_with_changed_callback")
 
+class PeriodicCallbackStats(object):
+    ''' Timing statistics for a periodic callback run by a Bokeh server.
+    Durations are in milliseconds, like the period.
+
+    Args:
+        period (int) : the period of the callback
+        samples (int, optional) : how many recent runs the 99th percentile
+            and the duty cycle are computed from
+
+    '''
+    def __init__(self, period, samples=1000):
+        self.period = period
+        self.runs = 0
+        self.overruns = 0
+        self.skipped_ticks = 0
+        self.last_duration = None
+        self._total_duration = 0.0
+        self._recent = deque(maxlen=samples)
+        self._overrun_callbacks = []
+
+    def on_overrun(self, callback):
+        ''' Call ``callback`` with no arguments each time a run takes longer
+        than the period. '''
+        self._overrun_callbacks.append(callback)
+
+    def record(self, duration):
+        ''' Record that the callback ran for ``duration`` milliseconds. '''
+        self.runs += 1
+        if duration > self.period:
+            self.overruns += 1
+            for callback in self._overrun_callbacks:
+                callback()
+        self.last_duration = duration
+        self._total_duration += duration
+        self._recent.append(duration)
+
+    @property
+    def mean_duration(self):
+        if self.runs == 0:
+            return None
+        return self._total_duration / self.runs
+
+    @property
+    def p99_duration(self):
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+
+    @property
+    def duty_cycle(self):
+        ''' The fraction of the period that recent runs took on average. '''
+        if not self._recent or self.period <= 0:
+            return None
+        return sum(self._recent) / len(self._recent) / self.period
+
+    def to_dict(self):
+        return dict(period=self.period, runs=self.runs, overruns=self.overruns,
+                    skipped_ticks=self.skipped_ticks, last_duration=self.last_duration,
+                    mean_duration=self.mean_duration, p99_duration=self.p99_duration,
+                    duty_cycle=self.duty_cycle)
+
 class PeriodicCallback(SessionCallback):
-    def __init__(self, document, callback, period, id=None):
+    def __init__(self, document, callback, period, id=None, adaptive=False):
         super(PeriodicCallback, self).__init__(document, callback, id)
         self._period = period
+        self._adaptive = adaptive
+        self._stats = PeriodicCallbackStats(period)
 
     @property
     def period(self):
         return self._period
 
+    @property
+    def adaptive(self):
+        ''' Whether ticks that pass while the callback is still running are
+        skipped, rather than running the callback again right away. '''
+        return self._adaptive
+
+    @property
+    def stats(self):
+        ''' Timing statistics for the callback (a ``PeriodicCallbackStats``),
+        kept while it runs on a Bokeh server. '''
+        return self._stats
+
     def _copy_with_changed_callback(self, new_callback):
-        return PeriodicCallback(self._document, new_callback, self._period, self._id)
+        copy = PeriodicCallback(self._document, new_callback, self._period, self._id, self._adaptive)
+        # the wrapped copy is what runs, so it records into our stats
+        copy._stats = self._stats
+        return copy
 
 class TimeoutCallback(SessionCallback):
     def __init__(self, document, callback, timeout, id=None):
@@ -278,6 +393,123 @@ class _MultiValuedDict(object):
         else:
             return [existing]
 
+class _ModelIndex(object):
+    """
+    Indexes the models of a document by type (including all their base
+    classes) and by tag, and by name through the document's by-name dict,
+    for ``find_indexed``. Models are kept in the order they were added.
+    """
+    def __init__(self, by_name):
+        self._by_name = by_name
+        self._by_type = dict()
+        self._by_tag = dict()
+        # model id -> the tags the model is indexed under
+        self._tags = dict()
+        # models with unhashable tags, which could match any tag
+        self._unhashable_tags = dict()
+
+    def add(self, model):
+        for cls in type(model).__mro__:
+            self._by_type.setdefault(cls, dict())[model._id] = model
+        self._add_tags(model)
+
+    def remove(self, model):
+        for cls in type(model).__mro__:
+            models = self._by_type.get(cls)
+            if models is not None:
+                models.pop(model._id, None)
+                if not models:
+                    del self._by_type[cls]
+        self._remove_tags(model)
+
+    def update_tags(self, model):
+        if model._id in self._tags:
+            self._remove_tags(model)
+            self._add_tags(model)
+
+    def _add_tags(self, model):
+        tags = list(model.tags)
+        try:
+            tags = set(tags)
+        except TypeError:
+            self._unhashable_tags[model._id] = model
+            tags = set(tag for tag in tags if _is_hashable(tag))
+        for tag in tags:
+            self._by_tag.setdefault(tag, dict())[model._id] = model
+        self._tags[model._id] = tags
+
+    def _remove_tags(self, model):
+        for tag in self._tags.pop(model._id, ()):
+            models = self._by_tag[tag]
+            del models[model._id]
+            if not models:
+                del self._by_tag[tag]
+        self._unhashable_tags.pop(model._id, None)
+
+    def by_type(self, cls):
+        return self._by_type.get(cls, {})
+
+    def by_tag(self, tag):
+        if not _is_hashable(tag):
+            return None
+        models = self._by_tag.get(tag, {})
+        if self._unhashable_tags:
+            models = dict(models)
+            models.update(self._unhashable_tags)
+        return models
+
+    def by_name(self, name):
+        return dict((model._id, model) for model in self._by_name.get_all(name))
+
+def _is_hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+def _reference_graph(models):
+    ''' Collect all the models reachable from ``models``.
+
+    Returns:
+        tuple(dict, dict) : a mapping of model ids to models, and a mapping of
+        model ids to the list of models they immediately reference (with one
+        entry per reference)
+
+    '''
+    collected = {}
+    references = {}
+    queued = deque(models)
+    while queued:
+        model = queued.popleft()
+        if model._id in collected:
+            continue
+        collected[model._id] = model
+        refs = []
+        Model._visit_immediate_value_references(model, refs.append)
+        references[model._id] = refs
+        queued.extend(refs)
+    return collected, references
+
+def _count_references(references):
+    ''' Count the references to each model id in a reference graph. '''
+    counts = Counter()
+    for refs in references.values():
+        for m in refs:
+            counts[m._id] += 1
+    return counts
+
+def _subtract_references(models, counts):
+    ''' Remove ``counts[id]`` occurrences of each model id from ``models``. '''
+    counts = Counter(counts)
+    result = []
+    for m in models:
+        if counts[m._id] > 0:
+            counts[m._id] -= 1
+        else:
+            result.append(m)
+    return result
+
 class Document(object):
     '''
 
@@ -294,8 +526,15 @@ class Document(object):
         self._all_models_freeze_count = 0
         self._all_models = dict()
         self._all_models_by_name = _MultiValuedDict()
+        self._all_models_index = _ModelIndex(self._all_models_by_name)
+        # number of references to each model from roots and from other
+        # models in this document, keyed by model id
+        self._all_models_refcount = dict()
         self._callbacks = {}
         self._session_callbacks = {}
+        # incremented on every change, so that anything derived from the
+        # document (e.g. its serialized form) can tell whether it is stale
+        self._revision = 0
 
     def clear(self):
         ''' Remove all content from the document (including roots, vars, stores) but do not reset title'''
@@ -342,31 +581,133 @@ class Document(object):
         if self._all_models_freeze_count == 0:
             self._recompute_all_models()
 
-    def _invalidate_all_models(self):
+    def _invalidate_all_models(self, model=None, old=None, new=None):
+        ''' Update the set of models in the document after a change to the
+        references of ``model``, whose value changed from ``old`` to ``new``.
+
+        If ``model`` is None, or the document is frozen, the full set of
+        models is recomputed (when unfreezing); otherwise only the models
+        that gained or lost a reference are visited.
+
+        '''
         # if freeze count is > 0, we'll recompute on unfreeze
-        if self._all_models_freeze_count == 0:
+        if self._all_models_freeze_count != 0:
+            return
+        if model is None or model._id not in self._all_models:
             self._recompute_all_models()
+            return
+
+        added = []
+        Model._visit_value_and_its_immediate_references(new, added.append)
+        removed = []
+        Model._visit_value_and_its_immediate_references(old, removed.append)
+
+        # container mutations pass the whole old and new containers, so
+        # only keep the references that actually differ between them
+        unchanged = Counter(m._id for m in added) & Counter(m._id for m in removed)
+        if unchanged:
+            added = _subtract_references(added, unchanged)
+            removed = _subtract_references(removed, unchanged)
+
+        # add before removing, so that models which are only moved around
+        # never get detached from the document
+        self._add_model_references(added)
+        self._remove_model_references(removed)
 
     def _recompute_all_models(self):
-        new_all_models_set = set()
-        for r in self.roots:
-            new_all_models_set = new_all_models_set.union(r.references())
-        old_all_models_set = set(self._all_models.values())
-        to_detach = old_all_models_set - new_all_models_set
-        to_attach = new_all_models_set - old_all_models_set
+        new_all_models, references = _reference_graph(self._roots)
+
+        refcount = dict(_count_references(references))
+        for r in self._roots:
+            refcount[r._id] = refcount.get(r._id, 0) + 1
+
+        to_detach = [m for m in self._all_models.values() if m._id not in new_all_models]
+        to_attach = [m for m in new_all_models.values() if m._id not in self._all_models]
 
-        recomputed = {}
         recomputed_by_name = _MultiValuedDict()
-        for m in new_all_models_set:
-            recomputed[m._id] = m
+        recomputed_index = _ModelIndex(recomputed_by_name)
+        for m in new_all_models.values():
             if m.name is not None:
                 recomputed_by_name.add_value(m.name, m)
+            recomputed_index.add(m)
         for d in to_detach:
             d._detach_document()
         for a in to_attach:
             a._attach_document(self)
-        self._all_models = recomputed
+        self._all_models = new_all_models
         self._all_models_by_name = recomputed_by_name
+        self._all_models_index = recomputed_index
+        self._all_models_refcount = refcount
+
+    def _add_model_references(self, models):
+        ''' Count one new reference to each of ``models``, attaching any
+        model (and the models it references) that wasn't in the document.
+
+        '''
+        refcount = self._all_models_refcount
+        queued = deque(models)
+        while queued:
+            model = queued.popleft()
+            count = refcount.get(model._id, 0)
+            if count == 0:
+                model._attach_document(self)
+                self._all_models[model._id] = model
+                if model.name is not None:
+                    self._all_models_by_name.add_value(model.name, model)
+                self._all_models_index.add(model)
+                Model._visit_immediate_value_references(model, queued.append)
+            refcount[model._id] = count + 1
+
+    def _remove_model_references(self, models):
+        ''' Drop one reference to each of ``models``, detaching any models
+        that are no longer reachable from a root.
+
+        Models commonly refer back to their parents (e.g. axes and tools to
+        their plot), so a reference count dropping to zero isn't enough to
+        find unreachable models. Instead, the models reachable from the ones
+        that lost a reference are collected, and those of them that are
+        referenced from outside that subgraph (or are roots) are used to
+        find the models that are still alive.
+
+        '''
+        if not models:
+            return
+
+        refcount = self._all_models_refcount
+        for model in models:
+            refcount[model._id] = refcount.get(model._id, 0) - 1
+
+        subgraph, references = _reference_graph(models)
+        internal = _count_references(references)
+
+        live = set()
+        queued = deque()
+        for model_id, model in subgraph.items():
+            if model_id not in self._all_models or refcount.get(model_id, 0) < internal[model_id]:
+                # the counts are out of sync with the graph
+                self._recompute_all_models()
+                return
+            if refcount[model_id] > internal[model_id]:
+                queued.append(model)
+        while queued:
+            model = queued.popleft()
+            if model._id not in live:
+                live.add(model._id)
+                queued.extend(references[model._id])
+
+        garbage = [m for m in subgraph.values() if m._id not in live]
+        if live:
+            for model in garbage:
+                for child in references[model._id]:
+                    if child._id in live:
+                        refcount[child._id] -= 1
+        for model in garbage:
+            del refcount[model._id]
+            del self._all_models[model._id]
+            if model.name is not None:
+                self._all_models_by_name.remove_value(model.name, model)
+            self._all_models_index.remove(model)
+            model._detach_document()
 
     @property
     def roots(self):
@@ -426,16 +767,14 @@ class Document(object):
         '''
         if model in self._roots:
             return
-        self._push_all_models_freeze()
         # TODO(bird) Should we do some kind of reporting of how many LayoutDOM
         # items are in the document roots. In vanilla bokeh cases e.g.
         # output_file, output_server more than one LayoutDOM is probably not
         # going to go well. But in embedded cases, you may well want more than
         # one.
-        try:
-            self._roots.append(model)
-        finally:
-            self._pop_all_models_freeze()
+        self._roots.append(model)
+        if self._all_models_freeze_count == 0:
+            self._add_model_references([model])
         self._trigger_on_change(RootAddedEvent(self, model))
 
     @deprecated("Bokeh 0.11.0", "document.add_root")
@@ -465,11 +804,13 @@ class Document(object):
         '''
         if model not in self._roots:
             return # TODO (bev) ValueError?
-        self._push_all_models_freeze()
-        try:
-            self._roots.remove(model)
-        finally:
-            self._pop_all_models_freeze()
+        self._roots.remove(model)
+        if self._all_models_freeze_count == 0:
+            if self._roots:
+                self._remove_model_references([model])
+            else:
+                # nothing can be left, don't bother looking for what to detach
+                self._recompute_all_models()
         self._trigger_on_change(RootRemovedEvent(self, model))
 
     def get_model_by_id(self, model_id):
@@ -497,12 +838,16 @@ class Document(object):
         Returns:
             seq[Model]
 
+        The document keeps indexes of its models by type, tag and name, so
+        only the models that can match those keys of the selector are
+        tested against the rest of it.
+
         '''
         if self._is_single_string_selector(selector, 'name'):
             # special-case optimization for by-name query
             return self._all_models_by_name.get_all(selector['name'])
         else:
-            return find(self._all_models.values(), selector)
+            return find_indexed(self._all_models.values(), selector, self._all_models_index)
 
     def select_one(self, selector):
         ''' Query this document for objects that match the given selector.
@@ -572,6 +917,8 @@ class Document(object):
         try:
             if getattr(f, "nolock", False):
                 set_curdoc(UnlockedDocumentProxy(self))
+            elif getattr(f, "readlock", False):
+                set_curdoc(ReadOnlyDocumentProxy(self))
             else:
                 set_curdoc(self)
             return f()
@@ -589,6 +936,7 @@ class Document(object):
         return wrapper
 
     def _trigger_on_change(self, event):
+        self._revision += 1
         def invoke_callbacks():
             for cb in self._callbacks.values():
                 cb(event)
@@ -603,6 +951,8 @@ class Document(object):
                 self._all_models_by_name.remove_value(old, model)
             if new is not None:
                 self._all_models_by_name.add_value(new, model)
+        elif attr == 'tags':
+            self._all_models_index.update_tags(model)
 
         if hint is None:
             serializable_new = model.lookup(attr).serializable_value(model)
@@ -611,12 +961,12 @@ class Document(object):
         self._trigger_on_change(ModelChangedEvent(self, model, attr, old, new, serializable_new, hint))
 
     @classmethod
-    def _references_json(cls, references):
+    def _references_json(cls, references, buffers=None):
         '''Given a list of all models in a graph, return JSON representing them and their properties.'''
         references_json = []
         for r in references:
             ref = r.ref
-            ref['attributes'] = r._to_json_like(include_defaults=False)
+            ref['attributes'] = r._to_json_like(include_defaults=False, buffers=buffers)
             references_json.append(ref)
 
         return references_json
@@ -784,15 +1134,9 @@ class Document(object):
             references=list(value_refs.values())
         )
 
-    def to_json_string(self, indent=None):
-        ''' Convert the document to a JSON string.
-
-        Args:
-            indent (int or None, optional) : number of spaces to indent, or
-                None to suppress all newlines and indentation (default: None)
-
-        Returns:
-            str
+    def _to_json_like(self, buffers=None):
+        ''' Returns a dictionary describing the document, in which models
+        are not yet converted to plain JSON types (see Model._to_json_like)
 
         '''
         root_ids = []
@@ -801,24 +1145,43 @@ class Document(object):
 
         root_references = self._all_models.values()
 
-        json = {
+        return {
             'title' : self.title,
             'roots' : {
                 'root_ids' : root_ids,
-                'references' : self._references_json(root_references)
+                'references' : self._references_json(root_references, buffers=buffers)
             },
             'version' : __version__
         }
 
-        return serialize_json(json, indent=indent)
+    def to_json_string(self, indent=None, buffers=None):
+        ''' Convert the document to a JSON string.
+
+        Args:
+            indent (int or None, optional) : number of spaces to indent, or
+                None to suppress all newlines and indentation (default: None)
+
+            buffers (list or None, optional) : if not None, array data is
+                appended to this list as ``(header, bytes)`` binary buffers
+                and only placeholders for it are included in the JSON
+                (default: None)
+
+        Returns:
+            str
+
+        '''
+        return serialize_json(self._to_json_like(buffers=buffers), indent=indent, buffers=buffers)
+
+    def to_json(self, buffers=None):
+        ''' Convert the document to a JSON object.
 
-    def to_json(self):
-        ''' Convert the document to a JSON object. '''
+        Args:
+            buffers (list or None, optional) : if not None, array data is
+                appended to this list as binary buffers (see
+                ``to_json_string``) (default: None)
 
-        # this is a total hack to go via a string, needed because
-        # our BokehJSONEncoder goes straight to a string.
-        doc_json = self.to_json_string()
-        return loads(doc_json)
+        '''
+        return to_plain_json(self._to_json_like(buffers=buffers), buffers=buffers)
 
     @classmethod
     def from_json_string(cls, json):
@@ -827,8 +1190,18 @@ class Document(object):
         return cls.from_json(json_parsed)
 
     @classmethod
-    def from_json(cls, json):
-        ''' Load a document from JSON. '''
+    def from_json(cls, json, buffers=None):
+        ''' Load a document from JSON.
+
+        Args:
+            json (dict) : document JSON, as created by ``to_json()``
+            buffers (dict or None, optional) : mapping of buffer ids to
+                bytes, used to decode any binary buffer placeholders in
+                ``json`` (default: None)
+
+        '''
+        if buffers:
+            json = decode_binary_dicts(json, buffers)
         roots_json = json['roots']
         root_ids = roots_json['root_ids']
         references_json = roots_json['references']
@@ -844,16 +1217,21 @@ class Document(object):
 
         return doc
 
-    def replace_with_json(self, json):
+    def replace_with_json(self, json, buffers=None):
         ''' Overwrite everything in this document with the JSON-encoded document '''
-        replacement = self.from_json(json)
+        replacement = self.from_json(json, buffers=buffers)
         replacement._destructively_move(self)
 
-    def create_json_patch_string(self, events):
+    def create_json_patch_string(self, events, buffers=None, sort_keys=None):
         ''' Create a JSON string describing a patch to be applied with apply_json_patch_string()
 
             Args:
               events : list of events to be translated into patches
+              buffers (list or None, optional) : if not None, array data
+                is appended to this list as binary buffers instead of
+                being included in the JSON
+              sort_keys (bool or None, optional) : whether to sort keys in
+                the JSON output (see ``serialize_json``)
 
             Returns:
               str :  JSON string which can be applied to make the given updates to obj
@@ -914,18 +1292,28 @@ class Document(object):
 
         json = {
             'events' : json_events,
-            'references' : self._references_json(references)
+            'references' : self._references_json(references, buffers=buffers)
             }
 
-        return serialize_json(json)
+        return serialize_json(json, buffers=buffers, sort_keys=sort_keys)
 
     def apply_json_patch_string(self, patch):
         ''' Apply a JSON patch string created by create_json_patch_string() '''
         json_parsed = loads(patch)
         self.apply_json_patch(json_parsed)
 
-    def apply_json_patch(self, patch):
-        ''' Apply a JSON patch object created by parsing the result of create_json_patch_string() '''
+    def apply_json_patch(self, patch, buffers=None):
+        ''' Apply a JSON patch object created by parsing the result of create_json_patch_string()
+
+        Args:
+            patch (dict) : the parsed JSON patch
+            buffers (dict or None, optional) : mapping of buffer ids to
+                bytes, used to decode any binary buffer placeholders in
+                ``patch`` (default: None)
+
+        '''
+        if buffers:
+            patch = decode_binary_dicts(patch, buffers)
         references_json = patch['references']
         events_json = patch['events']
         references = self._instantiate_references_json(references_json)
@@ -1016,13 +1404,19 @@ class Document(object):
         self._trigger_on_change(SessionCallbackAdded(self, callback_obj))
         return callback_obj
 
-    def add_periodic_callback(self, callback, period_milliseconds):
+    def add_periodic_callback(self, callback, period_milliseconds, adaptive=False):
         ''' Add a callback to be invoked on a session periodically.
 
         Args:
             callback (callable) : the callback function to execute
             period_milliseconds (int) : the number of milliseconds that should
                 be between each callback execution.
+            adaptive (bool, optional) : whether to skip the ticks that pass
+                while the callback is running, if it takes longer than the
+                period, instead of running it again right away (default: False)
+
+        The returned callback's ``stats`` give timing statistics for it
+        while it runs on a Bokeh server.
 
         .. note::
             Periodic callbacks only work within the context of a Bokeh server
@@ -1032,7 +1426,8 @@ class Document(object):
         '''
         cb = PeriodicCallback(self,
                               None,
-                              period_milliseconds)
+                              period_milliseconds,
+                              adaptive=adaptive)
         return self._add_session_callback(cb, callback, one_shot=False)
 
     def remove_periodic_callback(self, callback):
@@ -13,14 +13,17 @@ these different cases.
 
 from __future__ import absolute_import
 
+import base64
 from collections import Sequence
+from io import StringIO
 from warnings import warn
+import zlib
 
 from six import string_types
 
 from .core.templates import (
     AUTOLOAD_JS, AUTOLOAD_TAG, FILE,
-    NOTEBOOK_DIV, PLOT_DIV, DOC_JS, SCRIPT_TAG
+    NOTEBOOK_DIV, PLOT_DIV, DOC_BINARY_JS, DOC_JS, SCRIPT_TAG
 )
 from .core.json_encoder import serialize_json
 from .document import Document, DEFAULT_TITLE
@@ -282,7 +285,9 @@ def file_html(models,
               resources,
               title=None,
               template=FILE,
-              template_variables={}):
+              template_variables={},
+              binary=False,
+              compression=None):
     '''Return an HTML document that embeds Bokeh Model or Document objects.
 
     The data for the plot is stored directly in the returned HTML.
@@ -303,11 +308,22 @@ def file_html(models,
         template_variables (dict, optional) : variables to be used in the Jinja2
             template. If used, the following variable names will be overwritten:
             title, bokeh_js, bokeh_css, plot_script, plot_div
+        binary (bool, optional) : whether to embed NumPy and Pandas array data
+            as base64 encoded binary blobs instead of JSON (default: False)
+            See :func:`write_file_html`.
+        compression (str or None, optional) : ``'zlib'`` to compress the
+            binary blobs (default: None)
 
     Returns:
         UTF-8 encoded HTML
 
     '''
+    if binary:
+        f = StringIO()
+        write_file_html(f, models, resources, title=title, template=template,
+                        template_variables=template_variables, compression=compression)
+        return encode_utf8(f.getvalue())
+
     models = _check_models(models)
 
     with _ModelInDocument(models):
@@ -317,6 +333,102 @@ def file_html(models,
         return _html_page_for_render_items(bundle, docs_json, render_items, title=title,
                                            template=template, template_variables=template_variables)
 
+# prefix of the ids of the tags holding binary array data
+_BUFFER_ELEMENT_PREFIX = "bokeh-buffer-"
+
+# where the binary array data goes in the rendered page
+_BUFFERS_MARKER = u"<!-- BOKEH_BUFFERS -->"
+
+# bytes of array data per write, a multiple of 3 so that the base64
+# encoded chunks can be concatenated
+_BASE64_CHUNK_BYTES = 3 * 2**16
+
+def write_file_html(f,
+                    models,
+                    resources,
+                    title=None,
+                    template=FILE,
+                    template_variables={},
+                    compression=None):
+    '''Write an HTML document that embeds Bokeh Model or Document objects
+    to a text file, with array data in compact binary form.
+
+    Arrays in the documents (NumPy arrays and Pandas series, such as the
+    columns of a ColumnDataSource) are not written as JSON. Instead, each
+    one is written to the page as a separate base64 encoded blob, one at a
+    time, after the rest of the page, so that the whole page is never held
+    in memory as a string. The page decodes the blobs before rendering.
+
+    The raw bytes of every array are copied out of the documents before
+    anything is written, and each copy is released once it is written, so
+    peak memory use is about one extra copy of the array data.
+
+    Args:
+        f (file) : a text file, e.g. opened with ``io.open(filename, "w", encoding="utf-8")``
+        models (Model or Document or list) : Bokeh object or objects to render
+            typically a Model or Document
+        resources (Resources or tuple(JSResources or None, CSSResources or None)) : a resource configuration for Bokeh JS & CSS assets.
+        title (str, optional) : a title for the HTML document ``<title>`` tags or None. (default: None)
+            If None, attempt to automatically find the Document title from the given plot objects.
+        template (Template, optional) : HTML document template (default: FILE)
+            A Jinja2 Template, see bokeh.core.templates.FILE for the required
+            template parameters
+        template_variables (dict, optional) : variables to be used in the Jinja2
+            template. If used, the following variable names will be overwritten:
+            title, bokeh_js, bokeh_css, plot_script, plot_div
+        compression (str or None, optional) : ``'zlib'`` to compress the
+            blobs, or None (default: None)
+            Decompressing them requires a browser that supports
+            ``DecompressionStream``.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError
+
+    '''
+    if compression not in (None, "zlib"):
+        raise ValueError("Unknown compression %r, expected None or 'zlib'" % compression)
+
+    models = _check_models(models)
+
+    with _ModelInDocument(models):
+        buffers = []
+        (docs_json, render_items) = _standalone_docs_json_and_render_items(models, buffers=buffers)
+        title = _title_from_models(models, title)
+        bundle = _bundle_for_objs_and_resources(models, resources)
+
+    plot_js = _wrap_in_function(DOC_BINARY_JS.render(
+        docs_json=serialize_json(docs_json),
+        render_items=serialize_json(render_items),
+        buffer_element_prefix=_BUFFER_ELEMENT_PREFIX,
+    ))
+    script = _BUFFERS_MARKER + "\n" + SCRIPT_TAG.render(js_code=plot_js)
+    html = _render_page(bundle, script, render_items, title, template, template_variables)
+    head, tail = html.split(_BUFFERS_MARKER, 1)
+
+    f.write(head)
+    # write (and let go of) one array at a time
+    buffers.reverse()
+    while buffers:
+        header, payload = buffers.pop()
+        _write_buffer(f, header['id'], payload, compression)
+    f.write(tail)
+
+def _write_buffer(f, buffer_id, payload, compression):
+    if compression == "zlib":
+        payload = zlib.compress(payload)
+        f.write(u'<script type="application/octet-stream" id="%s%s" data-compression="zlib">'
+                % (_BUFFER_ELEMENT_PREFIX, buffer_id))
+    else:
+        f.write(u'<script type="application/octet-stream" id="%s%s">' % (_BUFFER_ELEMENT_PREFIX, buffer_id))
+    view = memoryview(payload)
+    for start in range(0, len(payload), _BASE64_CHUNK_BYTES):
+        chunk = view[start:start + _BASE64_CHUNK_BYTES].tobytes()
+        f.write(base64.b64encode(chunk).decode('ascii'))
+    f.write(u'</script>\n')
+
 # TODO rename this "standalone"?
 def autoload_static(model, resources, script_path):
     ''' Return JavaScript code and a script tag that can be used to embed
@@ -464,13 +576,15 @@ def _script_for_render_items(docs_json, render_items, websocket_url=None, wrap_s
 
 def _html_page_for_render_items(bundle, docs_json, render_items, title, websocket_url=None,
                                 template=FILE, template_variables={}):
+    script = _script_for_render_items(docs_json, render_items, websocket_url)
+    return encode_utf8(_render_page(bundle, script, render_items, title, template, template_variables))
+
+def _render_page(bundle, script, render_items, title, template, template_variables):
     if title is None:
         title = DEFAULT_TITLE
 
     bokeh_js, bokeh_css = bundle
 
-    script = _script_for_render_items(docs_json, render_items, websocket_url)
-
     template_variables_full = template_variables.copy()
 
     template_variables_full.update(dict(
@@ -481,8 +595,7 @@ def _html_page_for_render_items(bundle, docs_json, render_items, title, websocke
         plot_div = "\n".join(_div_for_render_item(item) for item in render_items)
     ))
 
-    html = template.render(template_variables_full)
-    return encode_utf8(html)
+    return template.render(template_variables_full)
 
 def _check_models(models, allow_dict=False):
     input_type_valid = False
@@ -539,7 +652,7 @@ def _title_from_models(models, title):
     # use default title
     return DEFAULT_TITLE
 
-def _standalone_docs_json_and_render_items(models):
+def _standalone_docs_json_and_render_items(models, buffers=None):
     models = _check_models(models)
 
     render_items = []
@@ -572,7 +685,7 @@ def _standalone_docs_json_and_render_items(models):
 
     docs_json = {}
     for k, v in docs_by_id.items():
-        docs_json[k] = v.to_json()
+        docs_json[k] = v.to_json(buffers=buffers)
 
     return (docs_json, render_items)
 
@@ -619,7 +732,7 @@ def server_html_page_for_models(session_id, model_ids, resources, title, websock
     bundle = _bundle_for_objs_and_resources(None, resources)
     return _html_page_for_render_items(bundle, {}, render_items, title, template=template, websocket_url=websocket_url)
 
-def server_html_page_for_session(session_id, resources, title, websocket_url, template=FILE):
+def server_html_page_for_session(session_id, resources, title, websocket_url, template=FILE, bundle=None):
     elementid = make_id()
     render_items = [{
         'sessionid' : session_id,
@@ -628,5 +741,6 @@ def server_html_page_for_session(session_id, resources, title, websocket_url, te
         # no 'modelid' implies the entire session document
     }]
 
-    bundle = _bundle_for_objs_and_resources(None, resources)
+    if bundle is None:
+        bundle = _bundle_for_objs_and_resources(None, resources)
     return _html_page_for_render_items(bundle, {}, render_items, title, template=template, websocket_url=websocket_url)
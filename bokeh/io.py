@@ -18,9 +18,11 @@ from __future__ import absolute_import
 import logging
 logger = logging.getLogger(__name__)
 
+from contextlib import contextmanager
 import io
 import json
 import os
+import threading
 import warnings
 
 # Third-party imports
@@ -28,7 +30,7 @@ import warnings
 # Bokeh imports
 from .core.state import State
 from .document import Document
-from .embed import notebook_div, standalone_html_page_for_models, autoload_server
+from .embed import notebook_div, standalone_html_page_for_models, autoload_server, write_file_html
 from .models.layouts import LayoutDOM, Row, Column, VBoxForm
 from .layouts import gridplot, GridSpec ; gridplot, GridSpec
 from .model import _ModelInDocument
@@ -47,12 +49,30 @@ _new_param = {'tab': 2, 'window': 1}
 
 _state = State()
 
+# per-thread curdoc() used while documents are built off the main thread
+_thread_curdoc = threading.local()
+
 _nb_loaded = False
 
 #-----------------------------------------------------------------------------
 # Local utilities
 #-----------------------------------------------------------------------------
 
+@contextmanager
+def _thread_local_curdoc():
+    ''' Give the current thread its own curdoc() for the duration of the
+    context, so that set_curdoc() and curdoc() calls made in it neither
+    see nor affect the document of any other thread.
+
+    '''
+    _thread_curdoc.active = True
+    _thread_curdoc.document = None
+    try:
+        yield
+    finally:
+        _thread_curdoc.active = False
+        _thread_curdoc.document = None
+
 #-----------------------------------------------------------------------------
 # Classes and functions
 #-----------------------------------------------------------------------------
@@ -246,7 +266,10 @@ def set_curdoc(doc):
         Calling this function will replace any existing document.
 
     '''
-    _state.document = doc
+    if getattr(_thread_curdoc, 'active', False):
+        _thread_curdoc.document = doc
+    else:
+        _state.document = doc
 
 def curdoc():
     ''' Return the document for the current default state.
@@ -255,6 +278,8 @@ def curdoc():
         doc : the current default document object.
 
     '''
+    if getattr(_thread_curdoc, 'active', False):
+        return _thread_curdoc.document
     return _state.document
 
 def curstate():
@@ -360,7 +385,7 @@ def _show_server_with_state(obj, state, new, controller):
     show_session(session_id=state.session_id_allowing_none, url=state.url, app_path=state.app_path,
                  new=new, controller=controller)
 
-def save(obj, filename=None, resources=None, title=None, state=None, validate=True):
+def save(obj, filename=None, resources=None, title=None, state=None, validate=True, binary=False, compression=None):
     ''' Save an HTML file with the data for the current document.
 
     Will fall back to the default output state (or an explicitly provided
@@ -386,6 +411,15 @@ def save(obj, filename=None, resources=None, title=None, state=None, validate=Tr
 
         validate (bool, optional) : True to check integrity of the models
 
+        binary (bool, optional) : whether to save array data (such as NumPy
+            columns of a ColumnDataSource) as base64 encoded binary blobs
+            instead of JSON (default: False)
+            This makes files with large arrays much smaller and faster to
+            write and to load. See :func:`bokeh.embed.write_file_html`.
+
+        compression (str, optional) : ``'zlib'`` to compress the binary
+            blobs (default: None)
+
     Returns:
         filename (str) : the filename where the HTML file is saved.
 
@@ -397,7 +431,7 @@ def save(obj, filename=None, resources=None, title=None, state=None, validate=Tr
         state = _state
 
     filename, resources, title = _get_save_args(state, filename, resources, title)
-    _save_helper(obj, filename, resources, title, validate)
+    _save_helper(obj, filename, resources, title, validate, binary, compression)
     return os.path.abspath(filename)
 
 def _detect_filename(ext):
@@ -450,7 +484,7 @@ def _get_save_args(state, filename, resources, title):
 
     return filename, resources, title
 
-def _save_helper(obj, filename, resources, title, validate):
+def _save_helper(obj, filename, resources, title, validate, binary=False, compression=None):
     with _ModelInDocument(obj):
         if isinstance(obj, LayoutDOM):
             doc = obj.document
@@ -462,6 +496,11 @@ def _save_helper(obj, filename, resources, title, validate):
         if validate:
             doc.validate()
 
+        if binary:
+            with io.open(filename, "w", encoding="utf-8") as f:
+                write_file_html(f, obj, resources, title, compression=compression)
+            return
+
         html = standalone_html_page_for_models(obj, resources, title)
 
         with io.open(filename, "w", encoding="utf-8") as f:
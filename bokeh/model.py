@@ -3,12 +3,12 @@ from __future__ import absolute_import, print_function
 import logging
 logger = logging.getLogger(__file__)
 
+from collections import deque
 from contextlib import contextmanager
-from json import loads
 
 from six import iteritems
 
-from .core.json_encoder import serialize_json
+from .core.json_encoder import serialize_json, to_plain_json
 from .core.properties import Any, HasProps, List, MetaHasProps, String
 from .core.query import find
 from .themes import default as default_theme
@@ -116,7 +116,7 @@ class Model(with_metaclass(Viewable, HasProps, CallbackManager)):
                 self._visit_value_and_its_immediate_references(new, mark_dirty)
                 self._visit_value_and_its_immediate_references(old, mark_dirty)
                 if dirty['count'] > 0:
-                    self._document._invalidate_all_models()
+                    self._document._invalidate_all_models(self, old, new)
         # chain up to invoke callbacks
         super(Model, self).trigger(attr, old, new, hint)
 
@@ -146,6 +146,11 @@ class Model(with_metaclass(Viewable, HasProps, CallbackManager)):
             seq[Model]
 
         '''
+        doc = self._document
+        if doc is not None and doc._roots == [self] and doc._all_models_freeze_count == 0:
+            # everything in the document is reachable from this sole root,
+            # so use its indexes instead of collecting the references
+            return doc.select(selector)
         return find(self.references(), selector)
 
     def select_one(self, selector):
@@ -224,7 +229,7 @@ class Model(with_metaclass(Viewable, HasProps, CallbackManager)):
         """
         ids = set([])
         collected = []
-        queued = []
+        queued = deque()
 
         def queue_one(obj):
             if obj._id not in ids:
@@ -234,7 +239,7 @@ class Model(with_metaclass(Viewable, HasProps, CallbackManager)):
             cls._visit_value_and_its_immediate_references(value, queue_one)
 
         while queued:
-            obj = queued.pop(0)
+            obj = queued.popleft()
             if obj._id not in ids:
                 ids.add(obj._id)
                 collected.append(obj)
@@ -246,7 +251,7 @@ class Model(with_metaclass(Viewable, HasProps, CallbackManager)):
         """Returns all ``Models`` that this object has references to. """
         return set(self.collect_models(self))
 
-    def _to_json_like(self, include_defaults):
+    def _to_json_like(self, include_defaults, buffers=None):
         """ Returns a dictionary of the attributes of this object, in
         a layout corresponding to what BokehJS expects at unmarshalling time.
 
@@ -263,6 +268,10 @@ class Model(with_metaclass(Viewable, HasProps, CallbackManager)):
             include_defaults (bool) : whether to include attributes
                 that haven't been changed from the default.
 
+            buffers (list or None, optional) : if not None, subclasses
+                holding array data may append it to this list as binary
+                buffers (default: None)
+
         """
         all_attrs = self.properties_with_values(include_defaults=include_defaults)
 
@@ -313,7 +322,11 @@ class Model(with_metaclass(Viewable, HasProps, CallbackManager)):
                 that haven't been changed from the default
 
         """
-        return loads(self.to_json_string(include_defaults=include_defaults))
+        json_like = self._to_json_like(include_defaults=include_defaults)
+        json_like['id'] = self._id
+        # to_plain_json converts Models into refs and so on, exactly as
+        # serialize_json does in to_json_string
+        return to_plain_json(json_like)
 
     def to_json_string(self, include_defaults):
         """Returns a JSON string encoding the attributes of this object.
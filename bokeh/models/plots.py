@@ -45,6 +45,9 @@ class Plot(LayoutDOM):
 
     """
 
+    # (tool ids, {type: tools}), see _tools_of_type
+    _tool_index = None
+
     def __init__(self, **kwargs):
         if "tool_events" not in kwargs:
             kwargs["tool_events"] = ToolEvents()
@@ -216,6 +219,24 @@ class Plot(LayoutDOM):
     def tools(self, tools):
         self.toolbar.tools = tools
 
+    def _tools_of_type(self, tool_type):
+        """ Return the tools of the toolbar that are instances of ``tool_type``.
+
+        The tools are indexed by each of their classes (including base
+        classes), and the index is only rebuilt when the tools change, so
+        this is much cheaper than ``select(type=tool_type)``, which searches
+        every model referenced by the plot.
+
+        """
+        tools = self.toolbar.tools
+        key = tuple(id(tool) for tool in tools)
+        if self._tool_index is None or self._tool_index[0] != key:
+            index = {}
+            for tool in tools:
+                for cls in type(tool).__mro__:
+                    index.setdefault(cls, []).append(tool)
+            self._tool_index = (key, index)
+        return list(self._tool_index[1].get(tool_type, []))
 
     def add_layout(self, obj, place='center'):
         ''' Adds an object to the plot in a specified place.
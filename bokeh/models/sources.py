@@ -166,10 +166,10 @@ class ColumnDataSource(DataSource):
         self.data[name] = data
         return name
 
-    def _to_json_like(self, include_defaults):
+    def _to_json_like(self, include_defaults, buffers=None):
         attrs = super(ColumnDataSource, self)._to_json_like(include_defaults=include_defaults)
         if 'data' in attrs:
-            attrs['data'] = transform_column_source_data(attrs['data'])
+            attrs['data'] = transform_column_source_data(attrs['data'], buffers=buffers)
         return attrs
 
     def remove(self, name):
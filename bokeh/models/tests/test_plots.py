@@ -14,7 +14,7 @@ import pytest
 
 from bokeh.plotting import figure
 from bokeh.models import GlyphRenderer, Label, Range1d, FactorRange, Plot, LinearAxis, GridPlot
-from bokeh.models.tools import PanTool, Toolbar
+from bokeh.models.tools import BoxSelectTool, Drag, PanTool, Toolbar
 
 
 class TestPlotSelect(unittest.TestCase):
@@ -94,6 +94,20 @@ def test_plot_add_layout_adds_axis_to_renderers_and_side_renderers():
     assert axis in plot.left
 
 
+def test_plot_tools_of_type():
+    plot = Plot()
+    pan, select = PanTool(), BoxSelectTool()
+    plot.add_tools(pan, select)
+    assert plot._tools_of_type(BoxSelectTool) == [select]
+    assert plot._tools_of_type(Drag) == [pan, select]
+    assert plot._tools_of_type(Label) == []
+
+    other = BoxSelectTool()
+    plot.toolbar.tools.append(other)
+    assert plot._tools_of_type(BoxSelectTool) == [select, other]
+    plot.tools = [pan]
+    assert plot._tools_of_type(BoxSelectTool) == []
+
 def test_sizing_mode_property_is_fixed_by_default():
     plot = figure()
     assert plot.sizing_mode is 'fixed'
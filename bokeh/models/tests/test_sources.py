@@ -124,6 +124,51 @@ class TestColumnDataSource(unittest.TestCase):
         self.assertEqual(stuff['args'], ("doc", ds, dict(a=[11, 12], b=[21, 22]), "foo"))
         self.assertEqual(stuff['kw'], {})
 
+    def test_stream_ndarray_columns(self):
+        ds = ColumnDataSource(data=dict(a=np.arange(3), b=np.arange(3.0)))
+        expected = list(range(3))
+        for i in range(3, 100, 7):
+            ds.stream(dict(a=np.arange(i, i+7), b=list(range(i, i+7))))
+            expected.extend(range(i, i+7))
+            self.assertEqual(ds.data['a'].tolist(), expected)
+            self.assertEqual(ds.data['b'].tolist(), expected)
+        self.assertEqual(ds.data['a'].dtype, np.arange(3).dtype)
+        self.assertEqual(ds.data['b'].dtype, np.float64)
+
+    def test_stream_ndarray_columns_rollover(self):
+        ds = ColumnDataSource(data=dict(a=np.arange(3)))
+        expected = list(range(3))
+        for i in range(3, 200, 9):
+            ds.stream(dict(a=np.arange(i, i+9)), 20)
+            expected.extend(range(i, i+9))
+            self.assertEqual(ds.data['a'].tolist(), expected[-20:])
+
+        ds.stream(dict(a=np.arange(50)), 20)
+        self.assertEqual(ds.data['a'].tolist(), list(range(30, 50)))
+
+    def test_stream_ndarray_columns_does_not_change_earlier_values(self):
+        ds = ColumnDataSource(data=dict(a=np.arange(3)))
+        before = []
+        for i in range(3, 100, 5):
+            before.append((ds.data['a'], ds.data['a'].tolist()))
+            ds.stream(dict(a=np.arange(i, i+5)), 10)
+        for value, contents in before:
+            self.assertEqual(value.tolist(), contents)
+
+    def test_stream_ndarray_columns_upcasts(self):
+        ds = ColumnDataSource(data=dict(a=np.arange(3)))
+        ds.stream(dict(a=np.arange(3, 5)))
+        ds.stream(dict(a=[5.5]))
+        self.assertEqual(ds.data['a'].dtype, np.float64)
+        self.assertEqual(ds.data['a'].tolist(), [0, 1, 2, 3, 4, 5.5])
+
+    def test_stream_after_column_replaced(self):
+        ds = ColumnDataSource(data=dict(a=np.arange(3)))
+        ds.stream(dict(a=np.arange(3, 5)))
+        ds.data['a'] = np.arange(10, 12)
+        ds.stream(dict(a=np.arange(12, 14)))
+        self.assertEqual(ds.data['a'].tolist(), [10, 11, 12, 13])
+
     def test_patch_bad_data(self):
         ds = ColumnDataSource(data=dict(a=[10, 11], b=[20, 21]))
         with self.assertRaises(ValueError) as cm:
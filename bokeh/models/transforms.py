@@ -5,7 +5,7 @@ from __future__ import absolute_import
 
 from ..core.enums import StepMode, JitterRandomDistribution
 from ..core.properties import abstract
-from ..core.properties import Either, Enum, Float, Instance, Seq, String, Bool
+from ..core.properties import Any, Either, Enum, Float, Instance, Seq, String, Bool
 from ..model import Model
 from .sources import ColumnDataSource
 
@@ -117,3 +117,27 @@ class StepInterpolator(Interpolator):
     * ``before``: Assume the y-value associated with the nearest x-value which is greater than the point to transform.
     * ``center``: Assume the y-value associated with the nearest x-value to the point to transform.
     """)
+
+
+class CategoricalMap(Transform):
+    ''' Map each of a list of factors (categories) to a value, for instance
+    a color or a size.
+
+    For example, with ``factors=["a", "b"]`` and ``values=["red", "blue"]``,
+    setting ``fill_color=dict(field="kind", transform=mapping)`` fills each
+    glyph with the color of its value in the ``kind`` column, without adding
+    a column of colors to the data source.
+
+    '''
+
+    factors = Seq(Either(String, Float), help="""
+    The factors to map.
+    """)
+
+    values = Seq(Any, help="""
+    The value for each factor, in the same order as ``factors``.
+    """)
+
+    default = Any(default=None, help="""
+    The value for data that are not in ``factors``.
+    """)
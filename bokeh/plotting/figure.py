@@ -3,9 +3,14 @@ from __future__ import absolute_import, print_function
 import logging
 logger = logging.getLogger(__name__)
 
+from contextlib import contextmanager
+
 from ..models import Plot
 from ..models import glyphs, markers
-from .helpers import _get_range, _process_axis_and_grid, _process_tools_arg, _glyph_function, _process_active_tools
+from .helpers import (
+    _get_range, _process_axis_and_grid, _process_tools_arg, _glyph_function, _process_active_tools,
+    _add_glyph_renderers, _GlyphBatch
+)
 from ..util._plot_arg_helpers import _convert_responsive
 
 DEFAULT_TOOLS = "pan,wheel_zoom,box_zoom,save,reset,help"
@@ -19,6 +24,9 @@ class Figure(Plot):
     __subtype__ = "Figure"
     __view_model__ = "Plot"
 
+    # the _GlyphBatch while in a batch() block
+    _glyph_batch = None
+
     def __init__(self, *arg, **kw):
 
         tools = kw.pop("tools", DEFAULT_TOOLS)
@@ -58,6 +66,41 @@ class Figure(Plot):
         self.add_tools(*tool_objs)
         _process_active_tools(self.toolbar, tool_map, active_drag, active_scroll, active_tap)
 
+    @contextmanager
+    def batch(self):
+        ''' Add the glyph renderers created in a ``with`` block to the plot
+        all at once, at the end of the block.
+
+        Adding a glyph renderer to a plot copies its list of renderers (and
+        that of its box select tools and legend), and triggers change events,
+        so adding many glyphs one at a time takes time quadratic in their
+        number. Inside a batch, glyph methods such as ``circle`` still return
+        their new renderers, but they only appear in ``renderers`` (and in
+        the legend) once the block ends.
+
+        Example:
+
+            .. code-block:: python
+
+                p = figure()
+                with p.batch():
+                    for x, y in lines:
+                        p.line(x, y)
+
+        '''
+        if self._glyph_batch is not None:
+            # nested batches are added by the outermost one
+            yield
+            return
+
+        batch = self._glyph_batch = _GlyphBatch()
+        try:
+            yield
+        finally:
+            self._glyph_batch = None
+            if batch.renderers:
+                _add_glyph_renderers(self, batch.renderers, batch.legend_items)
+
     annular_wedge = _glyph_function(glyphs.AnnularWedge)
 
     annulus = _glyph_function(glyphs.Annulus, """
@@ -15,7 +15,7 @@ from ..models import (
     FactorRange, Grid, HelpTool, HoverTool, LassoSelectTool, Legend, LinearAxis,
     LogAxis, PanTool, PolySelectTool, ContinuousTicker,
     SaveTool, Range, Range1d, UndoTool, RedoTool, ResetTool, ResizeTool, Tool,
-    WheelZoomTool, ColumnDataSource, GlyphRenderer)
+    WheelZoomTool, ColumnDataSource, GlyphRenderer, CategoricalMap)
 
 from ..core.properties import ColorSpec, Datetime
 from ..util.string import nice_join
@@ -124,14 +124,102 @@ def _process_sequence_literals(glyphclass, kwargs, source):
         source.add(val, name=var)
         kwargs[var] = var
 
+def _process_group_by(kwargs, source):
+    """ Set each style keyword argument given in ``group_styles`` to the
+    ``group_by`` column of ``source``, with a ``CategoricalMap`` transform
+    from each group to its style, so no column of styles has to be sent.
+
+    The groups are found once, with NumPy, from the ``group_by`` column (or
+    sequence, which is added to ``source`` as the column ``"group"``).
+    Groups are sorted, unless they can't be compared (e.g. a mix of strings
+    and numbers), in which case they keep the order they first appear in.
+
+    Returns:
+        (groups, maps) : the distinct group values, and the
+            ``CategoricalMap`` of each style
+
+    """
+    group_by = kwargs.pop("group_by")
+    group_styles = kwargs.pop("group_styles", None) or {}
+
+    if not isinstance(source, ColumnDataSource):
+        raise ValueError("group_by can only be used with a ColumnDataSource")
+
+    if isinstance(group_by, string_types):
+        if group_by not in source.data:
+            raise ValueError("group_by column %r is not in the data source, available columns are %s"
+                             % (group_by, nice_join(sorted(source.data))))
+        column = source.data[group_by]
+    else:
+        column = group_by
+        group_by = "group"
+        _set_column(source, group_by, column)
+
+    groups = _distinct_groups(column)
+
+    maps = []
+    for attr, values in group_styles.items():
+        if attr in kwargs:
+            raise ValueError("%r was given both as a keyword argument and in group_styles" % attr)
+        if isinstance(values, dict):
+            missing = [group for group in groups if group not in values]
+            if missing:
+                raise ValueError("group_styles[%r] has no value for groups %s" % (attr, nice_join(map(str, missing))))
+            table = [values[group] for group in groups]
+        else:
+            table = [values[i % len(values)] for i in range(len(groups))]
+        mapping = CategoricalMap(factors=groups, values=table)
+        kwargs[attr] = dict(field=group_by, transform=mapping)
+        maps.append(mapping)
+
+    return groups, maps
+
+def _distinct_groups(column):
+    values = np.asarray(column)
+    if values.dtype.kind in 'SU' and not isinstance(column, np.ndarray):
+        # NumPy turns a list of strings and numbers into all strings
+        values = np.asarray(column, dtype=object)
+    try:
+        groups = np.unique(values).tolist()
+    except TypeError:
+        groups = list(OrderedDict.fromkeys(values.tolist()))
+    if any(group is None or group != group for group in groups):
+        raise ValueError("group_by values can't be None or NaN, since they have no styles to map to")
+    return groups
+
+def _set_column(source, name, data):
+    if name not in source.data:
+        source.column_names.append(name)
+    source.data[name] = data
+
+def _group_legend_renderers(glyph, groups, maps, renderer_kws):
+    """ Make a renderer without any data for each group, drawn in the legend
+    with the styles of the group.
+
+    """
+    source = renderer_kws['data_source']
+    empty = ColumnDataSource(data=dict((name, []) for name in source.column_names))
+    kws = dict(renderer_kws, data_source=empty)
+    props = glyph.properties_with_values(include_defaults=False)
+
+    renderers = []
+    for i in range(len(groups)):
+        group_props = dict(props)
+        for attr, spec in props.items():
+            if isinstance(spec, dict) and spec.get('transform') in maps:
+                group_props[attr] = dict((k, v) for k, v in spec.items() if k not in ('field', 'transform'))
+                group_props[attr]['value'] = spec['transform'].values[i]
+        renderers.append(GlyphRenderer(glyph=glyph.__class__(**group_props), **kws))
+    return renderers
+
 def _make_glyph(glyphclass, kws, extra):
         if extra is None: return None
         kws = kws.copy()
         kws.update(extra)
         return glyphclass(**kws)
 
-def _update_legend(plot, legend_name, glyph_renderer):
-    legends = plot.select(type=Legend)
+def _update_legend(plot, items):
+    legends = plot.legend
     if not legends:
         legend = Legend(plot=plot)
         # this awkward syntax is needed to go through Property.__set__ and
@@ -143,9 +231,42 @@ def _update_legend(plot, legend_name, glyph_renderer):
     else:
         raise RuntimeError("Plot %s configured with more than one legend renderer" % plot)
     specs = OrderedDict(legend.legends)
-    specs.setdefault(legend_name, []).append(glyph_renderer)
+    for legend_name, glyph_renderer in items:
+        specs.setdefault(legend_name, []).append(glyph_renderer)
     legend.legends = list(specs.items())
 
+class _GlyphBatch(object):
+    ''' Glyph renderers (and their legend names) waiting to be added to a
+    plot at the end of a batch.
+
+    '''
+    def __init__(self):
+        self.renderers = []
+        self.legend_items = []
+
+def _add_glyph_renderers(plot, renderers, legend_items):
+    ''' Add new glyph renderers to a plot, its legend and its box select
+    tools, setting each of their properties only once.
+
+    Args:
+        plot (Plot) : the plot to add to
+        renderers (list[GlyphRenderer]) : the renderers to add
+        legend_items (list[tuple[str, GlyphRenderer]]) : legend names for
+            the renderers that have one
+
+    '''
+    if legend_items:
+        _update_legend(plot, legend_items)
+
+    for tool in plot._tools_of_type(BoxSelectTool):
+        # this awkward syntax is needed to go through Property.__set__ and
+        # therefore trigger a change event. With improvements to Property
+        # we might be able to use a more natural append() or +=
+        tool.renderers = tool.renderers + renderers
+
+    # awkward syntax for same reason mentioned above
+    plot.renderers = plot.renderers + renderers
+
 def _get_range(range_input):
     if range_input is None:
         return DataRange1d()
@@ -376,6 +497,11 @@ Other Parameters:
     color (Color) : an alias to set all color keyword args at once
     source (ColumnDataSource) : a user supplied data source
     legend (str) : a legend tag for this glyph
+    group_by (str or seq) : a column of ``source`` (or a sequence) whose values
+        split the rows into groups, see below
+    group_styles (dict) : maps style keyword args (e.g. ``color``) to a list
+        of values for the groups, in sorted order, or to a dict from each
+        group to its value
     x_range_name (str) : name an extra range to use for mapping x-coordinates
     y_range_name (str) : name an extra range to use for mapping y-coordinates
     level (Enum) : control the render level order for this glyph
@@ -384,6 +510,12 @@ It is also possible to set the color and alpha parameters of a "nonselection"
 glyph. To do so, prefix any visual parameter with ``'nonselection_'``.
 For example, pass ``nonselection_alpha`` or ``nonselection_fill_alpha``.
 
+With ``group_by``, many series share a single data source and glyph
+renderer: each style in ``group_styles`` maps the ``group_by`` column to
+the value of the group of each row, in the browser. Pass ``legend=True`` to add a
+legend entry for each group (or a format string such as ``"Type {}"`` for
+the labels).
+
 Returns:
     GlyphRenderer
 """
@@ -401,6 +533,13 @@ def _glyph_function(glyphclass, extra_docs=None):
         attributes = dict(zip(glyphclass._args, args))
         kwargs.update(attributes)
 
+        if "group_by" in kwargs:
+            groups, group_maps = _process_group_by(kwargs, source)
+        elif "group_styles" in kwargs:
+            raise ValueError("group_styles can only be used with group_by")
+        else:
+            groups = None
+
         # handle the main glyph, need to process literals
         glyph_ca = _pop_colors_and_alpha(glyphclass, kwargs)
         _process_sequence_literals(glyphclass, kwargs, source)
@@ -432,17 +571,27 @@ def _glyph_function(glyphclass, extra_docs=None):
                                        hover_glyph=hglyph,
                                        **renderer_kws)
 
-        if legend_name:
-            _update_legend(self, legend_name, glyph_renderer)
-
-        for tool in self.select(type=BoxSelectTool):
-            # this awkward syntax is needed to go through Property.__set__ and
-            # therefore trigger a change event. With improvements to Property
-            # we might be able to use a more natural append() or +=
-            tool.renderers = tool.renderers + [glyph_renderer]
-
-        # awkward syntax for same reason mentioned above
-        self.renderers = self.renderers + [glyph_renderer]
+        renderers = [glyph_renderer]
+        if not legend_name:
+            legend_items = []
+        elif groups is None:
+            legend_items = [(legend_name, glyph_renderer)]
+        else:
+            legend_renderers = _group_legend_renderers(glyph, groups, group_maps, renderer_kws)
+            renderers.extend(legend_renderers)
+            if isinstance(legend_name, string_types):
+                labels = [legend_name.format(group) for group in groups]
+            else:
+                labels = [str(group) for group in groups]
+            legend_items = list(zip(labels, legend_renderers))
+
+        batch = getattr(self, '_glyph_batch', None)
+        if batch is not None:
+            # added all at once when the batch ends, see Figure.batch
+            batch.renderers.extend(renderers)
+            batch.legend_items.extend(legend_items)
+        else:
+            _add_glyph_renderers(self, renderers, legend_items)
         return glyph_renderer
 
     func.__name__ = glyphclass.__view_model__
@@ -1,8 +1,11 @@
 from __future__ import absolute_import
 import unittest
 
+import numpy as np
+
+from bokeh.document import Document
 from bokeh.models import (
-    LinearAxis, PanTool, BoxZoomTool, LassoSelectTool, ResetTool, ResizeTool)
+    ColumnDataSource, LinearAxis, PanTool, BoxZoomTool, LassoSelectTool, ResetTool, ResizeTool)
 
 import bokeh.plotting as plt
 
@@ -220,6 +223,106 @@ class TestMarkers(unittest.TestCase):
         with self.assertRaises(ValueError):
             p.circle([1, 2, 3], [1, 2, 3], level="bad_input")
 
+class TestBatch(unittest.TestCase):
+
+    def test_renderers_are_added_at_the_end(self):
+        p = plt.figure(tools="box_select")
+        before = len(p.renderers)
+        with p.batch():
+            r1 = p.circle([1, 2], [3, 4], legend="a")
+            r2 = p.line([1, 2], [3, 4], legend="b")
+            r3 = p.circle([1, 2], [3, 4], legend="a")
+            self.assertEqual(len(p.renderers), before)
+        legend = p.legend[0]
+        self.assertEqual(p.renderers[before:], [legend, r1, r2, r3])
+        self.assertEqual(legend.legends, [("a", [r1, r3]), ("b", [r2])])
+        self.assertEqual(p.tools[0].renderers, [r1, r2, r3])
+
+    def test_properties_change_once(self):
+        p = plt.figure(tools="box_select")
+        doc = Document()
+        doc.add_root(p)
+        events = []
+        doc.on_change(lambda event: events.append(event.attr))
+        with p.batch():
+            for i in range(10):
+                p.circle([i], [i])
+        self.assertEqual(sorted(events), ["renderers", "renderers"])
+
+    def test_nested(self):
+        p = plt.figure()
+        before = len(p.renderers)
+        with p.batch():
+            with p.batch():
+                r = p.circle([1], [1])
+            self.assertEqual(len(p.renderers), before)
+        self.assertEqual(p.renderers[-1], r)
+
+class TestGroupBy(unittest.TestCase):
+
+    def _source(self):
+        return ColumnDataSource(data=dict(x=[1, 2, 3, 4], y=[5, 6, 7, 8], kind=["b", "a", "b", "c"]))
+
+    def test_styles_map_group_column(self):
+        p = plt.figure()
+        source = self._source()
+        before = len(p.renderers)
+        r = p.circle('x', 'y', source=source, group_by='kind',
+                     group_styles=dict(color=["red", "green", "blue"], size={"a": 1, "b": 2, "c": 3}))
+        self.assertEqual(len(p.renderers), before + 1)
+        self.assertIs(r.data_source, source)
+        self.assertEqual(sorted(source.data), ['kind', 'x', 'y'])
+        colors = r.glyph.fill_color['transform']
+        self.assertEqual(r.glyph.fill_color['field'], 'kind')
+        self.assertEqual(r.glyph.line_color, dict(field='kind', transform=colors))
+        self.assertEqual(colors.factors, ["a", "b", "c"])
+        self.assertEqual(colors.values, ["red", "green", "blue"])
+        self.assertEqual(r.glyph.size['field'], 'kind')
+        self.assertEqual(r.glyph.size['transform'].values, [1, 2, 3])
+
+    def test_sequence_group_by_and_cycled_styles(self):
+        p = plt.figure()
+        r = p.line([1, 2, 3], [4, 5, 6], group_by=[0, 1, 2], group_styles=dict(color=["red", "blue"]))
+        self.assertEqual(list(r.data_source.data['group']), [0, 1, 2])
+        self.assertEqual(r.glyph.line_color['field'], 'group')
+        self.assertEqual(r.glyph.line_color['transform'].values, ["red", "blue", "red"])
+
+    def test_unsortable_groups_keep_first_seen_order(self):
+        p = plt.figure()
+        r = p.circle([1, 2, 3, 4], [1, 2, 3, 4], group_by=["b", 1, "a", 1],
+                     group_styles=dict(color=["red", "green", "blue"]))
+        self.assertEqual(r.glyph.fill_color['transform'].factors, ["b", 1, "a"])
+
+    def test_missing_groups(self):
+        p = plt.figure()
+        with self.assertRaises(ValueError):
+            p.circle([1, 2], [1, 2], group_by=["a", None], group_styles=dict(color=["red"]))
+        with self.assertRaises(ValueError):
+            p.circle([1, 2], [1, 2], group_by=np.array([1.0, np.nan]), group_styles=dict(color=["red"]))
+
+    def test_legend_entry_per_group(self):
+        p = plt.figure()
+        r = p.circle('x', 'y', source=self._source(), group_by='kind',
+                     group_styles=dict(color=["red", "green", "blue"]), legend="kind {}")
+        legends = p.legend[0].legends
+        self.assertEqual([label for label, _ in legends], ["kind a", "kind b", "kind c"])
+        for (label, (renderer,)), color in zip(legends, ["red", "green", "blue"]):
+            self.assertEqual(renderer.glyph.fill_color, dict(value=color))
+            self.assertEqual(renderer.data_source.data['x'], [])
+            self.assertIn(renderer, p.renderers)
+        self.assertEqual(r.glyph.fill_color['field'], 'kind')
+
+    def test_errors(self):
+        p = plt.figure()
+        with self.assertRaises(ValueError):
+            p.circle('x', 'y', source=self._source(), group_by='missing')
+        with self.assertRaises(ValueError):
+            p.circle('x', 'y', source=self._source(), group_by='kind', group_styles=dict(color={"a": "red"}))
+        with self.assertRaises(ValueError):
+            p.circle('x', 'y', source=self._source(), group_styles=dict(color=["red"]))
+        with self.assertRaises(ValueError):
+            p.circle('x', 'y', source=self._source(), group_by='kind', size=3, group_styles=dict(size=[1]))
+
 def test_title_kwarg_no_warning(recwarn):
     plt.figure(title="title")
     assert len(recwarn) == 0
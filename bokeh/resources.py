@@ -16,6 +16,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 import json
+import os
 from os.path import basename, join, relpath
 import re
 
@@ -30,6 +31,10 @@ from .util.string import snakify
 from .util.session_id import generate_session_id
 from .model import Model
 
+# contents of inlined files, keyed by path, along with the modification
+# time and size they were read at
+_inline_cache = {}
+
 DEFAULT_SERVER_HOST = "localhost"
 DEFAULT_SERVER_PORT = 5006
 DEFAULT_SERVER_HTTP_URL = "http://%s:%d/" % (DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT)
@@ -320,6 +325,16 @@ class BaseResources(object):
         return (files, raw)
 
     def _inline(self, path):
+        # BokehJS is several MB, so only read it again if it has changed
+        try:
+            stat = os.stat(path)
+            version = (stat.st_mtime, stat.st_size)
+        except OSError:
+            version = None
+        cached = _inline_cache.get(path)
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+
         begin = "/* BEGIN %s */" % basename(path)
         try:
             with open(path, 'rb') as f:
@@ -327,7 +342,10 @@ class BaseResources(object):
         except IOError:
             middle = ""
         end = "/* END %s */"  % basename(path)
-        return "%s\n%s\n%s" % (begin, middle, end)
+        result = "%s\n%s\n%s" % (begin, middle, end)
+        if version is not None:
+            _inline_cache[path] = (version, result)
+        return result
 
 class JSResources(BaseResources):
     ''' The Resources class encapsulates information relating to loading or embedding Bokeh Javascript.
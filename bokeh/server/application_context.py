@@ -6,15 +6,25 @@ from __future__ import absolute_import
 import logging
 log = logging.getLogger(__name__)
 
+from collections import deque
+
 from tornado import gen
 
-from .session import ServerSession
+from . import metrics
+from .session import ServerSession, current_time
 from .exceptions import ProtocolError
 
 from bokeh.application.application import ServerContext, SessionContext
 from bokeh.document import Document
+from bokeh.io import _thread_local_curdoc
 from bokeh.util.tornado import _CallbackGroup, yield_for_all_futures
 
+def _initialize_document(application, doc):
+    # runs on a worker thread; nothing else can see ``doc`` until we hand
+    # it back to the IOLoop, so no document lock is needed
+    with _thread_local_curdoc():
+        application.initialize_document(doc)
+
 class BokehServerContext(ServerContext):
     def __init__(self, application_context):
         self.application_context = application_context
@@ -83,16 +93,43 @@ class ApplicationContext(object):
     ''' Server-side holder for bokeh.application.Application plus any associated data.
         This holds data that's global to all sessions, while ServerSession holds
         data specific to an "instance" of the application.
+
+        If an ``executor`` (e.g. a ``concurrent.futures.ThreadPoolExecutor``)
+        is given, new session documents are initialized on it rather than
+        on the IOLoop, so a slow application does not hold up other sessions.
+
+        If ``session_pool_size`` is greater than zero, up to that many sessions
+        are built ahead of time (see ``fill_session_pool``) and handed out by
+        ``claim_pooled_session``, so that requests which don't ask for a
+        particular session ID don't have to wait for a document to be built.
+        The session callbacks of pooled sessions only start when they are
+        claimed. Pooled sessions that are not claimed within
+        ``session_pool_ttl_milliseconds`` are discarded and rebuilt.
     '''
 
-    def __init__(self, application, develop=False, io_loop=None):
+    def __init__(self, application, develop=False, io_loop=None, executor=None,
+                 session_pool_size=0, session_pool_ttl_milliseconds=600000, url=None):
         self._application = application
+        self._url = url
         self._develop = develop
         self._loop = io_loop
+        self._executor = executor
         self._sessions = dict()
         self._pending_sessions = dict()
         self._session_contexts = dict()
         self._server_context = None
+        self._session_pool_size = session_pool_size
+        self._session_pool_ttl_milliseconds = session_pool_ttl_milliseconds
+        # (creation time, session, session context), oldest first
+        self._session_pool = deque()
+        self._session_pool_filling = 0
+        self._session_pool_hits = 0
+        self._session_pool_misses = 0
+        self._session_pool_evictions = 0
+
+    @property
+    def url(self):
+        return self._url
 
     @property
     def io_loop(self):
@@ -116,6 +153,21 @@ class ApplicationContext(object):
     def sessions(self):
         return self._sessions.values()
 
+    @property
+    def session_pool_size(self):
+        return self._session_pool_size
+
+    @property
+    def session_pool_stats(self):
+        ''' A dict with the current ``size`` of the session pool, and counts
+        of pool ``hits``, ``misses`` and ``evictions`` so far.
+
+        '''
+        return dict(size=len(self._session_pool),
+                    hits=self._session_pool_hits,
+                    misses=self._session_pool_misses,
+                    evictions=self._session_pool_evictions)
+
     def run_load_hook(self):
         try:
             result = self._application.on_server_loaded(self.server_context)
@@ -136,6 +188,35 @@ class ApplicationContext(object):
 
         self.server_context._remove_all_callbacks()
 
+    @gen.coroutine
+    def _create_session(self, session_id, start_callbacks=True):
+        start = current_time()
+        doc = Document()
+
+        session_context = BokehSessionContext(session_id,
+                                              self.server_context,
+                                              doc)
+        try:
+            yield yield_for_all_futures(self._application.on_session_created(session_context))
+        except Exception as e:
+            log.error("Failed to run session creation hooks %r", e, exc_info=True)
+
+        if self._executor is None:
+            self._application.initialize_document(doc)
+        else:
+            yield self._executor.submit(_initialize_document, self._application, doc)
+
+        session = ServerSession(session_id, doc, io_loop=self._loop, app_path=self._url,
+                                start_callbacks=start_callbacks)
+        metrics.sessions_created.inc((self._url or "",))
+        metrics.session_build_seconds.observe((current_time() - start) / 1000.0, (self._url or "",))
+        raise gen.Return((session, session_context))
+
+    def _add_session(self, session, session_context):
+        self._sessions[session.id] = session
+        session_context._set_session(session)
+        self._session_contexts[session.id] = session_context
+
     @gen.coroutine
     def create_session_if_needed(self, session_id):
         # this is because empty session_ids would be "falsey" and
@@ -147,23 +228,10 @@ class ApplicationContext(object):
            session_id not in self._pending_sessions:
             future = self._pending_sessions[session_id] = gen.Future()
 
-            doc = Document()
+            session, session_context = yield self._create_session(session_id)
 
-            session_context = BokehSessionContext(session_id,
-                                                  self.server_context,
-                                                  doc)
-            try:
-                yield yield_for_all_futures(self._application.on_session_created(session_context))
-            except Exception as e:
-                log.error("Failed to run session creation hooks %r", e, exc_info=True)
-
-            self._application.initialize_document(doc)
-
-            session = ServerSession(session_id, doc, io_loop=self._loop)
             del self._pending_sessions[session_id]
-            self._sessions[session_id] = session
-            session_context._set_session(session)
-            self._session_contexts[session_id] = session_context
+            self._add_session(session, session_context)
 
             # notify anyone waiting on the pending session
             future.set_result(session)
@@ -177,6 +245,59 @@ class ApplicationContext(object):
 
         raise gen.Return(session)
 
+    def claim_pooled_session(self):
+        ''' Take a ready-made session out of the session pool.
+
+        Returns:
+            ServerSession, or None if the pool is disabled or empty
+
+        '''
+        if self._session_pool_size <= 0:
+            return None
+        if not self._session_pool:
+            self._session_pool_misses += 1
+            return None
+        self._session_pool_hits += 1
+        created, session, session_context = self._session_pool.popleft()
+        # the unused session lifetime starts now, not when it was built
+        session._last_unsubscribe_time = current_time()
+        self._add_session(session, session_context)
+        session.start_callbacks()
+        return session
+
+    @gen.coroutine
+    def fill_session_pool(self, generate_session_id):
+        ''' Discard pooled sessions that have outlived the pool time-to-live,
+        then build new sessions until the pool is full.
+
+        Args:
+            generate_session_id (callable) : returns a new session ID
+
+        '''
+        if self._session_pool_size <= 0:
+            raise gen.Return(None)
+
+        now = current_time()
+        while self._session_pool and \
+              now - self._session_pool[0][0] > self._session_pool_ttl_milliseconds:
+            created, session, session_context = self._session_pool.popleft()
+            self._session_pool_evictions += 1
+            yield self._destroy_session(session, session_context)
+
+        while len(self._session_pool) + self._session_pool_filling < self._session_pool_size:
+            self._session_pool_filling += 1
+            try:
+                session, session_context = yield self._create_session(generate_session_id(),
+                                                                      start_callbacks=False)
+            except Exception as e:
+                log.error("Failed to create pooled session %r", e, exc_info=True)
+                break
+            finally:
+                self._session_pool_filling -= 1
+            self._session_pool.append((current_time(), session, session_context))
+
+        raise gen.Return(None)
+
     def get_session(self, session_id):
         if session_id in self._sessions:
             session = self._sessions[session_id]
@@ -202,6 +323,7 @@ class ApplicationContext(object):
             # we want to skip session destruction though.
             if should_discard(session) and session.expiration_blocked_count == 1:
                 session.destroy()
+                metrics.sessions_destroyed.inc((self._url or "",))
                 del self._sessions[session.id]
                 del self._session_contexts[session.id]
             else:
@@ -211,14 +333,26 @@ class ApplicationContext(object):
         # session lifecycle hooks are supposed to be called outside the document lock,
         # we only run these if we actually ended up destroying the session.
         if session_context.destroyed:
-            try:
-                result = self._application.on_session_destroyed(session_context)
-                yield yield_for_all_futures(result)
-            except Exception as e:
-                log.error("Failed to run session destroy hooks %r", e, exc_info=True)
+            yield self._run_session_destroyed_hooks(session_context)
 
         raise gen.Return(None)
 
+    @gen.coroutine
+    def _destroy_session(self, session, session_context):
+        # for sessions that were never handed out, so nothing can be using them
+        session_context._set_session(session)
+        yield session.with_document_locked(session.destroy)
+        metrics.sessions_destroyed.inc((self._url or "",))
+        yield self._run_session_destroyed_hooks(session_context)
+
+    @gen.coroutine
+    def _run_session_destroyed_hooks(self, session_context):
+        try:
+            result = self._application.on_session_destroyed(session_context)
+            yield yield_for_all_futures(result)
+        except Exception as e:
+            log.error("Failed to run session destroy hooks %r", e, exc_info=True)
+
     @gen.coroutine
     def cleanup_sessions(self, unused_session_linger_milliseconds):
         def should_discard_ignoring_block(session):
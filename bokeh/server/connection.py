@@ -3,19 +3,74 @@
 '''
 from __future__ import absolute_import
 
+import logging
+log = logging.getLogger(__name__)
+
 import codecs
+from collections import deque
+from itertools import takewhile
+
+import numpy as np
+
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+from bokeh.document import ColumnsPatchedEvent, ColumnsStreamedEvent, ModelChangedEvent
+
+def _message_bytes(message):
+    return len(message.header_json) + len(message.metadata_json) + len(message.content_json) + \
+        sum(len(header) + len(payload) for header, payload in message.buffers)
+
+class _QueuedMessage(object):
+    def __init__(self, message, events):
+        self.message = message
+        # the events of a PATCH-DOC, or None for other messages
+        self.events = events
+        self.size = _message_bytes(message)
+        self.futures = []
 
 class ServerConnection(object):
     ''' Wraps a websocket connection to a client.
+
+    Messages are sent from a queue, one at a time, so that sending to a
+    slow client never holds up the session's document lock. PATCH-DOC
+    messages shared with other connections are queued as they are, already
+    serialized by the session while it held the document lock. When the
+    client is ready for more, the patches waiting at the front of the queue
+    are thinned out: a patch that only changes attributes that a later
+    queued patch sets the whole value of is dropped, and consecutive
+    patches that only stream or patch columns are combined into one. The
+    document is never read again at that point, since it may already
+    include changes that are still queued, or not queued yet.
+
+    If more than ``max_queued_bytes`` are waiting when a patch is queued,
+    the ``slow_consumer_policy`` is applied: ``"resync"`` replaces all
+    queued patches with one patch carrying the current value of everything
+    they changed, serialized right away while the session still holds the
+    document lock, and ``"disconnect"`` closes the connection.
+
     '''
 
-    def __init__(self, protocol, socket, application_context, session):
+    def __init__(self, protocol, socket, application_context, session, use_buffers=False,
+                 max_queued_bytes=None, slow_consumer_policy="resync"):
+        if slow_consumer_policy not in ("resync", "disconnect"):
+            raise ValueError("slow_consumer_policy must be 'resync' or 'disconnect'")
         self._protocol = protocol
+        self._use_buffers = use_buffers
         self._socket = socket
         self._application_context = application_context
         self._session = session
         self._session.subscribe(self)
         self._ping_count = 0
+        self._max_queued_bytes = max_queued_bytes
+        self._slow_consumer_policy = slow_consumer_policy
+        self._queue = deque()
+        self._queued_bytes = 0
+        self._sending = False
+        self._disconnected = False
+        self._stats = dict(messages_sent=0, bytes_sent=0, max_queued_bytes=0,
+                           events_coalesced=0, resyncs=0, disconnects=0)
 
     @property
     def session(self):
@@ -25,11 +80,29 @@ class ServerConnection(object):
     def application_context(self):
         return self._application_context
 
+    @property
+    def use_buffers(self):
+        """ Whether the client asked to receive array data as binary buffers. """
+        return self._use_buffers
+
+    @property
+    def queued_bytes(self):
+        """ Number of bytes of messages waiting to be sent. """
+        return self._queued_bytes
+
+    @property
+    def outbound_stats(self):
+        """ A dict with the number of messages and bytes sent, the most bytes
+        ever waiting to be sent, and how many queued events were coalesced,
+        and how often the client fell behind (``resyncs`` and ``disconnects``). """
+        return dict(self._stats)
+
     def detach_session(self):
         """Allow the session to be discarded and don't get change notifications from it anymore"""
         if self._session is not None:
             self._session.unsubscribe(self)
             self._session = None
+        self._drop_queue()
 
     def ok(self, message):
         return self.protocol.create('OK', message.header['msgid'])
@@ -37,10 +110,20 @@ class ServerConnection(object):
     def error(self, message, text):
         return self.protocol.create('ERROR', message.header['msgid'], text)
 
+    def send_message(self, message):
+        """ Queues a message to send, returning a Future that's completed when it's written out. """
+        return self._enqueue(message, None)
+
     def send_patch_document(self, event):
         """ Sends a PATCH-DOC message, returning a Future that's completed when it's written out. """
-        msg = self.protocol.create('PATCH-DOC', [event])
-        return self._socket.send_message(msg)
+        msg = self.protocol.create('PATCH-DOC', [event], use_buffers=self._use_buffers)
+        return self._enqueue(msg, [event])
+
+    def send_patch_message(self, message, events):
+        """ Sends a copy of an already-created PATCH-DOC message that may be shared
+        with other connections, returning a Future that's completed when it's written out.
+        ``events`` are the events in the message, used to merge it with queued patches. """
+        return self._enqueue(message.copy_with_new_msgid(), list(events))
 
     def send_ping(self):
         self._socket.ping(codecs.encode(str(self._ping_count), "utf-8"))
@@ -49,3 +132,204 @@ class ServerConnection(object):
     @property
     def protocol(self):
         return self._protocol
+
+    def _enqueue(self, message, events):
+        future = Future()
+        if self._disconnected:
+            future.set_result(None)
+            return future
+
+        item = _QueuedMessage(message, events)
+        item.futures.append(future)
+        self._queue.append(item)
+        self._queued_bytes += item.size
+
+        if self._max_queued_bytes is not None and self._queued_bytes > self._max_queued_bytes:
+            # a resync reads the document, which only matches the queued
+            # events while the session is queueing a patch under its lock
+            if events is not None or self._slow_consumer_policy == "disconnect":
+                self._fall_behind()
+
+        self._stats['max_queued_bytes'] = max(self._stats['max_queued_bytes'], self._queued_bytes)
+        if not self._sending:
+            self._sending = True
+            IOLoop.current().add_future(self._send_queued(), lambda future: future.result())
+        return future
+
+    def _fall_behind(self):
+        if self._slow_consumer_policy == "disconnect":
+            self._stats['disconnects'] += 1
+            self._disconnected = True
+            self._socket.close(10002, "client fell too far behind")
+            self._drop_queue()
+            return
+
+        patches = [item for item in self._queue if item.events is not None]
+        if len(patches) < 2:
+            return
+        self._stats['resyncs'] += 1
+        events = _resync_events([event for patch in patches for event in patch.events])
+        item = _QueuedMessage(self.protocol.create('PATCH-DOC', events, use_buffers=self._use_buffers), events)
+        for patch in patches:
+            self._queue.remove(patch)
+            self._queued_bytes -= patch.size
+            item.futures.extend(patch.futures)
+        # the new values are current, so they go after anything
+        # that was queued before them
+        self._queue.append(item)
+        self._queued_bytes += item.size
+
+    def _merge_patches(self, item):
+        ''' Thin out ``item`` and the patches that follow it at the front of
+        the queue, put what is left back on the queue, and return the first
+        of it to send.
+
+        '''
+        run = [item] + list(takewhile(lambda queued: queued.events is not None, self._queue))
+        if len(run) == 1:
+            return item
+        for patch in run[1:]:
+            self._queue.popleft()
+            self._queued_bytes -= patch.size
+
+        # a later patch that sets the whole value of an attribute was
+        # serialized after every earlier change to it, so it covers them
+        kept = []
+        replaced = set()
+        for patch in reversed(run):
+            if kept and all(isinstance(event, ModelChangedEvent) and
+                            (event.model._id, event.attr) in replaced for event in patch.events):
+                self._stats['events_coalesced'] += len(patch.events)
+                kept[-1].futures.extend(patch.futures)
+                continue
+            kept.append(patch)
+            replaced.update((event.model._id, event.attr) for event in patch.events
+                            if isinstance(event, ModelChangedEvent) and event.hint is None)
+        kept.reverse()
+
+        groups = []
+        for patch in kept:
+            if groups and _self_contained(groups[-1][-1]) and _self_contained(patch):
+                groups[-1].append(patch)
+            else:
+                groups.append([patch])
+
+        result = []
+        for group in groups:
+            if len(group) == 1:
+                result.append(group[0])
+                continue
+            events = [event for patch in group for event in patch.events]
+            collapsed = _collapse_streams(events)
+            self._stats['events_coalesced'] += len(events) - len(collapsed)
+            combined = _QueuedMessage(self.protocol.create('PATCH-DOC', collapsed, use_buffers=self._use_buffers),
+                                      collapsed)
+            combined.futures = [future for patch in group for future in patch.futures]
+            result.append(combined)
+
+        for queued in reversed(result[1:]):
+            self._queue.appendleft(queued)
+            self._queued_bytes += queued.size
+        return result[0]
+
+    def _drop_queue(self):
+        for item in self._queue:
+            for future in item.futures:
+                future.set_result(None)
+        self._queue.clear()
+        self._queued_bytes = 0
+
+    @gen.coroutine
+    def _send_queued(self):
+        item = None
+        try:
+            while self._queue:
+                item = self._queue.popleft()
+                self._queued_bytes -= item.size
+                if item.events is not None:
+                    item = self._merge_patches(item)
+                yield self._socket.send_message(item.message)
+                self._stats['messages_sent'] += 1
+                self._stats['bytes_sent'] += item.size
+                for future in item.futures:
+                    future.set_result(None)
+        except Exception as e:
+            log.error("Failed sending a message, dropping %d queued messages: %r", len(self._queue), e, exc_info=True)
+            if item is not None:
+                for future in item.futures:
+                    if not future.done():
+                        future.set_result(None)
+            self._drop_queue()
+        finally:
+            self._sending = False
+        raise gen.Return(None)
+
+def _self_contained(item):
+    ''' Whether a queued patch only streams or patches columns. Those
+    events carry just their new data, so they can be serialized again;
+    other events are serialized from the current state of the document.
+
+    '''
+    return all(isinstance(event, ModelChangedEvent) and
+               isinstance(event.hint, (ColumnsStreamedEvent, ColumnsPatchedEvent)) for event in item.events)
+
+def _resync_events(events):
+    ''' Replace streams, patches and changes of model attributes with a
+    single change to the current value of each attribute.
+
+    This reads the document, so it has to be called while the document
+    lock is held and every change made so far has been queued.
+
+    '''
+    result = []
+    seen = set()
+    for event in events:
+        if not isinstance(event, ModelChangedEvent):
+            result.append(event)
+            continue
+        key = (event.model._id, event.attr)
+        if key in seen:
+            continue
+        seen.add(key)
+        model = event.model
+        new = getattr(model, event.attr)
+        serializable_new = model.lookup(event.attr).serializable_value(model)
+        result.append(ModelChangedEvent(event.document, model, event.attr, None, new, serializable_new))
+    return result
+
+def _collapse_streams(events):
+    ''' Combine each stream with the stream just before it to the same
+    columns, dropping rows that the rollover would remove anyway.
+
+    '''
+    result = []
+    latest = {}
+    for event in events:
+        if not isinstance(event, ModelChangedEvent):
+            result.append(event)
+            continue
+        key = (event.model._id, event.attr)
+        previous = latest.get(key)
+        hint = event.hint
+        if previous is not None and isinstance(hint, ColumnsStreamedEvent):
+            earlier = result[previous]
+            if isinstance(earlier.hint, ColumnsStreamedEvent) and \
+               earlier.hint.rollover == hint.rollover and \
+               set(earlier.hint.data) == set(hint.data):
+                data = dict((k, _concat(earlier.hint.data[k], hint.data[k], hint.rollover)) for k in hint.data)
+                streamed = ColumnsStreamedEvent(hint.document, hint.column_source, data, hint.rollover)
+                result[previous] = ModelChangedEvent(event.document, event.model, event.attr, earlier.old,
+                                                     event.new, event.serializable_new, streamed)
+                continue
+        latest[key] = len(result)
+        result.append(event)
+    return result
+
+def _concat(first, second, rollover):
+    if isinstance(first, np.ndarray) or isinstance(second, np.ndarray):
+        joined = np.concatenate([np.asarray(first), np.asarray(second)])
+    else:
+        joined = list(first) + list(second)
+    if rollover is not None:
+        joined = joined[-rollover:]
+    return joined
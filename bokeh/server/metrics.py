@@ -0,0 +1,208 @@
+''' Provides counters and histograms that the Bokeh server updates as it
+works, and renders them in the Prometheus text exposition format.
+
+The metrics are kept per process, and are cheap to update (a dict lookup
+and an addition, plus a bisect for histograms), so they are always
+collected. They are only published if the server is started with the
+``enable_metrics`` option, which adds a ``/metrics`` endpoint.
+
+'''
+from __future__ import absolute_import
+
+from bisect import bisect_left
+import time
+
+# seconds, from a millisecond to ten seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('%s="%s"' % (name, _escape(value)) for name, value in pairs) + "}"
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value))
+
+class Counter(object):
+    ''' A count that only goes up, kept separately for each combination of
+    label values.
+
+    Args:
+        name (str) : metric name
+        documentation (str) : one line description
+        labelnames (tuple[str], optional) : names of the labels
+        registry (list, optional) : where to register the counter for ``render``
+
+    '''
+    def __init__(self, name, documentation, labelnames=(), registry=_registry):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        registry.append(self)
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = ["# HELP %s %s" % (self.name, self.documentation),
+                 "# TYPE %s counter" % self.name]
+        for labels, value in sorted(self._values.items()):
+            lines.append("%s%s %s" % (self.name, _format_labels(self.labelnames, labels), _format_value(value)))
+        return lines
+
+class Histogram(object):
+    ''' Counts of observed values (usually durations in seconds) in
+    cumulative buckets, with their sum, kept separately for each
+    combination of label values.
+
+    Args:
+        name (str) : metric name
+        documentation (str) : one line description
+        labelnames (tuple[str], optional) : names of the labels
+        buckets (tuple[float], optional) : upper bounds of the buckets
+        registry (list, optional) : where to register the histogram for ``render``
+
+    '''
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=_registry):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        # labels -> [bucket counts, sum]
+        self._values = {}
+        registry.append(self)
+
+    def observe(self, value, labels=()):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * len(self.buckets), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def count(self, labels=()):
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry is not None else 0
+
+    def sum(self, labels=()):
+        entry = self._values.get(labels)
+        return entry[1] if entry is not None else 0.0
+
+    def render(self):
+        lines = ["# HELP %s %s" % (self.name, self.documentation),
+                 "# TYPE %s histogram" % self.name]
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append("%s_bucket%s %d" % (self.name,
+                                                 _format_labels(self.labelnames, labels, [("le", _format_value(bound))]),
+                                                 cumulative))
+            lines.append("%s_sum%s %s" % (self.name, _format_labels(self.labelnames, labels), _format_value(total)))
+            lines.append("%s_count%s %d" % (self.name, _format_labels(self.labelnames, labels), cumulative))
+        return lines
+
+class _Timer(object):
+    def __init__(self, histogram, labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.time()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._histogram.observe(time.time() - self._start, self._labels)
+
+def timed(histogram, labels=()):
+    ''' Return a context manager that observes how long its block takes
+    in ``histogram``.
+
+    '''
+    return _Timer(histogram, labels)
+
+def gauge_lines(name, documentation, labelnames, values):
+    ''' Render a gauge whose values are only known when the metrics are
+    rendered (such as the number of open sessions).
+
+    Args:
+        name (str) : metric name
+        documentation (str) : one line description
+        labelnames (tuple[str]) : names of the labels
+        values (dict) : map from tuples of label values to numbers
+
+    Returns:
+        list[str]
+
+    '''
+    lines = ["# HELP %s %s" % (name, documentation),
+             "# TYPE %s gauge" % name]
+    for labels, value in sorted(values.items()):
+        lines.append("%s%s %s" % (name, _format_labels(labelnames, labels), _format_value(value)))
+    return lines
+
+def render(extra_lines=()):
+    ''' Render all the metrics in the Prometheus text exposition format.
+
+    Args:
+        extra_lines (seq[str], optional) : more lines to include, e.g. gauges
+            that are only known to the caller
+
+    Returns:
+        str
+
+    '''
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+messages = Counter("bokeh_messages_total",
+                   "Bokeh protocol messages sent and received",
+                   ("msgtype", "direction"))
+
+message_bytes = Counter("bokeh_message_bytes_total",
+                        "Bytes of Bokeh protocol messages sent and received",
+                        ("msgtype", "direction"))
+
+serialization_seconds = Histogram("bokeh_serialization_seconds",
+                                  "Time spent encoding documents and document changes",
+                                  ("msgtype",))
+
+patch_apply_seconds = Histogram("bokeh_patch_apply_seconds",
+                                "Time spent applying PATCH-DOC messages from clients to documents")
+
+document_lock_wait_seconds = Histogram("bokeh_document_lock_wait_seconds",
+                                       "Time spent waiting for session document locks",
+                                       ("mode",))
+
+document_lock_hold_seconds = Histogram("bokeh_document_lock_hold_seconds",
+                                       "Time session document locks were held",
+                                       ("mode",))
+
+sessions_created = Counter("bokeh_sessions_created_total",
+                           "Sessions created",
+                           ("app",))
+
+sessions_destroyed = Counter("bokeh_sessions_destroyed_total",
+                             "Sessions destroyed",
+                             ("app",))
+
+session_build_seconds = Histogram("bokeh_session_build_seconds",
+                                  "Time spent building new session documents",
+                                  ("app",))
+
+periodic_callback_overruns = Counter("bokeh_periodic_callback_overruns_total",
+                                     "Periodic callback runs that took longer than their period",
+                                     ("app",))
@@ -98,7 +98,22 @@ class Message(object):
 
         self._header_json = None
 
-        self._buffers.add((buf_header, buf_payload))
+        self._buffers.append((buf_header, buf_payload))
+
+    def add_binary_buffers(self, buffers):
+        ''' Associate binary buffers collected during serialization with
+        this message.
+
+        Args:
+            buffers (list) : ``(header dict, payload bytes)`` tuples, as
+                created by ``bokeh.util.serialization.encode_binary_dict``
+
+        Returns:
+            None
+
+        '''
+        for buf_header, buf_payload in buffers:
+            self.add_buffer(json_encode(buf_header), buf_payload)
 
     def assemble_buffer(self, buf_header, buf_payload):
         ''' Add a buffer header and payload that we read from the socket.
@@ -141,6 +156,31 @@ class Message(object):
             sent += (len(header) + len(payload))
         raise gen.Return(sent)
 
+    def copy_with_new_msgid(self, request_id=None):
+        ''' Return a copy of this message with a newly generated msgid.
+
+        The copy shares the already-encoded metadata, content and buffers
+        of this message, so that one message can be sent to many
+        connections while only being serialized once.
+
+        Args:
+            request_id (str or None) : if given, the copy replies to this
+                message ID instead of the one this message replies to
+
+        Returns:
+            Message
+
+        '''
+        header = dict(self.header)
+        header['msgid'] = bkserial.make_id()
+        if request_id is not None:
+            header['reqid'] = request_id
+        msg = self.__class__(header, self.metadata, self._content)
+        msg._metadata_json = self.metadata_json
+        msg._content_json = self.content_json
+        msg._buffers = self._buffers
+        return msg
+
     @classmethod
     def create_header(cls, request_id=None):
         ''' Return a message header fragment dict.
@@ -230,6 +270,8 @@ class Message(object):
 
     @property
     def content(self):
+        if self._content is None and self._content_json is not None:
+            self._content = json_decode(self._content_json)
         return self._content
 
     @content.setter
@@ -243,6 +285,18 @@ class Message(object):
             self._content_json = json_encode(self.content)
         return self._content_json
 
+    @content_json.setter
+    def content_json(self, value):
+        ''' Set already encoded content for this message.
+
+        The content dict is then only decoded from it if something asks
+        for ``content``, so creating a message from pre-encoded content
+        doesn't require encoding it a second time.
+
+        '''
+        self._content = None
+        self._content_json = value
+
     # metadata fragment properties
 
     @property
@@ -264,6 +318,22 @@ class Message(object):
     def buffers(self):
         return self._buffers
 
+    @property
+    def binary_buffers(self):
+        ''' A dict mapping buffer ids to payloads for all buffers associated
+        with this message, suitable for decoding binary buffer placeholders
+        in the message content.
+
+        '''
+        result = {}
+        for buf_header, buf_payload in self._buffers:
+            try:
+                buf_id = json_decode(buf_header)['id']
+            except (ValueError, KeyError, TypeError):
+                raise MessageError("buffer header could not be decoded")
+            result[buf_id] = buf_payload
+        return result
+
     @buffers.setter
     def buffers(self, value):
         self._buffers = list(value)
@@ -19,10 +19,18 @@ class ack_1(Message):
     revision = 1
 
     @classmethod
-    def create(cls, **metadata):
-        '''
+    def create(cls, binary_buffers=False, **metadata):
+        ''' Create an ``ACK`` message
+
+        Args:
+            binary_buffers (bool, optional) : whether to tell the client
+                it may send array data as binary buffers (default: False)
+
+                Servers that don't send this only understand plain JSON.
 
         '''
         header = cls.create_header()
         content = {}
+        if binary_buffers:
+            content['binary_buffers'] = True
         return cls(header, metadata, content)
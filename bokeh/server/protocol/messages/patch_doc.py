@@ -5,7 +5,6 @@ from __future__ import absolute_import
 
 from bokeh.model import Model
 from bokeh.document import ModelChangedEvent, TitleChangedEvent, RootAddedEvent, RootRemovedEvent
-from json import loads
 from ..message import Message
 from . import register
 
@@ -22,9 +21,14 @@ class patch_doc_1(Message):
         super(patch_doc_1, self).__init__(header, metadata, content)
 
     @classmethod
-    def create(cls, events, **metadata):
+    def create(cls, events, use_buffers=False, **metadata):
         '''
 
+        Args:
+            events (list) : document change events to include in the patch
+            use_buffers (bool, optional) : whether to send array data as
+                binary buffers rather than JSON lists (default: False)
+
         '''
         header = cls.create_header()
 
@@ -32,13 +36,14 @@ class patch_doc_1(Message):
             raise ValueError("PATCH-DOC message requires at least one event")
         document = events[0].document
 
-        patch_json = document.create_json_patch_string(events)
-        # this is a total hack, the need for it is because we have magic
-        # type conversions in our BokehJSONEncoder which keep us from
-        # easily generating non-string JSON.
-        content = loads(patch_json)
+        buffers = [] if use_buffers else None
 
-        msg = cls(header, metadata, content)
+        # the patch is encoded once, here, and only decoded again if
+        # something asks for the message content
+        msg = cls(header, metadata, None)
+        msg.content_json = document.create_json_patch_string(events, buffers=buffers, sort_keys=False)
+        if buffers:
+            msg.add_binary_buffers(buffers)
 
         return msg
 
@@ -89,4 +94,4 @@ class patch_doc_1(Message):
         return False
 
     def apply_to_document(self, doc):
-        doc.apply_json_patch(self.content)
+        doc.apply_json_patch(self.content, buffers=self.binary_buffers)
@@ -3,6 +3,8 @@
 '''
 from __future__ import absolute_import, print_function
 
+from bokeh.core.json_encoder import serialize_json
+
 from ...exceptions import ProtocolError
 from ..message import Message
 from . import register
@@ -23,19 +25,31 @@ class pull_doc_reply_1(Message):
         super(pull_doc_reply_1, self).__init__(header, metadata, content)
 
     @classmethod
-    def create(cls, request_id, document, **metadata):
+    def create(cls, request_id, document, use_buffers=False, **metadata):
         '''
 
+        Args:
+            request_id (str) : message ID of the PULL-DOC-REQ being replied to
+            document (Document) : the document to send
+            use_buffers (bool, optional) : whether to send array data as
+                binary buffers rather than JSON lists (default: False)
+
         '''
         header = cls.create_header(request_id=request_id)
 
-        content = { 'doc' : document.to_json() }
+        buffers = [] if use_buffers else None
 
-        msg = cls(header, metadata, content)
+        # the document is encoded once, here, and only decoded again if
+        # something asks for the message content
+        msg = cls(header, metadata, None)
+        msg.content_json = serialize_json({ 'doc' : document._to_json_like(buffers=buffers) },
+                                        buffers=buffers, sort_keys=False)
+        if buffers:
+            msg.add_binary_buffers(buffers)
 
         return msg
 
     def push_to_document(self, doc):
         if 'doc' not in self.content:
             raise ProtocolError("No doc in PULL-DOC-REPLY")
-        doc.replace_with_json(self.content['doc'])
+        doc.replace_with_json(self.content['doc'], buffers=self.binary_buffers)
@@ -1,9 +1,13 @@
 from __future__ import absolute_import, print_function
 
+import json
 import unittest
 
+import numpy as np
+
 import bokeh.document as document
 from bokeh.model import Model
+from bokeh.models import ColumnDataSource
 from bokeh.core.properties import Int, Instance
 from bokeh.server.protocol import Protocol
 
@@ -29,6 +33,15 @@ class TestPatchDocument(unittest.TestCase):
         event = document.ModelChangedEvent(sample, obj, 'foo', obj.foo, 42, 42)
         Protocol("1.0").create("PATCH-DOC", [event])
 
+    def test_create_encodes_content_once(self):
+        sample = self._sample_doc()
+        obj = next(iter(sample.roots))
+        event = document.ModelChangedEvent(sample, obj, 'foo', obj.foo, 42, 42)
+        msg = Protocol("1.0").create("PATCH-DOC", [event])
+        assert msg._content is None
+        assert json.loads(msg.content_json) == json.loads(sample.create_json_patch_string([event]))
+        assert msg.content['events'][0]['new'] == 42
+
     def test_create_then_apply_model_changed(self):
         sample = self._sample_doc()
 
@@ -51,6 +64,24 @@ class TestPatchDocument(unittest.TestCase):
         foos.sort()
         assert foos == [ 2, 42 ]
 
+    def test_create_then_apply_columns_streamed_with_buffers(self):
+        sample = self._sample_doc()
+        source = ColumnDataSource(data=dict(x=np.arange(3.0)))
+        sample.add_root(source)
+        copy = document.Document.from_json_string(sample.to_json_string())
+
+        events = []
+        sample.on_change(lambda event: events.append(event))
+        source.stream(dict(x=np.array([3.0, 4.0])))
+
+        msg = Protocol("1.0").create("PATCH-DOC", events, use_buffers=True)
+        assert msg.header['num_buffers'] == 1
+        assert [msg.content['events'][0]['data']['x']['__buffer__']] == list(msg.binary_buffers)
+
+        msg.apply_to_document(copy)
+        copied_source = copy.get_model_by_id(source._id)
+        np.testing.assert_array_equal(copied_source.data['x'], np.arange(5.0))
+
     def test_should_suppress_model_changed(self):
         sample = self._sample_doc()
         root = None
@@ -2,8 +2,11 @@ from __future__ import absolute_import, print_function
 
 import unittest
 
+import numpy as np
+
 import bokeh.document as document
 from bokeh.model import Model
+from bokeh.models import ColumnDataSource
 from bokeh.core.properties import Int, Instance
 from bokeh.server.protocol import Protocol
 
@@ -37,3 +40,17 @@ class TestPullDocument(unittest.TestCase):
         msg.push_to_document(copy)
         assert len(sample.roots) == 2
         assert len(copy.roots) == 2
+
+    def test_create_reply_with_buffers_then_parse(self):
+        sample = self._sample_doc()
+        sample.add_root(ColumnDataSource(data=dict(x=np.arange(10.0), y=['a']*10)))
+        msg = Protocol("1.0").create("PULL-DOC-REPLY", 'fakereqid', sample, use_buffers=True)
+        assert msg.header['num_buffers'] == 1
+        assert len(msg.buffers) == 1
+        assert msg.complete
+        copy = document.Document()
+        msg.push_to_document(copy)
+        assert len(copy.roots) == 3
+        source = [r for r in copy.roots if isinstance(r, ColumnDataSource)][0]
+        np.testing.assert_array_equal(source.data['x'], np.arange(10.0))
+        assert source.data['y'] == ['a']*10
@@ -10,3 +10,16 @@ def test_create_header(monkeypatch):
     assert header['msgtype'] == 'msgtype'
     assert header['msgid'] == 'msgid'
     assert header['reqid'] == 'bar'
+
+def test_copy_with_new_msgid():
+    from bokeh.server.protocol import Protocol
+    msg = Protocol("1.0").create('ERROR', 'reqid', 'some text')
+    msg.add_buffer('{"id":"buf"}', b'payload')
+    copy = msg.copy_with_new_msgid()
+    assert copy.msgtype == msg.msgtype
+    assert copy.header['msgid'] != msg.header['msgid']
+    assert copy.header['reqid'] == 'reqid'
+    assert copy.header['num_buffers'] == 1
+    assert copy.content_json is msg.content_json
+    assert copy.metadata_json is msg.metadata_json
+    assert copy.buffers == msg.buffers
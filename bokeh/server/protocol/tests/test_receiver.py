@@ -24,3 +24,31 @@ def test_validation_success():
     assert partial.header == msg.header
     assert partial.content == msg.content
     assert partial.metadata == msg.metadata
+
+def test_validation_success_with_buffers():
+    import numpy as np
+    from bokeh.document import Document
+    from bokeh.models import ColumnDataSource
+    doc = Document()
+    doc.add_root(ColumnDataSource(data=dict(x=np.arange(4), y=np.ones(4))))
+    msg = _proto.create('PUSH-DOC', doc, use_buffers=True)
+    assert msg.header['num_buffers'] == 2
+    r = receiver.Receiver(_proto)
+
+    for fragment in (msg.header_json, msg.metadata_json, msg.content_json):
+        partial = r.consume(decode_utf8(fragment)).result()
+    assert partial is None
+
+    for buf_header, buf_payload in msg.buffers:
+        partial = r.consume(decode_utf8(buf_header)).result()
+        assert partial is None
+        partial = r.consume(buf_payload).result()
+    assert partial is not None
+    assert partial.complete
+    assert partial.binary_buffers == msg.binary_buffers
+
+    copy = Document()
+    partial.push_to_document(copy)
+    source = copy.roots[0]
+    assert source.data['x'].tolist() == [0, 1, 2, 3]
+    assert source.data['y'].tolist() == [1.0, 1.0, 1.0, 1.0]
@@ -0,0 +1,349 @@
+''' Provides a Router that spreads Bokeh sessions over several Bokeh server
+worker processes.
+
+Sessions only exist in the process that created them, so every request
+for a session (the page, its autoload script and its websocket) has to
+reach the same process. The Router assigns each session ID to a worker
+with a consistent hash, and forwards HTTP requests and websocket messages
+to that worker. Page requests without a session ID get a new one from
+the Router first, so that the websocket opened later by the page is sent
+to the same worker.
+
+'''
+from __future__ import absolute_import, print_function
+
+import logging
+log = logging.getLogger(__name__)
+
+import atexit
+from bisect import bisect
+import hashlib
+import os
+import signal
+
+from tornado import gen
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+from tornado.httpserver import HTTPServer
+from tornado.httputil import url_concat
+from tornado.ioloop import IOLoop, PeriodicCallback
+from tornado.web import Application as TornadoApplication
+from tornado.web import HTTPError, RequestHandler
+from tornado.websocket import WebSocketClosedError, WebSocketHandler, websocket_connect
+
+from bokeh.resources import DEFAULT_SERVER_PORT
+from bokeh.settings import settings
+from bokeh.util.session_id import generate_session_id
+
+def _hash(key):
+    return int(hashlib.md5(key.encode('utf-8')).hexdigest()[:16], 16)
+
+class _HashRing(object):
+    ''' A consistent hash of keys onto nodes. Removing a node only moves
+    the keys that were assigned to it.
+
+    '''
+    def __init__(self, nodes, replicas=64):
+        ring = sorted((_hash("%s-%d" % (node, i)), node) for node in nodes for i in range(replicas))
+        self._hashes = [h for h, node in ring]
+        self._nodes = [node for h, node in ring]
+
+    def get(self, key):
+        if not self._nodes:
+            return None
+        i = bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[i]
+
+class _Worker(object):
+    ''' Routing state and statistics for one worker process.
+
+    '''
+    def __init__(self, url):
+        self.url = url
+        self.healthy = True
+        self.requests = 0
+        self.websockets = 0
+        self.errors = 0
+
+    @property
+    def websocket_url(self):
+        return "ws" + self.url[len("http"):]
+
+    @property
+    def stats(self):
+        return dict(healthy=self.healthy, requests=self.requests,
+                    websockets=self.websockets, errors=self.errors)
+
+# headers that describe a single connection rather than the request or
+# response, so are not forwarded
+_hop_by_hop_headers = set(['Connection', 'Content-Length', 'Keep-Alive', 'Transfer-Encoding'])
+
+class _RoutedRequestHandler(RequestHandler):
+    ''' Forwards HTTP requests to the worker for their session.
+
+    '''
+    SUPPORTED_METHODS = ("GET", "HEAD", "POST", "DELETE", "PATCH", "PUT", "OPTIONS")
+
+    def initialize(self, router):
+        self.router = router
+
+    @gen.coroutine
+    def get(self, *args):
+        uri = self.request.uri
+        session_id = self.get_argument("bokeh-session-id", default=None)
+        if session_id is None and self.request.method == "GET" and "/static/" not in self.request.path:
+            session_id = self.router.new_session_id()
+            if session_id is not None:
+                uri = url_concat(uri, {"bokeh-session-id" : session_id})
+
+        worker = self.router.worker_for(session_id or self.request.path)
+        worker.requests += 1
+        headers = dict((name, value) for name, value in self.request.headers.get_all()
+                       if name not in _hop_by_hop_headers)
+        request = HTTPRequest(worker.url + uri,
+                              method=self.request.method,
+                              headers=headers,
+                              body=self.request.body or None,
+                              follow_redirects=False,
+                              allow_nonstandard_methods=True,
+                              decompress_response=False)
+        response = yield AsyncHTTPClient().fetch(request, raise_error=False)
+        if response.code == 599:
+            worker.errors += 1
+            log.error("Failed to forward %s %s to %s: %r", self.request.method, uri, worker.url, response.error)
+            raise HTTPError(502)
+
+        self.set_status(response.code, response.reason)
+        for name in ("Content-Type", "Server", "Date"):
+            self.clear_header(name)
+        for name, value in response.headers.get_all():
+            if name not in _hop_by_hop_headers:
+                self.add_header(name, value)
+        if response.body and response.code != 304:
+            self.write(response.body)
+
+    head = post = delete = patch = put = options = get
+
+class _RoutedWebSocketHandler(WebSocketHandler):
+    ''' Relays websocket messages between a client and the worker for its
+    session.
+
+    '''
+    def initialize(self, router):
+        self.router = router
+        self._worker = None
+        self._upstream = None
+        self._pending = []
+        self._closed = False
+
+    def check_origin(self, origin):
+        # the worker checks the Origin, which is passed along to it
+        return True
+
+    def open(self, *args):
+        session_id = self.get_argument("bokeh-session-id", default=None)
+        self._worker = self.router.worker_for(session_id or self.request.path)
+        self._worker.websockets += 1
+        headers = dict((name, self.request.headers[name]) for name in ("Host", "Origin")
+                       if name in self.request.headers)
+        request = HTTPRequest(self._worker.websocket_url + self.request.uri, headers=headers)
+        IOLoop.current().add_future(self._relay_from_worker(request), lambda future: future.result())
+
+    @gen.coroutine
+    def _relay_from_worker(self, request):
+        try:
+            upstream = yield websocket_connect(request)
+        except Exception as e:
+            self._worker.errors += 1
+            log.error("Failed to open websocket to %s: %r", self._worker.url, e)
+            self.close()
+            raise gen.Return(None)
+
+        if self._closed:
+            upstream.close()
+            raise gen.Return(None)
+
+        self._upstream = upstream
+        for message in self._pending:
+            upstream.write_message(message, binary=isinstance(message, bytes))
+        self._pending = None
+
+        while True:
+            message = yield upstream.read_message()
+            if message is None:
+                break
+            try:
+                self.write_message(message, binary=isinstance(message, bytes))
+            except WebSocketClosedError:
+                break
+        self.close()
+        raise gen.Return(None)
+
+    def on_message(self, message):
+        if self._upstream is not None:
+            self._upstream.write_message(message, binary=isinstance(message, bytes))
+        elif self._pending is not None:
+            self._pending.append(message)
+
+    def on_close(self):
+        self._closed = True
+        if self._worker is not None:
+            self._worker.websockets -= 1
+        if self._upstream is not None:
+            self._upstream.close()
+
+class Router(object):
+    ''' Accepts all connections for a group of Bokeh server worker processes
+    and routes every session to one of them.
+
+    Args:
+        worker_urls (list[str]) : base URLs of the workers, e.g. ``http://127.0.0.1:5007``
+    Kwargs:
+        port (int) : port to listen on
+        address (str) : address to listen on
+        generate_session_ids (boolean) : whether to generate a session ID when none is provided
+            This should match the workers.
+        secret_key (str) : secret key for signing session IDs
+        sign_sessions (boolean) : whether to sign session IDs
+        health_check_milliseconds (int) : number of milliseconds between checks that the workers respond
+            New sessions are not routed to workers that don't respond.
+        stats_log_frequency_milliseconds (int) : number of milliseconds between logging stats
+    '''
+
+    def __init__(self, worker_urls, port=DEFAULT_SERVER_PORT, address=None,
+                 generate_session_ids=True,
+                 secret_key=settings.secret_key_bytes(),
+                 sign_sessions=settings.sign_sessions(),
+                 health_check_milliseconds=5000,
+                 stats_log_frequency_milliseconds=15000):
+        if not worker_urls:
+            raise ValueError("Router needs at least one worker")
+        if health_check_milliseconds <= 0:
+            raise ValueError("health_check_milliseconds must be > 0")
+        if stats_log_frequency_milliseconds <= 0:
+            raise ValueError("stats_log_frequency_milliseconds must be > 0")
+
+        self._workers = dict((url, _Worker(url)) for url in worker_urls)
+        self._ring = _HashRing(worker_urls)
+        self._healthy_ring = self._ring
+        self._generate_session_ids = generate_session_ids
+        self._secret_key = secret_key
+        self._sign_sessions = sign_sessions
+        self._port = port
+        self._address = address
+
+        application = TornadoApplication([
+            (r"(.*/ws)", _RoutedWebSocketHandler, dict(router=self)),
+            (r"(.*)", _RoutedRequestHandler, dict(router=self)),
+        ])
+        self._http = HTTPServer(application)
+        self._http.listen(port, address=address or "")
+
+        self._loop = IOLoop.current()
+        self._health_job = PeriodicCallback(self.check_health, health_check_milliseconds, io_loop=self._loop)
+        self._stats_job = PeriodicCallback(self.log_stats, stats_log_frequency_milliseconds, io_loop=self._loop)
+
+    @property
+    def port(self):
+        return self._port
+
+    @property
+    def io_loop(self):
+        return self._loop
+
+    @property
+    def worker_stats(self):
+        ''' A dict from worker URL to whether that worker is ``healthy`` and
+        its counts of forwarded ``requests``, open ``websockets`` and
+        forwarding ``errors``.
+
+        '''
+        return dict((url, worker.stats) for url, worker in self._workers.items())
+
+    def new_session_id(self):
+        if not self._generate_session_ids:
+            return None
+        return generate_session_id(secret_key=self._secret_key, signed=self._sign_sessions)
+
+    def worker_for(self, key):
+        ''' Return the worker that requests for ``key`` (usually a session ID)
+        should go to.
+
+        '''
+        return self._workers[self._healthy_ring.get(key) or self._ring.get(key)]
+
+    @gen.coroutine
+    def check_health(self):
+        client = AsyncHTTPClient()
+        changed = False
+        for worker in self._workers.values():
+            response = yield client.fetch(worker.url + "/", follow_redirects=False,
+                                          raise_error=False, request_timeout=5)
+            healthy = response.code != 599
+            if healthy != worker.healthy:
+                log.warning("Worker %s is %s", worker.url, "healthy again" if healthy else "not responding")
+                worker.healthy = healthy
+                changed = True
+        if changed:
+            self._healthy_ring = _HashRing([w.url for w in self._workers.values() if w.healthy])
+        raise gen.Return(None)
+
+    def log_stats(self):
+        if log.getEffectiveLevel() > logging.DEBUG:
+            # avoid the work below if we aren't going to log anything
+            return
+        for url, stats in sorted(self.worker_stats.items()):
+            log.debug("[router] %s is %s with %d open websockets, %d requests, %d errors",
+                      url, "healthy" if stats['healthy'] else "NOT RESPONDING",
+                      stats['websockets'], stats['requests'], stats['errors'])
+
+    def start(self, start_loop=True):
+        ''' Start routing.
+
+        Args:
+            start_loop (boolean, optional): whether to start the IO loop (default: True)
+
+        '''
+        self._health_job.start()
+        self._stats_job.start()
+        if start_loop:
+            signal.signal(signal.SIGTERM, self._sigterm)
+            try:
+                self._loop.start()
+            except KeyboardInterrupt:
+                print("\nInterrupted, shutting down")
+
+    def _sigterm(self, signum, frame):
+        print("Received SIGTERM, shutting down")
+        self.stop()
+        self._loop.stop()
+
+    def stop(self):
+        self._health_job.stop()
+        self._stats_job.stop()
+        self._http.stop()
+
+def fork_workers(count):
+    ''' Fork ``count`` worker processes.
+
+    The parent process terminates the workers when it exits.
+
+    Returns:
+        int or None : the index of the worker in a worker process, or None
+            in the parent process
+
+    '''
+    pids = []
+    for i in range(count):
+        pid = os.fork()
+        if pid == 0:
+            return i
+        pids.append(pid)
+
+    def terminate_workers():
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+    atexit.register(terminate_workers)
+    return None
@@ -80,7 +80,15 @@ class Server(object):
                                                         'keep_alive_milliseconds',
                                                         'check_unused_sessions_milliseconds',
                                                         'unused_session_lifetime_milliseconds',
-                                                        'stats_log_frequency_milliseconds']
+                                                        'stats_log_frequency_milliseconds',
+                                                        'session_init_threads',
+                                                        'session_pool_size',
+                                                        'session_pool_ttl_milliseconds',
+                                                        'websocket_compression',
+                                                        'websocket_compression_min_bytes',
+                                                        'websocket_max_queued_bytes',
+                                                        'slow_consumer_policy',
+                                                        'enable_metrics']
                            if key in kwargs }
 
         prefix = kwargs.get('prefix')
@@ -6,11 +6,14 @@ from __future__ import absolute_import
 import logging
 log = logging.getLogger(__name__)
 
-from tornado import gen, locks
-from bokeh.util.tornado import _DocumentCallbackGroup, yield_for_all_futures
+from tornado import gen
+from bokeh.document import ModelChangedEvent, PeriodicCallback
+from bokeh.util.tornado import _DocumentCallbackGroup, _ReadWriteLock, yield_for_all_futures
 
 import time
 
+from . import metrics
+
 def current_time():
     '''Return the time in milliseconds since the epoch as a floating
        point number.
@@ -36,32 +39,105 @@ def _needs_document_lock(func):
         # task.
         self.block_expiration()
         try:
-            with (yield self._lock.acquire()):
-                if self._pending_writes is not None:
-                    raise RuntimeError("internal class invariant violated: _pending_writes " + \
-                                       "should be None if lock is not held")
-                self._pending_writes = []
-                try:
-                    result = yield yield_for_all_futures(func(self, *args, **kwargs))
-                finally:
-                    # we want to be very sure we reset this or we'll
-                    # keep hitting the RuntimeError above as soon as
-                    # any callback goes wrong
-                    pending_writes = self._pending_writes
-                    self._pending_writes = None
-                for p in pending_writes:
-                    yield p
+            requested = time.time()
+            with (yield self._lock.acquire_write()):
+                metrics.document_lock_wait_seconds.observe(time.time() - requested, ("write",))
+                with metrics.timed(metrics.document_lock_hold_seconds, ("write",)):
+                    if self._pending_events is not None:
+                        raise RuntimeError("internal class invariant violated: _pending_events " + \
+                                           "should be None if lock is not held")
+                    self._pending_events = []
+                    try:
+                        result = yield yield_for_all_futures(func(self, *args, **kwargs))
+                    finally:
+                        # we want to be very sure we reset this or we'll
+                        # keep hitting the RuntimeError above as soon as
+                        # any callback goes wrong
+                        try:
+                            self._send_pending_events()
+                        finally:
+                            self._pending_events = None
+                    # the patches are only queued on each connection, so
+                    # a slow client doesn't keep the lock held
             raise gen.Return(result)
         finally:
             self.unblock_expiration()
     return _needs_document_lock_wrapper
 
+def _needs_document_read_lock(func):
+    '''Decorator like _needs_document_lock, for methods that only read the
+       document. Any number of them can hold the lock at once, but not
+       while it's held by a method that can change the document.
+    '''
+    @gen.coroutine
+    def _needs_document_read_lock_wrapper(self, *args, **kwargs):
+        self.block_expiration()
+        try:
+            requested = time.time()
+            with (yield self._lock.acquire_read()):
+                metrics.document_lock_wait_seconds.observe(time.time() - requested, ("read",))
+                with metrics.timed(metrics.document_lock_hold_seconds, ("read",)):
+                    # _pending_events stays None, so changing the
+                    # document from here raises an error
+                    result = yield yield_for_all_futures(func(self, *args, **kwargs))
+            raise gen.Return(result)
+        finally:
+            self.unblock_expiration()
+    return _needs_document_read_lock_wrapper
+
+def _coalesce_events(pending):
+    ''' Drop queued events that are made redundant by a later event.
+
+    A plain ``ModelChangedEvent`` carries the complete new value of an
+    attribute, so it supersedes every earlier change (including streams
+    and patches) to the same attribute of the same model. Streams and
+    patches that follow it are folded into it instead, by taking the
+    current value of the attribute, since they modify that value in place
+    and would otherwise be applied twice. The surviving events keep their
+    relative order.
+
+    Args:
+        pending (list) : (event, suppressed connection) pairs in the order
+            they were raised
+
+    Returns:
+        list
+
+    '''
+    result = list(pending)
+    latest = {}
+    for i, (event, suppressed) in enumerate(pending):
+        if not isinstance(event, ModelChangedEvent):
+            continue
+        key = (event.model._id, event.attr)
+        if event.hint is None:
+            for j in latest.get(key, ()):
+                result[j] = None
+            latest[key] = [i]
+        elif key in latest and pending[latest[key][0]][0].hint is None:
+            j = latest[key][0]
+            changed, changed_suppressed = result[j]
+            model = changed.model
+            current = ModelChangedEvent(changed.document, model, changed.attr, changed.old,
+                                        getattr(model, changed.attr),
+                                        model.lookup(changed.attr).serializable_value(model))
+            # only skip a connection if it made every one of the changes
+            result[j] = (current, changed_suppressed if changed_suppressed is suppressed else None)
+            result[i] = None
+        else:
+            latest.setdefault(key, []).append(i)
+    return [item for item in result if item is not None]
+
 class ServerSession(object):
     ''' Hosts an application "instance" (an instantiated Document) for one or more connections.
 
+    The document's session callbacks start running right away, unless
+    ``start_callbacks`` is False, in which case they wait for a call to
+    ``start_callbacks()`` (e.g. until a pooled session is claimed).
+
     '''
 
-    def __init__(self, session_id, document, io_loop=None):
+    def __init__(self, session_id, document, io_loop=None, app_path=None, start_callbacks=True):
         if session_id is None:
             raise ValueError("Sessions must have an id")
         if document is None:
@@ -69,20 +145,28 @@ class ServerSession(object):
         self._id = session_id
         self._document = document
         self._loop = io_loop
+        # only used to label metrics
+        self._app_path = app_path
         self._subscribed_connections = set()
         self._last_unsubscribe_time = current_time()
-        self._lock = locks.Lock()
+        self._lock = _ReadWriteLock()
         self._current_patch = None
         self._current_patch_connection = None
         self._document.on_change_dispatch_to(self)
         self._callbacks = _DocumentCallbackGroup(io_loop)
-        self._pending_writes = None
+        self._pending_events = None
         self._destroyed = False
         self._expiration_requested = False
         self._expiration_blocked_count = 0
+        # encoded PULL-DOC-REPLY for each (protocol version, use_buffers),
+        # along with the document revision it was created from
+        self._pull_reply_cache = {}
+        self._pull_reply_cache_hits = 0
+        self._pull_reply_cache_misses = 0
+        self._callbacks_started = False
 
-        wrapped_callbacks = self._wrap_session_callbacks(self._document.session_callbacks)
-        self._callbacks.add_session_callbacks(wrapped_callbacks)
+        if start_callbacks:
+            self.start_callbacks()
 
     @property
     def document(self):
@@ -110,9 +194,21 @@ class ServerSession(object):
 
     def destroy(self):
         self._destroyed = True
+        self._pull_reply_cache.clear()
         self._document.remove_on_change(self)
         self._callbacks.remove_all_callbacks()
 
+    def start_callbacks(self):
+        ''' Start running the document's session callbacks, if they
+        haven't been started yet.
+
+        '''
+        if self._callbacks_started:
+            return
+        self._callbacks_started = True
+        wrapped_callbacks = self._wrap_session_callbacks(self._document.session_callbacks)
+        self._callbacks.add_session_callbacks(wrapped_callbacks)
+
     def request_expiration(self):
         """ Used in test suite for now. Forces immediate expiration if no connections."""
         self._expiration_requested = True
@@ -147,17 +243,40 @@ class ServerSession(object):
         ''' Asynchronously locks the document and runs the function with it locked.'''
         return func(*args, **kwargs)
 
+    @_needs_document_read_lock
+    def with_document_read_locked(self, func, *args, **kwargs):
+        ''' Asynchronously locks the document for reading and runs the function,
+        which must not change the document, with it locked. '''
+        return func(*args, **kwargs)
+
+    @property
+    def document_lock_stats(self):
+        ''' A dict with the number of times the document lock was acquired
+        for reading (``read_acquisitions``) and writing (``write_acquisitions``),
+        and the total and longest seconds spent waiting for it. '''
+        return self._lock.stats
+
     def _wrap_document_callback(self, callback):
         if getattr(callback, "nolock", False):
             return callback
+        if getattr(callback, "readlock", False):
+            def read_locked_callback(*args, **kwargs):
+                return self.with_document_read_locked(callback, *args, **kwargs)
+            return read_locked_callback
         def wrapped_callback(*args, **kwargs):
             return self.with_document_locked(callback, *args, **kwargs)
         return wrapped_callback
 
     def _wrap_session_callback(self, callback):
         wrapped = self._wrap_document_callback(callback.callback)
+        if isinstance(callback, PeriodicCallback):
+            # the callback runner already times each run in the stats
+            callback.stats.on_overrun(self._count_overrun)
         return callback._copy_with_changed_callback(wrapped)
 
+    def _count_overrun(self):
+        metrics.periodic_callback_overruns.inc((self._app_path or "",))
+
     def _wrap_session_callbacks(self, callbacks):
         wrapped = []
         for cb in callbacks:
@@ -168,25 +287,72 @@ class ServerSession(object):
         may_suppress = self._current_patch is not None and \
                        self._current_patch.should_suppress_on_change(event)
 
-        if self._pending_writes is None:
-            raise RuntimeError("_pending_writes should be non-None when we have a document lock, and we should have the lock when the document changes")
+        if self._pending_events is None:
+            raise RuntimeError("_pending_events should be non-None when we have a document lock, and we should have the lock when the document changes")
+
+        # events are only queued here, and sent as a single PATCH-DOC
+        # when the document lock is released; remember the connection
+        # that requested the change (if any) so it isn't echoed back.
+        suppressed = self._current_patch_connection if may_suppress else None
+        self._pending_events.append((event, suppressed))
+
+    def _send_pending_events(self):
+        events = _coalesce_events(self._pending_events)
+        if not events:
+            return
+
+        # the patch is serialized once for each distinct protocol version,
+        # encoding and set of events among the connections, and the encoded
+        # message is then shared by all of them.
+        patches = {}
 
         # TODO (havocp): our "change sync" protocol is flawed
         # because if both sides change the same attribute at the
         # same time, they will each end up with the state of the
         # other and their final states will differ.
         for connection in self._subscribed_connections:
-            if may_suppress and connection is self._current_patch_connection:
+            indices = tuple(i for i, (event, suppressed) in enumerate(events) if suppressed is not connection)
+            if not indices:
                 pass #log.debug("Not sending notification back to client %r for a change it requested", connection)
-            else:
-                self._pending_writes.append(connection.send_patch_document(event))
+                continue
+            key = (connection.protocol.version, connection.use_buffers, indices)
+            if key not in patches:
+                with metrics.timed(metrics.serialization_seconds, ("PATCH-DOC",)):
+                    patches[key] = connection.protocol.create('PATCH-DOC', [events[i][0] for i in indices],
+                                                              use_buffers=connection.use_buffers)
+            connection.send_patch_message(patches[key], [events[i][0] for i in indices])
 
-    @_needs_document_lock
+    @property
+    def pull_reply_cache_stats(self):
+        ''' A dict with the number of PULL-DOC-REPLY messages that reused an
+        already encoded document (``hits``) and that had to encode it
+        (``misses``).
+
+        '''
+        return dict(hits=self._pull_reply_cache_hits, misses=self._pull_reply_cache_misses)
+
+    @_needs_document_read_lock
     def _handle_pull(self, message, connection):
         log.debug("Sending pull-doc-reply from session %r", self.id)
-        return connection.protocol.create('PULL-DOC-REPLY', message.header['msgid'], self.document)
+        # reconnects, reloads and extra tabs usually pull a document that
+        # hasn't changed since it was last encoded, so reuse that encoding
+        key = (connection.protocol.version, connection.use_buffers)
+        revision = self.document._revision
+        cached = self._pull_reply_cache.get(key)
+        if cached is not None and cached[0] == revision:
+            self._pull_reply_cache_hits += 1
+            return cached[1].copy_with_new_msgid(request_id=message.header['msgid'])
+        self._pull_reply_cache_misses += 1
+        with metrics.timed(metrics.serialization_seconds, ("PULL-DOC-REPLY",)):
+            reply = connection.protocol.create('PULL-DOC-REPLY', message.header['msgid'], self.document,
+                                               use_buffers=connection.use_buffers)
+        self._pull_reply_cache[key] = (revision, reply)
+        return reply
 
     def _session_callback_added(self, event):
+        if not self._callbacks_started:
+            # start_callbacks() will pick it up from the document
+            return
         wrapped = self._wrap_session_callback(event.callback)
         self._callbacks.add_session_callback(wrapped)
 
@@ -214,7 +380,8 @@ class ServerSession(object):
         self._current_patch = message
         self._current_patch_connection = connection
         try:
-            message.apply_to_document(self.document)
+            with metrics.timed(metrics.patch_apply_seconds):
+                message.apply_to_document(self.document)
         finally:
             self._current_patch = None
             self._current_patch_connection = None
@@ -0,0 +1,237 @@
+from __future__ import absolute_import
+
+import mock
+import pytest
+
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+from bokeh.document import Document
+from bokeh.model import Model
+from bokeh.models import ColumnDataSource
+from bokeh.core.properties import Int
+
+from bokeh.server.connection import ServerConnection
+from bokeh.server.protocol import Protocol
+
+class SomeModelInTestConnection(Model):
+    foo = Int(2)
+    bar = Int(3)
+
+class _FakeSession(object):
+    def subscribe(self, connection):
+        pass
+
+class _SlowSocket(object):
+    ''' Holds every message until release() is called. '''
+    def __init__(self):
+        self.sent = []
+        self.waiting = []
+        self.closed = None
+
+    def send_message(self, message):
+        future = Future()
+        self.sent.append(message)
+        self.waiting.append(future)
+        return future
+
+    def release(self):
+        waiting, self.waiting = self.waiting, []
+        for future in waiting:
+            future.set_result(None)
+
+    def close(self, code=None, reason=None):
+        self.closed = code
+
+def _patch_events(doc, change):
+    events = []
+    def on_change(event):
+        events.append(event)
+    doc.on_change(on_change)
+    change()
+    doc.remove_on_change(on_change)
+    return events
+
+def _send_patch(connection, events):
+    message = connection.protocol.create('PATCH-DOC', events)
+    return connection.send_patch_message(message, events)
+
+def _flush(socket, io_loop):
+    @gen.coroutine
+    def release_all():
+        while socket.waiting:
+            socket.release()
+            yield gen.moment
+    io_loop.run_sync(release_all)
+
+@pytest.fixture
+def io_loop(request):
+    # connections send from the current loop, so give each test its own
+    loop = IOLoop()
+    loop.make_current()
+    def close():
+        IOLoop.clear_current()
+        loop.close(all_fds=True)
+    request.addfinalizer(close)
+    return loop
+
+def _new_connection(**kwargs):
+    socket = _SlowSocket()
+    connection = ServerConnection(Protocol("1.0"), socket, None, _FakeSession(), **kwargs)
+    return socket, connection
+
+def test_superseded_queued_patches_are_dropped(io_loop):
+    doc = Document()
+    model = SomeModelInTestConnection()
+    doc.add_root(model)
+    socket, connection = _new_connection()
+
+    _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'foo', 10)))
+    assert len(socket.sent) == 1
+
+    dropped = _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'foo', 11)))
+    _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'bar', 12)))
+    _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'foo', 13)))
+    assert len(socket.sent) == 1
+    assert connection.queued_bytes > 0
+
+    _flush(socket, io_loop)
+    assert dropped.done()
+    assert connection.queued_bytes == 0
+    assert [[(e['attr'], e['new']) for e in m.content['events']] for m in socket.sent[1:]] == \
+        [[('bar', 12)], [('foo', 13)]]
+    stats = connection.outbound_stats
+    assert stats['messages_sent'] == 3
+    assert stats['events_coalesced'] == 1
+
+def test_queued_patches_are_not_serialized_again(io_loop):
+    doc = Document()
+    model = SomeModelInTestConnection()
+    doc.add_root(model)
+    socket, connection = _new_connection()
+
+    _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'foo', 10)))
+    patches = []
+    for i in range(20):
+        events = _patch_events(doc, lambda: setattr(model, 'foo', i))
+        patches.append((connection.protocol.create('PATCH-DOC', events), events))
+    with mock.patch.object(connection.protocol, 'create', wraps=connection.protocol.create) as create:
+        for message, events in patches:
+            connection.send_patch_message(message, events)
+        _flush(socket, io_loop)
+        assert create.call_count == 0
+    assert len(socket.sent) == 2
+    assert [e['new'] for e in socket.sent[1].content['events']] == [19]
+
+def test_queued_streams_are_combined(io_loop):
+    doc = Document()
+    source = ColumnDataSource(data=dict(x=[0]))
+    doc.add_root(source)
+    other = Document.from_json(doc.to_json())
+    socket, connection = _new_connection()
+
+    _send_patch(connection, _patch_events(doc, lambda: source.stream(dict(x=[1]))))
+    for i in range(2, 6):
+        _send_patch(connection, _patch_events(doc, lambda: source.stream(dict(x=[i]), rollover=4)))
+    _flush(socket, io_loop)
+
+    assert len(socket.sent) == 2
+    events = socket.sent[1].content['events']
+    assert len(events) == 1
+    assert events[0]['data'] == dict(x=[2, 3, 4, 5])
+    for message in socket.sent:
+        message.apply_to_document(other)
+    assert other.roots[0].data == source.data == dict(x=[2, 3, 4, 5])
+
+def test_queued_changes_are_not_read_again_when_sent(io_loop):
+    doc = Document()
+    source = ColumnDataSource(data=dict(x=[0]))
+    doc.add_root(source)
+    other = Document.from_json(doc.to_json())
+    socket, connection = _new_connection()
+
+    connection.send_message(connection.protocol.create('OK', 'blocking'))
+    _send_patch(connection, _patch_events(doc, lambda: setattr(source, 'data', dict(x=[1]))))
+    _send_patch(connection, _patch_events(doc, lambda: source.stream(dict(x=[2]))))
+    connection.send_message(connection.protocol.create('OK', 'request'))
+    _send_patch(connection, _patch_events(doc, lambda: source.stream(dict(x=[3]))))
+    _flush(socket, io_loop)
+
+    assert [m.msgtype for m in socket.sent] == ['OK', 'PATCH-DOC', 'PATCH-DOC', 'OK', 'PATCH-DOC']
+    for message in socket.sent:
+        if message.msgtype == 'PATCH-DOC':
+            message.apply_to_document(other)
+    assert source.data == dict(x=[1, 2, 3])
+    assert other.roots[0].data == dict(x=[1, 2, 3])
+
+def test_failed_send_resolves_queued_futures(io_loop):
+    doc = Document()
+    model = SomeModelInTestConnection()
+    doc.add_root(model)
+    socket, connection = _new_connection()
+
+    first = _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'foo', 10)))
+    reply = connection.send_message(connection.protocol.create('OK', 'request'))
+    last = _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'foo', 11)))
+    def fail(message):
+        raise RuntimeError("socket closed")
+    socket.send_message = fail
+    with mock.patch('bokeh.server.connection.log') as mock_log:
+        _flush(socket, io_loop)
+    assert mock_log.error.call_count == 1
+    assert first.done() and reply.done() and last.done()
+    assert connection.queued_bytes == 0
+
+def test_replies_are_not_reordered_with_patches(io_loop):
+    doc = Document()
+    model = SomeModelInTestConnection()
+    doc.add_root(model)
+    socket, connection = _new_connection()
+
+    _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'foo', 10)))
+    _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'foo', 11)))
+    reply = connection.protocol.create('OK', 'request')
+    connection.send_message(reply)
+    _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'foo', 12)))
+
+    _flush(socket, io_loop)
+    assert [m.msgtype for m in socket.sent] == ['PATCH-DOC', 'PATCH-DOC', 'OK', 'PATCH-DOC']
+    assert socket.sent[3].content['events'][0]['new'] == 12
+
+def test_slow_consumer_is_resynced(io_loop):
+    doc = Document()
+    source = ColumnDataSource(data=dict(x=[0]))
+    doc.add_root(source)
+    socket, connection = _new_connection(max_queued_bytes=2000)
+
+    for i in range(1, 40):
+        _send_patch(connection, _patch_events(doc, lambda: source.stream(dict(x=[i] * 10))))
+    assert connection.outbound_stats['resyncs'] > 0
+    assert connection.queued_bytes < 2000
+    expected = dict(x=list(source.data['x']))
+
+    # the resync was serialized when it was queued, so a change that
+    # hasn't been queued yet isn't sent with it
+    source.data['x'].append(40)
+
+    _flush(socket, io_loop)
+    assert socket.closed is None
+    other = Document()
+    other.add_root(ColumnDataSource(data=dict(x=[0]), id=source._id))
+    for message in socket.sent:
+        message.apply_to_document(other)
+    assert other.roots[0].data == expected
+
+def test_slow_consumer_is_disconnected(io_loop):
+    doc = Document()
+    model = SomeModelInTestConnection()
+    doc.add_root(model)
+    socket, connection = _new_connection(max_queued_bytes=100, slow_consumer_policy="disconnect")
+
+    _send_patch(connection, _patch_events(doc, lambda: setattr(model, 'foo', 10)))
+    for i in range(5):
+        connection.send_message(connection.protocol.create('OK', 'request%d' % i))
+    assert socket.closed is not None
+    assert connection.queued_bytes == 0
+    assert connection.outbound_stats['disconnects'] == 1
@@ -0,0 +1,35 @@
+from __future__ import absolute_import
+
+from bokeh.server.metrics import Counter, Histogram, gauge_lines
+
+def test_counter():
+    counter = Counter("test_counter_total", "A test counter", ("kind",), registry=[])
+    counter.inc(("a",))
+    counter.inc(("a",), 2)
+    counter.inc(("b\"",))
+    assert counter.value(("a",)) == 3
+    assert counter.value(("c",)) == 0
+    assert counter.render() == ['# HELP test_counter_total A test counter',
+                                '# TYPE test_counter_total counter',
+                                'test_counter_total{kind="a"} 3.0',
+                                'test_counter_total{kind="b\\""} 1.0']
+
+def test_histogram():
+    histogram = Histogram("test_seconds", "A test histogram", buckets=(0.1, 1.0), registry=[])
+    histogram.observe(0.05)
+    histogram.observe(0.1)
+    histogram.observe(0.5)
+    histogram.observe(5)
+    assert histogram.count() == 4
+    assert histogram.sum() == 5.65
+    assert histogram.render()[2:] == ['test_seconds_bucket{le="0.1"} 2',
+                                      'test_seconds_bucket{le="1.0"} 3',
+                                      'test_seconds_bucket{le="+Inf"} 4',
+                                      'test_seconds_sum 5.65',
+                                      'test_seconds_count 4']
+
+def test_gauge_lines():
+    assert gauge_lines("test_gauge", "A test gauge", ("app",), {("/foo",) : 2}) == [
+        '# HELP test_gauge A test gauge',
+        '# TYPE test_gauge gauge',
+        'test_gauge{app="/foo"} 2.0']
@@ -0,0 +1,95 @@
+from __future__ import absolute_import
+
+import logging
+
+from tornado.httpclient import AsyncHTTPClient
+from tornado.ioloop import IOLoop
+
+from bokeh.application import Application
+from bokeh.client import pull_session
+from bokeh.server.router import Router, _HashRing
+from bokeh.server.server import Server
+
+from .test_server import extract_sessionid_from_json
+
+logging.basicConfig(level=logging.DEBUG)
+
+ROUTER_PORT = 5016
+WORKER_PORTS = [5017, 5018]
+
+class ManagedRouterLoop(object):
+    def __init__(self):
+        self.io_loop = IOLoop()
+        self.io_loop.make_current()
+        hosts = ['localhost:%d' % ROUTER_PORT]
+        self.workers = dict(("http://127.0.0.1:%d" % port,
+                             Server(Application(), io_loop=self.io_loop, port=port,
+                                    host=hosts, allow_websocket_origin=hosts))
+                            for port in WORKER_PORTS)
+        self.router = Router(sorted(self.workers), port=ROUTER_PORT)
+    def __enter__(self):
+        for worker in self.workers.values():
+            worker.start(start_loop=False)
+        self.router.start(start_loop=False)
+        return self
+    def __exit__(self, type, value, traceback):
+        self.router.stop()
+        for worker in self.workers.values():
+            worker.unlisten()
+            worker.stop()
+        self.io_loop.close()
+
+    def get(self, path):
+        url = "http://localhost:%d%s" % (ROUTER_PORT, path)
+        return self.io_loop.run_sync(lambda: AsyncHTTPClient().fetch(url, raise_error=False))
+
+def test__hash_ring_moves_only_removed_keys():
+    ring = _HashRing(["a", "b", "c"])
+    smaller = _HashRing(["a", "c"])
+    keys = ["session%d" % i for i in range(300)]
+    assert set(ring.get(k) for k in keys) == set(["a", "b", "c"])
+    for k in keys:
+        if ring.get(k) != "b":
+            assert smaller.get(k) == ring.get(k)
+    assert _HashRing([]).get("foo") is None
+
+def test__router_sends_sessions_to_their_worker():
+    with ManagedRouterLoop() as managed:
+        session_ids = []
+        for i in range(6):
+            response = managed.get("/")
+            assert response.code == 200
+            session_ids.append(extract_sessionid_from_json(response.body))
+
+        for session_id in session_ids:
+            owner = managed.router.worker_for(session_id).url
+            for url, worker in managed.workers.items():
+                ids = [s.id for s in worker.get_sessions('/')]
+                assert (session_id in ids) == (url == owner)
+
+        session_id = session_ids[0]
+        client_session = pull_session(session_id=session_id,
+                                      url="http://localhost:%d/" % ROUTER_PORT,
+                                      io_loop=managed.io_loop)
+        assert client_session.connected
+        owner = managed.router.worker_for(session_id).url
+        assert managed.router.worker_stats[owner]['websockets'] == 1
+        client_session.close()
+        client_session.loop_until_closed()
+
+        stats = managed.router.worker_stats
+        assert sum(s['requests'] for s in stats.values()) == 6
+        assert all(s['errors'] == 0 for s in stats.values())
+
+def test__router_avoids_unresponsive_workers():
+    with ManagedRouterLoop() as managed:
+        dead_url = sorted(managed.workers)[0]
+        managed.workers[dead_url].unlisten()
+        managed.io_loop.run_sync(managed.router.check_health)
+        assert managed.router.worker_stats[dead_url]['healthy'] is False
+
+        for i in range(4):
+            response = managed.get("/")
+            assert response.code == 200
+            session_id = extract_sessionid_from_json(response.body)
+            assert managed.router.worker_for(session_id).url != dead_url
@@ -1,8 +1,11 @@
 from __future__ import absolute_import
 
 import pytest
+import gzip
+import io
 import logging
 import re
+import threading
 
 import mock
 
@@ -18,6 +21,7 @@ from bokeh.model import Model
 from bokeh.core.properties import List, String
 from bokeh.client import pull_session
 from bokeh.util.session_id import check_session_id_signature
+from bokeh.server import metrics
 
 from .utils import ManagedServerLoop, url, ws_url, http_get, websocket_open
 
@@ -226,6 +230,214 @@ def test__lifecycle_hooks():
     assert client_hook_list.hooks == ["session_created", "modify"]
     assert server_hook_list.hooks == ["session_created", "modify", "session_destroyed"]
 
+class CurdocTestHandler(Handler):
+    def modify_document(self, doc):
+        from bokeh.io import curdoc
+        self.main_thread_curdoc = curdoc()
+        self.thread = threading.current_thread()
+        doc.title = "Built"
+
+def test__session_init_threads():
+    application = Application()
+    handler = CurdocTestHandler()
+    application.add(handler)
+    with ManagedServerLoop(application, session_init_threads=2) as server:
+        client_session = pull_session(session_id='test__session_init_threads',
+                                      url=url(server),
+                                      io_loop=server.io_loop)
+        assert client_session.document.title == "Built"
+        server_doc = server.get_session('/', client_session.id).document
+        assert server_doc.title == "Built"
+        client_session.close()
+
+    assert handler.thread is not threading.current_thread()
+    # other threads' curdoc() is not visible while a document is built
+    assert handler.main_thread_curdoc is None
+
+def test__session_init_threads_negative_raises():
+    with pytest.raises(ValueError):
+        with ManagedServerLoop(Application(), session_init_threads=-1):
+            pass
+
+class PoolTestHandler(Handler):
+    def __init__(self):
+        super(PoolTestHandler, self).__init__()
+        self.created = 0
+        self.destroyed = 0
+
+    def modify_document(self, doc):
+        self.created += 1
+
+    def on_session_destroyed(self, session_context):
+        self.destroyed += 1
+
+def _run_until(server, condition):
+    def check():
+        if condition():
+            server.io_loop.stop()
+    checker = PeriodicCallback(check, 1, io_loop=server.io_loop)
+    checker.start()
+    server.io_loop.start()
+    checker.stop()
+
+def test__session_pool():
+    application = Application()
+    handler = PoolTestHandler()
+    application.add(handler)
+    with ManagedServerLoop(application, session_pool_size=2) as server:
+        app_context = server._tornado._applications['/']
+        _run_until(server, lambda: app_context.session_pool_stats['size'] == 2)
+        assert 0 == len(server.get_sessions('/'))
+        pooled_ids = [entry[1].id for entry in app_context._session_pool]
+
+        response = http_get(server.io_loop, url(server))
+        sessionid = extract_sessionid_from_json(response.body)
+        assert sessionid == pooled_ids[0]
+        assert [sessionid] == [s.id for s in server.get_sessions('/')]
+
+        # the claimed session is replaced in the background
+        _run_until(server, lambda: app_context.session_pool_stats['size'] == 2)
+        assert handler.created == 3
+        stats = app_context.session_pool_stats
+        assert stats['hits'] == 1
+        assert stats['misses'] == 0
+
+        # asking for a particular session doesn't use the pool
+        http_get(server.io_loop, url(server) + "?bokeh-session-id=foo")
+        assert app_context.session_pool_stats['hits'] == 1
+        assert server.get_session('/', 'foo') is not None
+
+class PoolCallbackTestHandler(Handler):
+    def __init__(self):
+        super(PoolCallbackTestHandler, self).__init__()
+        self.ticks = {}
+
+    def modify_document(self, doc):
+        def tick():
+            self.ticks[doc] = self.ticks.get(doc, 0) + 1
+        doc.add_periodic_callback(tick, 1)
+
+def test__session_pool_defers_callbacks_until_claimed():
+    application = Application()
+    handler = PoolCallbackTestHandler()
+    application.add(handler)
+    with ManagedServerLoop(application, session_pool_size=1) as server:
+        app_context = server._tornado._applications['/']
+        _run_until(server, lambda: app_context.session_pool_stats['size'] == 1)
+        pooled = app_context._session_pool[0][1]
+        server.io_loop.run_sync(lambda: gen.sleep(0.05))
+        assert pooled.document not in handler.ticks
+
+        http_get(server.io_loop, url(server))
+        assert server.get_sessions('/') == [pooled]
+        _run_until(server, lambda: handler.ticks.get(pooled.document, 0) > 0)
+
+def test__session_pool_evicts_expired_sessions():
+    application = Application()
+    handler = PoolTestHandler()
+    application.add(handler)
+    with ManagedServerLoop(application, session_pool_size=1, session_pool_ttl_milliseconds=1,
+                           check_unused_sessions_milliseconds=30) as server:
+        app_context = server._tornado._applications['/']
+        _run_until(server, lambda: app_context.session_pool_stats['evictions'] > 0 and
+                                   app_context.session_pool_stats['size'] == 1)
+        assert handler.destroyed == app_context.session_pool_stats['evictions']
+        assert handler.created == handler.destroyed + 1
+        assert 0 == len(server.get_sessions('/'))
+
+def test__session_pool_disabled_by_default():
+    application = Application()
+    with ManagedServerLoop(application) as server:
+        app_context = server._tornado._applications['/']
+        http_get(server.io_loop, url(server))
+        assert app_context.session_pool_stats == dict(size=0, hits=0, misses=0, evictions=0)
+
+def _fetch(server, url, **kwargs):
+    from tornado.httpclient import AsyncHTTPClient
+    return server.io_loop.run_sync(lambda: AsyncHTTPClient().fetch(url, raise_error=False, **kwargs))
+
+def test__resources_bundle_is_shared_by_sessions():
+    from bokeh import embed
+    application = Application()
+    with ManagedServerLoop(application) as server:
+        with mock.patch('bokeh.server.tornado._bundle_for_objs_and_resources',
+                        wraps=embed._bundle_for_objs_and_resources) as bundle:
+            first = _fetch(server, url(server))
+            second = _fetch(server, url(server))
+        assert bundle.call_count == 1
+        assert extract_sessionid_from_json(first.body) != extract_sessionid_from_json(second.body)
+        [(js, css)] = server._tornado._resources_bundles.values()
+        assert js in first.body.decode('utf-8')
+        assert js in second.body.decode('utf-8')
+
+class _InlineResources(object):
+    js_files = ["http://localhost/bokeh.js"]
+    css_files = []
+    js_raw = ["var Bokeh = {};\n\nBokeh.version = '0';"]
+    css_raw_str = ['".bk-root {\\n}"']
+
+def test__autoload_js_template_matches_rendering_the_template():
+    from bokeh.core.templates import AUTOLOAD_JS
+    from bokeh.server.views.autoload_js_handler import AutoloadJsTemplate
+    resources = _InlineResources()
+    template = AutoloadJsTemplate(resources)
+    script = "Bokeh.embed.embed_items(\n  docs_json,\n\n  render_items);"
+    expected = AUTOLOAD_JS.render(
+        js_urls = resources.js_files,
+        css_urls = resources.css_files,
+        js_raw = resources.js_raw + [script],
+        css_raw = resources.css_raw_str,
+        elementid = "foo",
+    )
+    assert template.render("foo", script) == expected.encode('utf-8')
+    assert gzip.GzipFile(fileobj=io.BytesIO(template.render_gzip("foo", script))).read() == expected.encode('utf-8')
+    assert template.etag("foo", script) == template.etag("foo", script)
+    assert template.etag("foo", script) != template.etag("bar", script)
+
+def test__autoload_js_is_cached_with_etag_and_gzip():
+    from bokeh.server.views import autoload_js_handler
+    application = Application()
+    with ManagedServerLoop(application) as server:
+        autoload = autoload_url(server) + "&bokeh-session-id=cached"
+        with mock.patch.object(autoload_js_handler, 'AUTOLOAD_JS', wraps=autoload_js_handler.AUTOLOAD_JS) as template:
+            plain = _fetch(server, autoload)
+            compressed = _fetch(server, autoload, headers={'Accept-Encoding': 'gzip'}, decompress_response=False)
+        assert template.render.call_count == 1
+        assert plain.code == 200
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert gzip.GzipFile(fileobj=io.BytesIO(compressed.body)).read() == plain.body
+
+        etag = plain.headers['Etag']
+        assert etag == compressed.headers['Etag']
+        assert _fetch(server, autoload, headers={'If-None-Match': etag}).code == 304
+
+        other = _fetch(server, autoload_url(server) + "&bokeh-session-id=other", headers={'If-None-Match': etag})
+        assert other.code == 200
+        assert other.headers['Etag'] != etag
+
+def test__metrics_endpoint():
+    application = Application()
+    with ManagedServerLoop(application) as server:
+        assert _fetch(server, url(server) + "metrics").code == 404
+
+    before = metrics.sessions_created.value(("/",))
+    with ManagedServerLoop(application, enable_metrics=True) as server:
+        client_session = pull_session(session_id='metrics',
+                                      url=url(server),
+                                      io_loop=server.io_loop)
+        response = _fetch(server, url(server) + "metrics")
+        assert response.code == 200
+        assert response.headers['Content-Type'].startswith("text/plain")
+        body = response.body.decode('utf-8')
+        assert 'bokeh_sessions{app="/"} 1.0' in body
+        assert 'bokeh_connections 1.0' in body
+        assert 'bokeh_messages_total{msgtype="PULL-DOC-REQ",direction="in"}' in body
+        assert 'bokeh_serialization_seconds_count{msgtype="PULL-DOC-REPLY"}' in body
+        assert 'bokeh_document_lock_wait_seconds_bucket{mode="read",le="+Inf"}' in body
+        assert metrics.sessions_created.value(("/",)) == before + 1
+        assert metrics.messages.value(("ACK", "out")) > 0
+        client_session.close()
+
 # examples:
 # "sessionid" : "NzlNoPfEYJahnPljE34xI0a5RSTaU1Aq1Cx5"
 # 'sessionid':'NzlNoPfEYJahnPljE34xI0a5RSTaU1Aq1Cx5'
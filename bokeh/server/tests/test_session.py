@@ -0,0 +1,195 @@
+from __future__ import absolute_import
+
+import numpy as np
+import pytest
+
+from tornado import gen
+from tornado.ioloop import IOLoop
+
+from bokeh.document import Document, ModelChangedEvent, with_document_read_lock
+from bokeh.model import Model
+from bokeh.models import ColumnDataSource
+from bokeh.core.properties import Int
+
+from bokeh.server import metrics
+from bokeh.server.protocol import Protocol
+from bokeh.server.session import ServerSession, _coalesce_events
+
+class SomeModelInTestSession(Model):
+    foo = Int(2)
+    bar = Int(3)
+
+def _record_events(doc):
+    events = []
+    def on_change(event):
+        events.append((event, None))
+    doc.on_change(on_change)
+    return events
+
+def test_coalesce_events_keeps_latest_change_per_attr():
+    doc = Document()
+    a = SomeModelInTestSession()
+    b = SomeModelInTestSession()
+    doc.add_root(a)
+    doc.add_root(b)
+    events = _record_events(doc)
+    a.foo = 10
+    b.foo = 11
+    a.bar = 12
+    a.foo = 13
+
+    coalesced = [event for event, suppressed in _coalesce_events(events)]
+    assert [(e.model, e.attr, e.new) for e in coalesced] == [(b, 'foo', 11), (a, 'bar', 12), (a, 'foo', 13)]
+
+def test_coalesce_events_keeps_streams():
+    doc = Document()
+    source = ColumnDataSource(data=dict(x=np.arange(3.0)))
+    doc.add_root(source)
+    events = _record_events(doc)
+    source.stream(dict(x=[3.0]))
+    source.stream(dict(x=[4.0]))
+
+    coalesced = [event for event, suppressed in _coalesce_events(events)]
+    assert len(coalesced) == 2
+    assert [e.hint.data for e in coalesced] == [dict(x=[3.0]), dict(x=[4.0])]
+
+def test_coalesce_events_replaces_streams_with_later_value():
+    doc = Document()
+    source = ColumnDataSource(data=dict(x=np.arange(3.0)))
+    doc.add_root(source)
+    events = _record_events(doc)
+    source.stream(dict(x=[3.0]))
+    source.data = dict(x=[1.0, 2.0])
+    source.stream(dict(x=[4.0]))
+
+    coalesced = [event for event, suppressed in _coalesce_events(events)]
+    assert len(coalesced) == 1
+    assert coalesced[0].hint is None
+    assert list(coalesced[0].serializable_new['x']) == [1.0, 2.0, 4.0]
+
+def test_coalesce_events_folds_later_streams_and_patches_into_value():
+    doc = Document()
+    source = ColumnDataSource(data=dict(x=np.arange(3.0)))
+    doc.add_root(source)
+    other = Document.from_json(doc.to_json())
+    events = _record_events(doc)
+    source.data = dict(x=[1.0, 2.0])
+    source.stream(dict(x=[4.0]))
+    source.patch(dict(x=[(0, 5.0)]))
+
+    coalesced = [event for event, suppressed in _coalesce_events(events)]
+    assert len(coalesced) == 1
+    # a client applying the batch must not see the streamed row twice
+    message = Protocol("1.0").create('PATCH-DOC', coalesced)
+    message.apply_to_document(other)
+    assert list(other.roots[0].data['x']) == [5.0, 2.0, 4.0]
+
+def test_coalesce_events_keeps_other_events():
+    doc = Document()
+    a = SomeModelInTestSession()
+    events = _record_events(doc)
+    doc.add_root(a)
+    doc.title = "new title"
+    a.foo = 10
+    a.foo = 11
+
+    coalesced = [event for event, suppressed in _coalesce_events(events)]
+    assert len(coalesced) == 3
+    assert not isinstance(coalesced[0], ModelChangedEvent)
+    assert not isinstance(coalesced[1], ModelChangedEvent)
+    assert coalesced[2].new == 11
+
+class _FakeConnection(object):
+    def __init__(self, use_buffers=False):
+        self.protocol = Protocol("1.0")
+        self.use_buffers = use_buffers
+
+def _pull(session, connection):
+    request = connection.protocol.create('PULL-DOC-REQ')
+    reply = IOLoop.current().run_sync(lambda: session._handle_pull(request, connection))
+    return request, reply
+
+def test_pull_reply_reuses_encoding_until_document_changes():
+    doc = Document()
+    model = SomeModelInTestSession()
+    doc.add_root(model)
+    session = ServerSession('pull-cache', doc, io_loop=IOLoop.current())
+    connection = _FakeConnection()
+
+    first_req, first = _pull(session, connection)
+    second_req, second = _pull(session, connection)
+    assert second.header['reqid'] == second_req.header['msgid']
+    assert second.header['msgid'] != first.header['msgid']
+    assert second.content_json is first.content_json
+    assert session.pull_reply_cache_stats == dict(hits=1, misses=1)
+
+    IOLoop.current().run_sync(lambda: session.with_document_locked(setattr, model, 'foo', 10))
+    third_req, third = _pull(session, connection)
+    assert third.content_json != first.content_json
+    assert session.pull_reply_cache_stats == dict(hits=1, misses=2)
+
+    other = Document()
+    third.push_to_document(other)
+    assert other.roots[0].foo == 10
+
+def test_pull_reply_cache_is_per_buffer_mode():
+    doc = Document()
+    doc.add_root(ColumnDataSource(data=dict(x=np.arange(3.0))))
+    session = ServerSession('pull-cache-buffers', doc, io_loop=IOLoop.current())
+
+    _pull(session, _FakeConnection())
+    request, reply = _pull(session, _FakeConnection(use_buffers=True))
+    assert len(reply.buffers) == 1
+    assert session.pull_reply_cache_stats == dict(hits=0, misses=2)
+
+def test_readers_share_the_document_lock():
+    doc = Document()
+    model = SomeModelInTestSession()
+    doc.add_root(model)
+    session = ServerSession('read-lock', doc, io_loop=IOLoop.current())
+    order = []
+
+    @gen.coroutine
+    def read(name):
+        order.append(name + " start")
+        yield gen.moment
+        order.append(name + " end")
+
+    @gen.coroutine
+    def run_all():
+        yield [session.with_document_read_locked(read, "r1"),
+               session.with_document_locked(read, "w"),
+               session.with_document_read_locked(read, "r2"),
+               session.with_document_read_locked(read, "r3")]
+
+    IOLoop.current().run_sync(run_all)
+    assert order == ["r1 start", "r1 end", "w start", "w end",
+                     "r2 start", "r3 start", "r2 end", "r3 end"]
+
+    stats = session.document_lock_stats
+    assert stats['read_acquisitions'] == 3
+    assert stats['write_acquisitions'] == 1
+
+def test_read_locked_callback_cannot_change_document():
+    doc = Document()
+    model = SomeModelInTestSession()
+    doc.add_root(model)
+    session = ServerSession('read-lock-change', doc, io_loop=IOLoop.current())
+
+    @with_document_read_lock
+    def change():
+        model.foo = 10
+
+    with pytest.raises(RuntimeError):
+        IOLoop.current().run_sync(session._wrap_document_callback(change))
+
+def test_periodic_callback_overruns_are_counted():
+    doc = Document()
+    slow = doc.add_periodic_callback(lambda: None, 1)
+    fast = doc.add_periodic_callback(lambda: None, 1000)
+    session = ServerSession('overruns', doc, io_loop=IOLoop.current(), app_path="/overruns")
+    before = metrics.periodic_callback_overruns.value(("/overruns",))
+    slow.stats.record(10)
+    fast.stats.record(10)
+    assert metrics.periodic_callback_overruns.value(("/overruns",)) == before + 1
+    session.destroy()
@@ -8,7 +8,7 @@ log = logging.getLogger(__name__)
 
 import atexit
 # NOTE: needs PyPI backport on Python 2 (https://pypi.python.org/pypi/futures)
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import os
 from pprint import pformat
 import signal
@@ -19,14 +19,20 @@ from tornado.web import Application as TornadoApplication
 from tornado.web import HTTPError
 from tornado.web import StaticFileHandler
 
+from bokeh.embed import _bundle_for_objs_and_resources
 from bokeh.resources import Resources
 from bokeh.settings import settings
+from bokeh.util.session_id import generate_session_id
+from bokeh.util.tornado import _WebSocketCompression
 
 from .views.root_handler import RootHandler
 from .urls import per_app_patterns, toplevel_patterns
 from .connection import ServerConnection
 from .application_context import ApplicationContext
+from .views.autoload_js_handler import AutoloadJsTemplate
 from .views.static_handler import StaticHandler
+from .views.metrics_handler import MetricsHandler
+from . import metrics
 
 
 def match_host(host, pattern):
@@ -142,6 +148,26 @@ class BokehTornado(TornadoApplication):
         check_unused_sessions_milliseconds (int) : number of milliseconds between check for unused sessions
         unused_session_lifetime_milliseconds (int) : number of milliseconds for unused session lifetime
         stats_log_frequency_milliseconds (int) : number of milliseconds between logging stats
+        session_init_threads (int) : number of worker threads used to initialize new session documents
+            Set to 0 (the default) to initialize documents on the IOLoop.
+        session_pool_size (int) : number of sessions per application to build ahead of time
+            Requests that don't ask for a particular session ID are given one
+            of these, rather than waiting for a new one to be built. The pool
+            is refilled in the background. Set to 0 (the default) to disable.
+        session_pool_ttl_milliseconds (int) : number of milliseconds a pooled session can go unclaimed
+            Older pooled sessions are discarded and rebuilt, so that new
+            sessions don't start from stale data.
+        websocket_compression (boolean) : whether to negotiate permessage-deflate with websocket clients
+        websocket_compression_min_bytes (int) : smallest websocket message to compress
+            Larger messages are also sent uncompressed if a sample of them
+            doesn't compress well (e.g. binary array data).
+        websocket_max_queued_bytes (int) : number of bytes of messages that can wait to be sent to one client
+            Set to 0 (the default) for no limit.
+        slow_consumer_policy (str) : what to do when a client falls further behind than ``websocket_max_queued_bytes``
+            ``"resync"`` (the default) replaces the queued document changes
+            with the current values of everything they changed, and
+            ``"disconnect"`` closes the connection.
+        enable_metrics (boolean) : whether to publish metrics for Prometheus at ``/metrics``
         develop (boolean) : True for develop mode
         use_index (boolean) : True to generate an index of the running apps in the RootHandler
 
@@ -162,6 +188,15 @@ class BokehTornado(TornadoApplication):
                  unused_session_lifetime_milliseconds=15000,
                  # how often to log stats
                  stats_log_frequency_milliseconds=15000,
+                 session_init_threads=0,
+                 session_pool_size=0,
+                 # how long pooled sessions can wait to be claimed
+                 session_pool_ttl_milliseconds=600000,
+                 websocket_compression=False,
+                 websocket_compression_min_bytes=1024,
+                 websocket_max_queued_bytes=0,
+                 slow_consumer_policy="resync",
+                 enable_metrics=False,
                  develop=False,
                  use_index=True,
                  redirect_root=True):
@@ -182,13 +217,39 @@ class BokehTornado(TornadoApplication):
         if stats_log_frequency_milliseconds <= 0:
             raise ValueError("stats_log_frequency_milliseconds must be > 0")
 
+        if session_init_threads < 0:
+            raise ValueError("session_init_threads must be >= 0")
+
+        if session_pool_size < 0:
+            raise ValueError("session_pool_size must be >= 0")
+
+        if session_pool_ttl_milliseconds <= 0:
+            raise ValueError("session_pool_ttl_milliseconds must be > 0")
+
+        if websocket_compression_min_bytes < 0:
+            raise ValueError("websocket_compression_min_bytes must be >= 0")
+
+        if websocket_max_queued_bytes < 0:
+            raise ValueError("websocket_max_queued_bytes must be >= 0")
+
+        if slow_consumer_policy not in ("resync", "disconnect"):
+            raise ValueError("slow_consumer_policy must be 'resync' or 'disconnect'")
+
         self._hosts = set(hosts)
         self._websocket_origins = self._hosts | set(extra_websocket_origins)
         self._resources = {}
+        self._resources_bundles = {}
+        self._autoload_js_templates = {}
         self._develop = develop
         self._secret_key = secret_key
         self._sign_sessions = sign_sessions
         self._generate_session_ids = generate_session_ids
+        if websocket_compression:
+            self._websocket_compression = _WebSocketCompression(min_bytes=websocket_compression_min_bytes)
+        else:
+            self._websocket_compression = None
+        self._websocket_max_queued_bytes = websocket_max_queued_bytes or None
+        self._slow_consumer_policy = slow_consumer_policy
 
         log.debug("Allowed Host headers: %r", list(self._hosts))
         log.debug("These host origins can connect to the websocket: %r", list(self._websocket_origins))
@@ -196,7 +257,10 @@ class BokehTornado(TornadoApplication):
         # Wrap applications in ApplicationContext
         self._applications = dict()
         for k,v in applications.items():
-            self._applications[k] = ApplicationContext(v, self._develop)
+            self._applications[k] = ApplicationContext(v, self._develop,
+                                                       session_pool_size=session_pool_size,
+                                                       session_pool_ttl_milliseconds=session_pool_ttl_milliseconds,
+                                                       url=k)
 
         extra_patterns = extra_patterns or []
         all_patterns = []
@@ -230,6 +294,9 @@ class BokehTornado(TornadoApplication):
                 route = self._prefix + route
                 all_patterns.append((route, StaticFileHandler, { "path" : app.static_path }))
 
+        if enable_metrics:
+            extra_patterns = extra_patterns + [(r'/metrics', MetricsHandler)]
+
         for p in extra_patterns + toplevel_patterns:
             if p[1] == RootHandler:
                 if self.use_index:
@@ -260,6 +327,7 @@ class BokehTornado(TornadoApplication):
                  unused_session_lifetime_milliseconds=15000,
                  # how often to log stats
                  stats_log_frequency_milliseconds=15000,
+                 session_init_threads=0,
                  develop=False,
                  **kw):
 
@@ -267,8 +335,16 @@ class BokehTornado(TornadoApplication):
             io_loop = IOLoop.current()
         self._loop = io_loop
 
+        # created here rather than in __init__ so that each forked
+        # process (see Server num_procs) gets its own worker threads
+        if session_init_threads > 0:
+            self._session_init_executor = ThreadPoolExecutor(max_workers=session_init_threads)
+        else:
+            self._session_init_executor = None
+
         for app_context in self._applications.values():
             app_context._loop = self._loop
+            app_context._executor = self._session_init_executor
 
         self._clients = set()
         self._executor = ProcessPoolExecutor(max_workers=4)
@@ -306,6 +382,10 @@ class BokehTornado(TornadoApplication):
     def generate_session_ids(self):
         return self._generate_session_ids
 
+    @property
+    def websocket_compression(self):
+        return self._websocket_compression
+
     def root_url_for_request(self, request):
         return request.protocol + "://" + request.host + self._prefix + "/"
 
@@ -325,6 +405,26 @@ class BokehTornado(TornadoApplication):
                                                    path_versioner=StaticHandler.append_version)
         return self._resources[root_url]
 
+    def resources_bundle(self, request):
+        ''' The rendered BokehJS scripts and stylesheets of
+        ``resources(request)``, which are the same for every session page.
+
+        '''
+        root_url = self.root_url_for_request(request)
+        if root_url not in self._resources_bundles:
+            self._resources_bundles[root_url] = _bundle_for_objs_and_resources(None, self.resources(request))
+        return self._resources_bundles[root_url]
+
+    def autoload_js_template(self, request):
+        ''' The autoload script for ``resources(request)``, rendered once
+        for every session with placeholders for the parts that differ.
+
+        '''
+        root_url = self.root_url_for_request(request)
+        if root_url not in self._autoload_js_templates:
+            self._autoload_js_templates[root_url] = AutoloadJsTemplate(self.resources(request))
+        return self._autoload_js_templates[root_url]
+
     def start(self, start_loop=True):
         ''' Start the Bokeh Server application main loop.
 
@@ -346,6 +446,8 @@ class BokehTornado(TornadoApplication):
         for context in self._applications.values():
             context.run_load_hook()
 
+        self._loop.add_callback(self.fill_session_pools)
+
         if start_loop:
             try:
                 self._loop.start()
@@ -378,8 +480,10 @@ class BokehTornado(TornadoApplication):
     def executor(self):
         return self._executor
 
-    def new_connection(self, protocol, socket, application_context, session):
-        connection = ServerConnection(protocol, socket, application_context, session)
+    def new_connection(self, protocol, socket, application_context, session, use_buffers=False):
+        connection = ServerConnection(protocol, socket, application_context, session, use_buffers=use_buffers,
+                                      max_queued_bytes=self._websocket_max_queued_bytes,
+                                      slow_consumer_policy=self._slow_consumer_policy)
         self._clients.add(connection)
         return connection
 
@@ -401,6 +505,17 @@ class BokehTornado(TornadoApplication):
     def cleanup_sessions(self):
         for app in self._applications.values():
             yield app.cleanup_sessions(self._unused_session_linger_milliseconds)
+        # also replaces expired pooled sessions
+        yield self.fill_session_pools()
+        raise gen.Return(None)
+
+    @gen.coroutine
+    def fill_session_pools(self):
+        def new_session_id():
+            return generate_session_id(secret_key=self._secret_key,
+                                       signed=self._sign_sessions)
+        for app in self._applications.values():
+            yield app.fill_session_pool(new_session_id)
         raise gen.Return(None)
 
     def log_stats(self):
@@ -411,11 +526,61 @@ class BokehTornado(TornadoApplication):
         for app_path, app in self._applications.items():
             sessions = list(app.sessions)
             unused_count = 0
+            pull_hits = pull_misses = 0
+            read_wait = write_wait = max_read_wait = max_write_wait = 0.0
             for s in sessions:
                 if s.connection_count == 0:
                     unused_count += 1
+                pull_stats = s.pull_reply_cache_stats
+                pull_hits += pull_stats['hits']
+                pull_misses += pull_stats['misses']
+                lock_stats = s.document_lock_stats
+                read_wait += lock_stats['read_wait_seconds']
+                write_wait += lock_stats['write_wait_seconds']
+                max_read_wait = max(max_read_wait, lock_stats['max_read_wait_seconds'])
+                max_write_wait = max(max_write_wait, lock_stats['max_write_wait_seconds'])
             log.debug("[pid %d]   %s has %d sessions with %d unused",
                       os.getpid(), app_path, len(sessions), unused_count)
+            log.debug("[pid %d]   %s PULL-DOC-REPLY cache has %d hits, %d misses",
+                      os.getpid(), app_path, pull_hits, pull_misses)
+            log.debug("[pid %d]   %s document locks waited %.3f s for reading (at most %.3f s), "
+                      "%.3f s for writing (at most %.3f s)",
+                      os.getpid(), app_path, read_wait, max_read_wait, write_wait, max_write_wait)
+            if app.session_pool_size > 0:
+                stats = app.session_pool_stats
+                log.debug("[pid %d]   %s session pool has %d ready with %d hits, %d misses, %d evictions",
+                          os.getpid(), app_path, stats['size'], stats['hits'], stats['misses'], stats['evictions'])
+        if self._websocket_compression is not None:
+            stats = self._websocket_compression.stats
+            log.debug("[pid %d] websocket compression: %d messages compressed, %d uncompressed, "
+                      "%d message bytes sent as %d bytes, %.3f s compressing",
+                      os.getpid(), stats['messages_compressed'], stats['messages_uncompressed'],
+                      stats['message_bytes'], stats['wire_bytes'], stats['compression_seconds'])
+        if self._clients:
+            queued = max(c.queued_bytes for c in self._clients)
+            coalesced = resyncs = 0
+            for c in self._clients:
+                stats = c.outbound_stats
+                coalesced += stats['events_coalesced']
+                resyncs += stats['resyncs']
+            log.debug("[pid %d] websocket queues: at most %d bytes waiting, %d events coalesced, %d resyncs",
+                      os.getpid(), queued, coalesced, resyncs)
+
+    def render_metrics(self):
+        ''' Render the server's metrics in the Prometheus text exposition format.
+
+        '''
+        sessions = {}
+        pooled = {}
+        for app_path, app in self._applications.items():
+            sessions[(app_path,)] = len(list(app.sessions))
+            pooled[(app_path,)] = app.session_pool_stats['size']
+        lines = metrics.gauge_lines("bokeh_sessions", "Open sessions", ("app",), sessions)
+        lines += metrics.gauge_lines("bokeh_pooled_sessions", "Sessions built ahead of time and not yet claimed",
+                                     ("app",), pooled)
+        lines += metrics.gauge_lines("bokeh_connections", "Open websocket connections", (),
+                                     {() : len(self._clients)})
+        return metrics.render(lines)
 
     def keep_alive(self):
         for c in self._clients:
@@ -459,4 +624,6 @@ class BokehTornado(TornadoApplication):
     def _cleanup(self):
         log.debug("Shutdown: cleaning up")
         self._executor.shutdown(wait=False)
+        if self._session_init_executor is not None:
+            self._session_init_executor.shutdown(wait=False)
         self._clients.clear()
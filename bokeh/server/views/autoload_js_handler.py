@@ -6,14 +6,90 @@ from __future__ import absolute_import, print_function
 import logging
 log = logging.getLogger(__name__)
 
+import hashlib
+import re
+import struct
+import zlib
+
+from jinja2.filters import do_indent
 from tornado import gen
 
 from bokeh.core.templates import AUTOLOAD_JS
-from bokeh.util.string import encode_utf8
 from bokeh.embed import _script_for_render_items
 
 from .session_handler import SessionHandler
 
+_ELEMENT_ID = "__bokeh_autoload_element_id__"
+_SCRIPT = "__bokeh_autoload_script__"
+
+_GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+
+def _deflate(data, final):
+    # each piece is compressed on its own and ends on a byte boundary,
+    # so the pieces can be joined into one deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_FULL_FLUSH)
+
+class AutoloadJsTemplate(object):
+    ''' The autoload script for a set of resources, rendered once.
+
+    Only the element ID and the script that loads the session differ
+    between requests, so the script is rendered with placeholders for
+    them, and the rest of it (which includes any inline BokehJS and CSS)
+    is kept both encoded and gzip compressed.
+
+    '''
+
+    def __init__(self, resources):
+        js = AUTOLOAD_JS.render(
+            js_urls = resources.js_files,
+            css_urls = resources.css_files,
+            js_raw = resources.js_raw + [_SCRIPT],
+            css_raw = resources.css_raw_str,
+            elementid = _ELEMENT_ID,
+        )
+        pieces = re.split("(%s|%s)" % (_ELEMENT_ID, _SCRIPT), js)
+        self._fields = pieces[1::2]
+        self._static = [piece.encode('utf-8') for piece in pieces[::2]]
+        self._deflated = [_deflate(piece, i == len(self._static) - 1) for i, piece in enumerate(self._static)]
+        self._digest = hashlib.sha1(js.encode('utf-8')).hexdigest()
+
+    def _values(self, element_id, script):
+        # the template indents each inline script
+        values = { _ELEMENT_ID : element_id.encode('utf-8'), _SCRIPT : do_indent(script, 6).encode('utf-8') }
+        return [values[field] for field in self._fields]
+
+    def etag(self, element_id, script):
+        ''' An ETag for the script rendered with ``element_id`` and ``script``.
+
+        '''
+        key = ("%s\n%s\n%s" % (self._digest, element_id, script)).encode('utf-8')
+        return '"%s"' % hashlib.sha1(key).hexdigest()
+
+    def render(self, element_id, script):
+        ''' Render the autoload script as UTF-8 encoded bytes.
+
+        '''
+        chunks = [self._static[0]]
+        for value, static in zip(self._values(element_id, script), self._static[1:]):
+            chunks.extend([value, static])
+        return b"".join(chunks)
+
+    def render_gzip(self, element_id, script):
+        ''' Render the autoload script as gzip compressed bytes, only
+        compressing the parts that differ between requests.
+
+        '''
+        chunks = [_GZIP_HEADER, self._deflated[0]]
+        crc = zlib.crc32(self._static[0])
+        size = len(self._static[0])
+        for value, static, deflated in zip(self._values(element_id, script), self._static[1:], self._deflated[1:]):
+            chunks.extend([_deflate(value, False), deflated])
+            crc = zlib.crc32(static, zlib.crc32(value, crc))
+            size += len(value) + len(static)
+        chunks.append(struct.pack("<II", crc & 0xffffffff, size & 0xffffffff))
+        return b"".join(chunks)
+
 class AutoloadJsHandler(SessionHandler):
     ''' Implements a custom Tornado handler for the autoload JS chunk
 
@@ -22,7 +98,10 @@ class AutoloadJsHandler(SessionHandler):
         super(AutoloadJsHandler, self).__init__(tornado_app, *args, **kw)
 
     def initialize(self, *args, **kw):
-        pass
+        self._etag = None
+
+    def compute_etag(self):
+        return self._etag
 
     @gen.coroutine
     def get(self, *args, **kwargs):
@@ -33,20 +112,23 @@ class AutoloadJsHandler(SessionHandler):
             self.send_error(status_code=400, reason='No bokeh-autoload-element query parameter')
             return
 
-        resources = self.application.resources(self.request)
+        template = self.application.autoload_js_template(self.request)
         websocket_url = self.application.websocket_url_for_request(self.request, self.bokeh_websocket_path)
 
         # TODO: yes, this should resuse code from bokeh.embed more directly
         render_items = [dict(sessionid=session.id, elementid=element_id, use_for_title=True)]
         script = _script_for_render_items(None, render_items, websocket_url=websocket_url, wrap_script=False)
 
-        js = AUTOLOAD_JS.render(
-            js_urls = resources.js_files,
-            css_urls = resources.css_files,
-            js_raw = resources.js_raw + [script],
-            css_raw = resources.css_raw_str,
-            elementid = element_id,
-        )
-
         self.set_header("Content-Type", 'application/javascript')
-        self.write(encode_utf8(js))
+        self.set_header("Vary", "Accept-Encoding")
+        self._etag = template.etag(element_id, script)
+        self.set_etag_header()
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+
+        if "gzip" in self.request.headers.get("Accept-Encoding", ""):
+            self.set_header("Content-Encoding", "gzip")
+            self.write(template.render_gzip(element_id, script))
+        else:
+            self.write(template.render(element_id, script))
@@ -0,0 +1,18 @@
+''' Provide a request handler that publishes the Bokeh server's metrics
+in the Prometheus text exposition format.
+
+'''
+from __future__ import absolute_import, print_function
+
+import logging
+log = logging.getLogger(__name__)
+
+from tornado.web import RequestHandler
+
+class MetricsHandler(RequestHandler):
+    ''' Implements a custom Tornado handler for the ``/metrics`` endpoint.
+
+    '''
+    def get(self, *args, **kwargs):
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.write(self.application.render_metrics())
@@ -26,6 +26,11 @@ class SessionHandler(RequestHandler):
         session_id = self.get_argument("bokeh-session-id", default=None)
         if session_id is None:
             if self.application.generate_session_ids:
+                session = self.application_context.claim_pooled_session()
+                if session is not None:
+                    # build a replacement while this page is served
+                    self.application.io_loop.add_callback(self.application.fill_session_pools)
+                    raise gen.Return(session)
                 session_id = generate_session_id(secret_key=self.application.secret_key,
                                                  signed=self.application.sign_sessions)
             else:
@@ -14,6 +14,7 @@ from tornado import gen, locks
 from tornado.websocket import WebSocketHandler, WebSocketClosedError
 from tornado.concurrent import Future
 
+from .. import metrics
 from ..exceptions import MessageError, ProtocolError, ValidationError
 from ..protocol import Protocol
 from ..protocol.message import Message
@@ -32,6 +33,8 @@ class WSHandler(WebSocketHandler):
         self.connection = None
         self.application_context = kw['application_context']
         self.latest_pong = -1
+        # bytes of the message currently being received
+        self._received_bytes = 0
         # write_lock allows us to lock the connection to send multiple
         # messages atomically.
         self.write_lock = locks.Lock()
@@ -57,6 +60,12 @@ class WSHandler(WebSocketHandler):
                       origin, origin_host, allowed_hosts)
             return False
 
+    def get_compression_options(self):
+        # None disables permessage-deflate, any dict enables it
+        if self.application.websocket_compression is None:
+            return None
+        return {}
+
     def open(self):
         ''' Initialize a connection to a client.
 
@@ -79,6 +88,10 @@ class WSHandler(WebSocketHandler):
             log.error("Session id had invalid signature: %r", session_id)
             raise ProtocolError("Invalid session ID")
 
+        # clients that can decode binary buffers ask for array data
+        # to be sent that way instead of as JSON lists
+        use_buffers = self.get_argument("bokeh-binary-buffers", default=None) == "1"
+
         def on_fully_opened(future):
             e = future.exception()
             if e is not None:
@@ -87,12 +100,12 @@ class WSHandler(WebSocketHandler):
                 # immediately, most likely.
                 log.debug("Failed to fully open connection %r", e)
 
-        future = self._async_open(session_id, proto_version)
+        future = self._async_open(session_id, proto_version, use_buffers)
         self.application.io_loop.add_future(future,
                                             on_fully_opened)
 
     @gen.coroutine
-    def _async_open(self, session_id, proto_version):
+    def _async_open(self, session_id, proto_version, use_buffers=False):
         try:
             yield self.application_context.create_session_if_needed(session_id)
             session = self.application_context.get_session(session_id)
@@ -104,7 +117,8 @@ class WSHandler(WebSocketHandler):
             self.handler = ServerHandler()
             log.debug("ServerHandler created for %r", protocol)
 
-            self.connection = self.application.new_connection(protocol, self, self.application_context, session)
+            self.connection = self.application.new_connection(protocol, self, self.application_context, session,
+                                                              use_buffers=use_buffers)
             log.info("ServerConnection created")
 
         except ProtocolError as e:
@@ -112,8 +126,9 @@ class WSHandler(WebSocketHandler):
             self.close()
             raise e
 
-        msg = self.connection.protocol.create('ACK')
-        yield self.send_message(msg)
+        # we can decode binary buffers from any client, so say so
+        msg = self.connection.protocol.create('ACK', binary_buffers=True)
+        yield self.connection.send_message(msg)
 
         raise gen.Return(None)
 
@@ -136,6 +151,7 @@ class WSHandler(WebSocketHandler):
         # do with them other than report them as an unhandled
         # Future
 
+        self._received_bytes += len(fragment)
         try:
             message = yield self._receive(fragment)
         except Exception as e:
@@ -146,6 +162,9 @@ class WSHandler(WebSocketHandler):
 
         try:
             if message:
+                metrics.messages.inc((message.msgtype, "in"))
+                metrics.message_bytes.inc((message.msgtype, "in"), self._received_bytes)
+                self._received_bytes = 0
 
                 #log.debug("Received message: %r", message)
                 work = yield self._handle(message)
@@ -179,7 +198,9 @@ class WSHandler(WebSocketHandler):
 
         '''
         try:
-            yield message.send(self)
+            sent = yield message.send(self)
+            metrics.messages.inc((message.msgtype, "out"))
+            metrics.message_bytes.inc((message.msgtype, "out"), sent)
         except WebSocketClosedError:
             # on_close() is / will be called anyway
             log.warn("Failed sending message as connection was closed")
@@ -189,7 +210,13 @@ class WSHandler(WebSocketHandler):
     def write_message(self, message, binary=False, locked=True):
         ''' Override parent write_message with a version that consistently returns Future across Tornado versions '''
         def write_message_unlocked():
-            future = super(WSHandler, self).write_message(message, binary)
+            compression = self.application.websocket_compression
+            if compression is None:
+                future = super(WSHandler, self).write_message(message, binary)
+            else:
+                if self.ws_connection is None:
+                    raise WebSocketClosedError()
+                future = compression.write_message(self.ws_connection, message, binary)
             if future is None:
                 # tornado >= 4.3 gives us a Future, simulate that
                 # with this fake Future on < 4.3
@@ -236,7 +263,9 @@ class WSHandler(WebSocketHandler):
     @gen.coroutine
     def _schedule(self, work):
         if isinstance(work, Message):
-            yield self.send_message(work)
+            # replies share the connection's queue with patches, so that
+            # they arrive in order
+            yield self.connection.send_message(work)
         else:
             self._internal_error("expected a Message not " + repr(work))
 
@@ -120,6 +120,21 @@ class Settings(object):
         '''
         return self._get_bool("PRETTY", default, True)
 
+    def json_backend(self, default="stdlib"):
+        ''' Set which library should be used to encode JSON: "stdlib" for
+        the standard library ``json`` module, "simplejson" for the optional
+        simplejson package, or "auto" to use simplejson if it is installed.
+
+        '''
+        return self._get_str("JSON_BACKEND", default)
+
+    def json_sort_keys(self, default=True):
+        ''' Set whether JSON output should have sorted keys, to make it
+        reproducible. Messages sent by the Bokeh server never sort keys.
+
+        '''
+        return self._get_bool("JSON_SORT_KEYS", default)
+
     def simple_ids(self, default=None):
         ''' Set whether Bokeh should generate simple numeric model IDs.
 
@@ -161,6 +176,13 @@ class Settings(object):
         '''
         return self._get_bool("SIGN_SESSIONS", default)
 
+    def periodic_callback_duty_cycle_warning(self, default=0.8):
+        ''' Set the fraction of its period that a periodic callback may
+        take on average before the server logs a warning about it.
+
+        '''
+        return float(self._get_str("PERIODIC_CALLBACK_DUTY_CYCLE_WARNING", default))
+
     # Server settings go here:
 
     def bokehjssrcdir(self):
@@ -10,7 +10,7 @@ from bokeh.application.handlers import FunctionHandler
 from bokeh.client import pull_session, push_session, ClientSession
 from bokeh.document import ModelChangedEvent, TitleChangedEvent, Document
 from bokeh.model import Model
-from bokeh.models import Plot
+from bokeh.models import ColumnDataSource, Plot
 from bokeh.core.properties import Int, Instance, Dict, String, Any, DistanceSpec, AngleSpec
 from tornado import gen
 from tornado.httpclient import HTTPError
@@ -449,6 +449,81 @@ class TestClientServer(unittest.TestCase):
             client_session.loop_until_closed()
             assert not client_session.connected
 
+    def test_server_streams_go_to_client_as_buffers(self):
+        import numpy as np
+        from bokeh.models import ColumnDataSource
+        application = Application()
+        with ManagedServerLoop(application) as server:
+            doc = document.Document()
+            doc.add_root(ColumnDataSource(data=dict(x=np.arange(3.0))))
+
+            client_session = push_session(doc,
+                                          session_id='test_server_streams_go_to_client_as_buffers',
+                                          url=url(server),
+                                          io_loop=server.io_loop)
+            server_session = server.get_session('/', client_session.id)
+            server_source = next(iter(server_session.document.roots))
+            client_source = next(iter(doc.roots))
+            assert server_source.data['x'].tolist() == [0.0, 1.0, 2.0]
+
+            def do_stream_on_server():
+                server_source.stream(dict(x=np.array([3.0, np.nan])))
+            server_session.with_document_locked(do_stream_on_server)
+
+            def client_has_streamed():
+                return len(client_source.data['x']) == 5
+            client_session._connection._loop_until(client_has_streamed)
+            assert isinstance(client_source.data['x'], np.ndarray)
+            assert client_source.data['x'][:4].tolist() == [0.0, 1.0, 2.0, 3.0]
+            assert np.isnan(client_source.data['x'][4])
+
+            client_session.close()
+            client_session.loop_until_closed()
+            assert not client_session.connected
+
+    def test_client_sends_buffers_only_when_server_acks_them(self):
+        import numpy as np
+        from bokeh.client._connection import ClientConnection
+        from bokeh.server.protocol.messages.ack import ack_1
+        create_ack = ack_1.create.__func__
+        def ack_without_buffers(cls, binary_buffers=False, **metadata):
+            return create_ack(cls, **metadata)
+        application = Application()
+        for server_ack, expected in [(None, True), (ack_without_buffers, False)]:
+            with ManagedServerLoop(application) as server:
+                doc = document.Document()
+                doc.add_root(ColumnDataSource(data=dict(x=np.arange(3.0))))
+
+                sent = []
+                send_message = ClientConnection.send_message
+                def record(connection, message):
+                    sent.append(message)
+                    return send_message(connection, message)
+
+                with patch.object(ClientConnection, 'send_message', record):
+                    if server_ack is None:
+                        client_session = push_session(doc, url=url(server), io_loop=server.io_loop)
+                    else:
+                        with patch.object(ack_1, 'create', classmethod(server_ack)):
+                            client_session = push_session(doc, url=url(server), io_loop=server.io_loop)
+                    assert client_session._connection._use_buffers == expected
+
+                    server_session = server.get_session('/', client_session.id)
+                    server_source = next(iter(server_session.document.roots))
+                    client_source = next(iter(doc.roots))
+                    client_source.stream(dict(x=np.array([3.0])))
+                    def server_has_streamed():
+                        return len(server_source.data['x']) == 4
+                    client_session._connection._loop_until(server_has_streamed)
+
+                pushed = [m for m in sent if m.msgtype in ('PUSH-DOC', 'PATCH-DOC')]
+                assert [m.msgtype for m in pushed] == ['PUSH-DOC', 'PATCH-DOC']
+                assert all(bool(m.buffers) == expected for m in pushed)
+                assert list(server_source.data['x']) == [0.0, 1.0, 2.0, 3.0]
+
+                client_session.close()
+                client_session.loop_until_closed()
+
     def test_io_push_to_server(self):
         from bokeh.io import output_server, push, curdoc, reset_output
         application = Application()
@@ -982,6 +1057,47 @@ def test_server_changes_do_not_boomerang(monkeypatch):
         client_session.loop_until_closed()
         assert not client_session.connected
 
+def test_server_changes_are_sent_as_one_patch(monkeypatch):
+    application = Application()
+    with ManagedServerLoop(application) as server:
+        doc = document.Document()
+        client_root = SomeModelInTestClientServer(foo=42)
+        doc.add_root(client_root)
+
+        client_session = push_session(doc,
+                                      session_id='test_server_changes_are_sent_as_one_patch',
+                                      url=url(server),
+                                      io_loop=server.io_loop)
+        server_session = server.get_session('/', client_session.id)
+        server_root = next(iter(server_session.document.roots))
+
+        patches = []
+        handle_patch = client_session._handle_patch
+        def record_patch(message):
+            patches.append(message)
+            handle_patch(message)
+        monkeypatch.setattr(client_session, '_handle_patch', record_patch)
+
+        def do_several_changes():
+            server_root.foo = 43
+            server_root.foo = 44
+            server_root.child = AnotherModelInTestClientServer(bar=7)
+            server_root.foo = 45
+        server_session.with_document_locked(do_several_changes)
+
+        def client_change_made():
+            return client_root.foo == 45
+        client_session._connection._loop_until(client_change_made)
+        assert client_root.child.bar == 7
+
+        assert len(patches) == 1
+        events = patches[0].content['events']
+        assert [(e['kind'], e['attr']) for e in events] == [('ModelChanged', 'child'), ('ModelChanged', 'foo')]
+
+        client_session.close()
+        client_session.loop_until_closed()
+        assert not client_session.connected
+
 # this test is because we do the funky serializable_value
 # tricks with the units specs
 def test_unit_spec_changes_do_not_boomerang(monkeypatch):
@@ -1049,3 +1165,27 @@ def test_session_show_adds_obj_to_curdoc_if_necessary(m):
     assert session.document.roots == []
     session.show(p)
     assert session.document.roots == [p]
+
+def test_websocket_compression():
+    application = Application()
+    with ManagedServerLoop(application, websocket_compression=True) as server:
+        doc = document.Document()
+        doc.add_root(ColumnDataSource(data=dict(x=list(range(5000)))))
+        client_session = push_session(doc,
+                                      session_id='test_websocket_compression',
+                                      url=url(server),
+                                      io_loop=server.io_loop)
+        pulled = pull_session(session_id='test_websocket_compression',
+                              url=url(server),
+                              io_loop=server.io_loop)
+        assert list(pulled.document.roots[0].data['x']) == list(range(5000))
+
+        stats = server._tornado.websocket_compression.stats
+        assert stats['messages_compressed'] > 0
+        assert stats['messages_uncompressed'] > 0
+        assert stats['wire_bytes'] < stats['message_bytes']
+
+        pulled.close()
+        pulled.loop_until_closed()
+        client_session.close()
+        client_session.loop_until_closed()
@@ -9,7 +9,7 @@ import bokeh.document as document
 from bokeh.io import curdoc
 from bokeh.model import Model
 from bokeh.models import ColumnDataSource
-from bokeh.core.properties import Int, Instance, String, DistanceSpec
+from bokeh.core.properties import Int, Instance, List, String, DistanceSpec
 
 class AnotherModelInTestDocument(Model):
     bar = Int(1)
@@ -18,6 +18,10 @@ class SomeModelInTestDocument(Model):
     foo = Int(2)
     child = Instance(Model)
 
+class ModelWithListInTestDocument(Model):
+    children = List(Instance(Model))
+    parent = Instance(Model)
+
 class ModelThatOverridesName(Model):
     name = String()
 
@@ -60,6 +64,19 @@ class TestDocument(unittest.TestCase):
         d.title = "Foo"
         assert d.title == "Foo"
 
+    def test_revision_changes_with_document(self):
+        d = document.Document()
+        revisions = [d._revision]
+        m = SomeModelInTestDocument()
+        d.add_root(m)
+        revisions.append(d._revision)
+        m.foo = 42
+        revisions.append(d._revision)
+        d.title = "Foo"
+        revisions.append(d._revision)
+        assert len(set(revisions)) == 4
+        assert revisions == sorted(revisions)
+
     def test_all_models(self):
         d = document.Document()
         assert not d.roots
@@ -205,6 +222,33 @@ class TestDocument(unittest.TestCase):
         assert set([child3, root3]) == set(d.select(dict(foo=57)))
         assert set([child3, root3]) == set(root3.select(dict(foo=57)))
 
+    def test_select_indexes_follow_changes(self):
+        d = document.Document()
+        root = SomeModelInTestDocument(tags=['x'])
+        child = AnotherModelInTestDocument(tags=['y'])
+        root.child = child
+        d.add_root(root)
+
+        assert list(d.select(dict(type=Model))) == [root, child]
+        assert list(d.select(dict(type=AnotherModelInTestDocument))) == [child]
+        assert list(d.select(dict(tags='y'))) == [child]
+
+        child.tags.append('x')
+        assert set(d.select(dict(tags='x'))) == set([root, child])
+        child.tags = []
+        assert list(d.select(dict(tags='y'))) == []
+        child.tags = [['unhashable'], 'z']
+        assert list(d.select(dict(tags='z'))) == [child]
+
+        child.name = 'c'
+        assert list(d.select(dict(type=Model, name='c'))) == [child]
+
+        root.child = None
+        assert list(d.select(dict(type=AnotherModelInTestDocument))) == []
+        assert list(d.select(dict(tags='z'))) == []
+        root.child = child
+        assert list(root.select(dict(type=AnotherModelInTestDocument, name='c'))) == [child]
+
     def test_is_single_string_selector(self):
         d = document.Document()
         # this is an implementation detail but just ensuring it works
@@ -272,6 +316,49 @@ class TestDocument(unittest.TestCase):
         d.remove_root(root2)
         assert len(d._all_models) == 0
 
+    def test_all_models_incremental_matches_recompute(self):
+        d = document.Document()
+        root = ModelWithListInTestDocument()
+        d.add_root(root)
+
+        def check():
+            incremental = (dict(d._all_models), dict(d._all_models_refcount))
+            d._recompute_all_models()
+            assert incremental == (d._all_models, d._all_models_refcount)
+            for m in d._all_models.values():
+                assert m.document is d
+
+        children = [ModelWithListInTestDocument(parent=root) for i in range(5)]
+        root.children = children[:3]
+        check()
+        assert len(d._all_models) == 4
+        root.children.append(children[3])
+        check()
+        children[3].children = [children[4], AnotherModelInTestDocument(name="leaf")]
+        check()
+        assert len(d._all_models) == 7
+        assert d.get_model_by_name("leaf") is not None
+        root.children.pop(0)
+        check()
+        assert children[0].document is None
+        del root.children[:]
+        check()
+        assert len(d._all_models) == 1
+        assert d.get_model_by_name("leaf") is None
+        for child in children:
+            assert child.document is None
+
+        root2 = SomeModelInTestDocument(child=children[4])
+        d.add_root(root2)
+        root.children = [children[4]]
+        check()
+        d.remove_root(root2)
+        check()
+        assert children[4].document is d
+        d.remove_root(root)
+        check()
+        assert len(d._all_models) == 0
+
     def test_change_notification(self):
         d = document.Document()
         assert not d.roots
@@ -989,3 +1076,30 @@ class TestUnlockedDocumentProxy(unittest.TestCase):
         assert len(curdoc_from_cb) == 1
         assert curdoc_from_cb[0]._doc is d
         assert isinstance(curdoc_from_cb[0], document.UnlockedDocumentProxy)
+
+class TestReadOnlyDocumentProxy(unittest.TestCase):
+
+    def test_reads_allowed_and_changes_raise(self):
+        d = document.Document()
+        root = AnotherModelInTestDocument(name="foo")
+        d.add_root(root)
+        proxy = document.ReadOnlyDocumentProxy(d)
+        assert proxy.roots == [root]
+        assert proxy.get_model_by_name("foo") is root
+        assert proxy.select_one(dict(name="foo")) is root
+        with pytest.raises(RuntimeError):
+            proxy.add_root(AnotherModelInTestDocument())
+        with pytest.raises(RuntimeError):
+            proxy.clear()
+
+    def test_with_document_read_lock(self):
+        d = document.Document()
+        curdoc_from_cb = []
+        @document.with_document_read_lock
+        def cb():
+            curdoc_from_cb.append(curdoc())
+        callback = d.add_next_tick_callback(cb)
+        callback._callback()
+        assert callback.callback.readlock == True
+        assert isinstance(curdoc_from_cb[0], document.ReadOnlyDocumentProxy)
+        assert curdoc_from_cb[0]._doc is d
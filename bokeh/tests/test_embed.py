@@ -1,11 +1,17 @@
 from __future__ import absolute_import
 
+import base64
+from io import StringIO
 import mock
 import unittest
+import zlib
 
 import bs4
+import numpy as np
+import pytest
 
 import bokeh.embed as embed
+from bokeh.document import Document
 from bokeh.plotting import figure, curdoc
 from bokeh.resources import CDN, JSResources, CSSResources
 from bokeh.util.string import encode_utf8
@@ -210,6 +216,39 @@ def test_file_html_provides_warning_if_no_js(mock_warn):
     )
 
 
+def _binary_test_plot():
+    plot = figure()
+    plot.circle(x=np.arange(10, dtype='float64') * 1.5, y=np.arange(10, dtype='int32'))
+    Document().add_root(plot)
+    return plot
+
+def _blobs(html):
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    return soup.findAll(name='script', attrs={'type' : 'application/octet-stream'})
+
+def test_file_html_binary_embeds_arrays_as_blobs():
+    output = embed.file_html(_binary_test_plot(), CDN, "title", binary=True)
+    blobs = _blobs(output)
+    payloads = sorted(base64.b64decode(blob.string) for blob in blobs)
+    expected = sorted([(np.arange(10, dtype='float64') * 1.5).tobytes(),
+                       np.arange(10, dtype='int32').tobytes()])
+    assert payloads == expected
+    assert all(blob['id'].startswith("bokeh-buffer-") for blob in blobs)
+    assert '"__buffer__"' in output
+    assert "13.5" not in output
+
+def test_file_html_binary_compresses_blobs():
+    output = embed.file_html(_binary_test_plot(), CDN, "title", binary=True, compression="zlib")
+    blobs = _blobs(output)
+    assert len(blobs) == 2
+    for blob in blobs:
+        assert blob['data-compression'] == "zlib"
+        assert len(zlib.decompress(base64.b64decode(blob.string))) in (40, 80)
+
+def test_write_file_html_rejects_unknown_compression():
+    with pytest.raises(ValueError):
+        embed.write_file_html(StringIO(), _embed_test_plot, CDN, compression="lzma")
+
 class TestAutoloadStatic(unittest.TestCase):
 
     def test_return_type(self):
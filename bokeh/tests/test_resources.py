@@ -105,6 +105,24 @@ class TestResources(unittest.TestCase):
         self.assertEqual(len(r.css_raw), 2)
         self.assertEqual(r.messages, [])
 
+    def test_inline_rereads_changed_files(self):
+        import tempfile
+        r = resources.Resources(mode="inline")
+        fd, path = tempfile.mkstemp(suffix=".js")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write("var a = 1;")
+            self.assertIn("var a = 1;", r._inline(path))
+            self.assertIs(r._inline(path), r._inline(path))
+
+            with open(path, "w") as f:
+                f.write("var a = 22;")
+            os.utime(path, (0, 0))
+            self.assertIn("var a = 22;", r._inline(path))
+        finally:
+            os.remove(path)
+        self.assertEqual(r._inline(path), "/* BEGIN %s */\n\n/* END %s */" % ((os.path.basename(path),)*2))
+
     def test_get_cdn_urls(self):
         dev_version = "0.0.1dev"
         result = _get_cdn_urls(["bokeh"], version=dev_version)
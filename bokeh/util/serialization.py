@@ -45,17 +45,18 @@ def make_id():
         new_id = uuid.uuid4()
     return str(new_id)
 
-def transform_series(obj):
+def transform_series(obj, buffers=None):
     """transforms pandas series into array of values
+
+    Args:
+        buffers (list or None, optional) : if not None, numeric values
+            are appended to this list as binary buffers instead of being
+            converted to lists (default: None)
     """
     vals = obj.values
-    return transform_array(vals)
+    return transform_array(vals, buffers=buffers)
 
-def transform_array(obj):
-    """Transform arrays into lists of json safe types
-    also handles pandas series, and replacing
-    nans and infs with strings
-    """
+def _probe_legacy_datetime64():
     # Check for astype failures (putative Numpy < 1.7)
     try:
         dt2001 = np.datetime64('2001')
@@ -72,33 +73,193 @@ def transform_array(obj):
                 raise e
         else:
             raise e
+    return legacy_datetime64
 
-    ## not quite correct, truncates to ms..
-    if obj.dtype.kind == 'M':
-        if legacy_datetime64:
-            if obj.dtype == np.dtype('datetime64[ns]'):
-                return (obj.astype('int64') / 10**6.0).tolist()
-        else:
-            return (obj.astype('datetime64[us]').astype('int64') / 1000.).tolist()
-    elif obj.dtype.kind == 'm':
-        return (obj.astype('timedelta64[us]').astype('int64') / 1000).tolist()
-    elif obj.dtype.kind in ('u', 'i', 'f'):
-        return transform_numerical_array(obj)
-    return obj.tolist()
+# the result can't change while the process runs, so only probe once
+legacy_datetime64 = _probe_legacy_datetime64() if is_numpy else False
 
-def transform_numerical_array(obj):
+def transform_array(obj, buffers=None):
+    """Transform arrays into lists of json safe types
+    also handles pandas series, and replacing
+    nans and infs with strings
+
+    If ``buffers`` is not None, numeric (and datetime) arrays are instead
+    appended to it as raw little-endian binary buffers, and a placeholder
+    dict is returned in their place (see :func:`encode_binary_dict`).
+    """
+    encoder = _array_encoders.get(obj.dtype.kind)
+    if encoder is None:
+        return obj.tolist()
+    return encoder(obj, buffers)
+
+def transform_numerical_array(obj, buffers=None):
     """handles nans/inf conversion
     """
     if isinstance(obj, np.ma.MaskedArray):
+        if obj.dtype.kind != 'f':
+            obj = obj.astype('float64')
         obj = obj.filled(np.nan)  # Set masked values to nan
-    if not np.isnan(obj).any() and not np.isinf(obj).any():
-        return obj.tolist()
+    if obj.dtype.kind == 'f':
+        return _transform_float_array(obj, buffers)
+    return _array_to_list_or_buffer(obj, buffers)
+
+def _transform_datetime_array(obj, buffers):
+    ## not quite correct, truncates to ms..
+    if legacy_datetime64:
+        if obj.dtype == np.dtype('datetime64[ns]'):
+            obj = obj.astype('int64') / 10**6.0
+        else:
+            return obj.tolist()
     else:
-        transformed = obj.astype('object')
-        transformed[np.isnan(obj)] = 'NaN'
-        transformed[np.isposinf(obj)] = 'Infinity'
-        transformed[np.isneginf(obj)] = '-Infinity'
-        return transformed.tolist()
+        obj = obj.astype('datetime64[us]').astype('int64') / 1000.
+    return _array_to_list_or_buffer(obj, buffers)
+
+def _transform_timedelta_array(obj, buffers):
+    obj = obj.astype('timedelta64[us]').astype('int64') / 1000
+    return _array_to_list_or_buffer(obj, buffers)
+
+def _transform_float_array(obj, buffers):
+    if buffers is not None:
+        # binary buffers carry NaN and +/-Infinity natively
+        return encode_binary_dict(obj, buffers)
+    # a single pass finds both NaNs and infinities
+    finite = np.isfinite(obj)
+    result = obj.tolist()
+    if not finite.all():
+        _replace_non_finite(result, obj, finite)
+    return result
+
+def _replace_non_finite(result, obj, finite):
+    """ Replace the (usually few) non-finite values in the nested list
+    ``result`` created from ``obj`` with their JSON-safe string versions,
+    leaving all other values alone.
+
+    """
+    for index in np.argwhere(~finite):
+        index = tuple(index)
+        value = obj[index]
+        if value != value:
+            text = 'NaN'
+        elif value > 0:
+            text = 'Infinity'
+        else:
+            text = '-Infinity'
+        target = result
+        for i in index[:-1]:
+            target = target[i]
+        target[index[-1]] = text
+
+# integer arrays can't hold NaN or infinities, so they don't need to be
+# checked for them unless they're masked (see transform_numerical_array)
+_array_encoders = {
+    'M' : _transform_datetime_array,
+    'm' : _transform_timedelta_array,
+    'u' : transform_numerical_array,
+    'i' : transform_numerical_array,
+    'f' : transform_numerical_array,
+}
+
+def _array_to_list_or_buffer(obj, buffers):
+    if buffers is not None:
+        return encode_binary_dict(obj, buffers)
+    return obj.tolist()
+
+def encode_binary_dict(array, buffers):
+    """ Append a numeric array to ``buffers`` as a raw little-endian
+    binary buffer, and return a JSON-compatible placeholder for it.
+
+    The placeholder has the form:
+
+    .. code-block:: python
+
+        {
+            '__buffer__' : <buffer id>,
+            'shape'      : <array shape>,
+            'dtype'      : <array dtype name>,
+            'order'      : 'little'
+        }
+
+    and ``buffers`` receives a ``(buffer header, payload bytes)`` tuple,
+    where the buffer header is a dict ``{'id' : <buffer id>}``.
+
+    Floating point arrays other than float32 and float64 (e.g. float16)
+    are encoded as float64, since browsers have no typed arrays for them.
+
+    Args:
+        array (np.ndarray) : a numeric array to encode
+        buffers (list) : list to append the new buffer to
+
+    Returns:
+        dict
+
+    """
+    if array.dtype.kind == 'f' and array.dtype.itemsize not in (4, 8):
+        array = array.astype('float64')
+    little = array.dtype.newbyteorder('<')
+    if array.dtype != little:
+        array = array.astype(little)
+    buffer_id = make_id()
+    buffers.append(({ 'id' : buffer_id }, np.ascontiguousarray(array).tobytes()))
+    return {
+        '__buffer__' : buffer_id,
+        'shape'      : list(array.shape),
+        'dtype'      : array.dtype.name,
+        'order'      : 'little',
+    }
+
+def is_binary_dict(obj):
+    """ Return whether ``obj`` is a placeholder created by
+    :func:`encode_binary_dict`.
+
+    """
+    return isinstance(obj, dict) and '__buffer__' in obj
+
+def decode_binary_dict(data, buffers):
+    """ Recreate an array from a placeholder created by
+    :func:`encode_binary_dict`.
+
+    Args:
+        data (dict) : a binary buffer placeholder
+        buffers (dict) : mapping of buffer ids to payload bytes
+
+    Returns:
+        np.ndarray
+
+    Raises:
+        ValueError
+
+    """
+    buffer_id = data['__buffer__']
+    if buffer_id not in buffers:
+        raise ValueError("No binary buffer with id %r" % buffer_id)
+    dtype = np.dtype(data['dtype']).newbyteorder('<' if data.get('order', 'little') == 'little' else '>')
+    array = np.frombuffer(buffers[buffer_id], dtype=dtype)
+    # copy into a writable, native byte order array
+    return array.astype(dtype.newbyteorder('=')).reshape(data['shape'])
+
+def decode_binary_dicts(obj, buffers):
+    """ Replace, in place, every binary buffer placeholder found inside a
+    JSON-like structure of dicts and lists with its decoded array.
+
+    Args:
+        obj (JSON-like) : a structure possibly containing placeholders
+        buffers (dict) : mapping of buffer ids to payload bytes
+
+    Returns:
+        the structure, with placeholders replaced
+
+    """
+    if is_binary_dict(obj):
+        return decode_binary_dict(obj, buffers)
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            if isinstance(v, (dict, list)):
+                obj[k] = decode_binary_dicts(v, buffers)
+    elif isinstance(obj, list):
+        for i, v in enumerate(obj):
+            if isinstance(v, (dict, list)):
+                obj[i] = decode_binary_dicts(v, buffers)
+    return obj
 
 def traverse_data(datum, is_numpy=is_numpy, use_numpy=True):
     """recursively dig until a flat list is found
@@ -130,16 +291,19 @@ def traverse_data(datum, is_numpy=is_numpy, use_numpy=True):
             datum_copy.append(item)
     return datum_copy
 
-def transform_column_source_data(data):
+def transform_column_source_data(data, buffers=None):
     """iterate through the data of a ColumnSourceData object replacing
     non-JSON-compliant objects with compliant ones
+
+    If ``buffers`` is not None, NumPy and Pandas columns are appended to
+    it as binary buffers (see :func:`transform_array`).
     """
     data_copy = {}
     for key in iterkeys(data):
         if pd and isinstance(data[key], (pd.Series, pd.Index)):
-            data_copy[key] = transform_series(data[key])
+            data_copy[key] = transform_series(data[key], buffers=buffers)
         elif isinstance(data[key], np.ndarray):
-            data_copy[key] = transform_array(data[key])
+            data_copy[key] = transform_array(data[key], buffers=buffers)
         else:
             data_copy[key] = traverse_data(data[key])
     return data_copy
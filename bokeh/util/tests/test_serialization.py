@@ -2,7 +2,11 @@ from __future__ import absolute_import
 
 import unittest
 
-from bokeh.util.serialization import make_id, traverse_data
+import numpy as np
+
+from bokeh.util.serialization import (make_id, traverse_data, transform_array,
+                                      transform_column_source_data, decode_binary_dict,
+                                      decode_binary_dicts)
 
 class DummyRequestCallable():
     def json(self):
@@ -36,5 +40,96 @@ class TestTraverseData(unittest.TestCase):
     def test_without_numpy(self):
         self.assertTrue(traverse_data(self.testing, False) == self.expected)
 
+class TestTransformArray(unittest.TestCase):
+
+    def test_float_nonfinite_become_strings(self):
+        arr = np.array([1.5, np.nan, 2.5, np.inf, -np.inf])
+        self.assertEqual(transform_array(arr), [1.5, 'NaN', 2.5, 'Infinity', '-Infinity'])
+
+    def test_float_2d_nonfinite(self):
+        arr = np.array([[1.0, np.nan], [np.inf, 4.0]])
+        self.assertEqual(transform_array(arr), [[1.0, 'NaN'], ['Infinity', 4.0]])
+
+    def test_float_finite_untouched(self):
+        arr = np.arange(5, dtype=np.float32)
+        self.assertEqual(transform_array(arr), [0.0, 1.0, 2.0, 3.0, 4.0])
+
+    def test_int_and_bool(self):
+        self.assertEqual(transform_array(np.array([1, 2, 3], dtype=np.uint8)), [1, 2, 3])
+        self.assertEqual(transform_array(np.array([True, False])), [True, False])
+
+    def test_masked_int(self):
+        arr = np.ma.masked_array([1, 2, 3], mask=[False, True, False])
+        self.assertEqual(transform_array(arr), [1.0, 'NaN', 3.0])
+
+class TestBinaryBuffers(unittest.TestCase):
+
+    def _roundtrip(self, arr):
+        buffers = []
+        encoded = transform_array(arr, buffers=buffers)
+        self.assertEqual(len(buffers), 1)
+        header, payload = buffers[0]
+        self.assertEqual(header['id'], encoded['__buffer__'])
+        self.assertEqual(encoded['order'], 'little')
+        return encoded, decode_binary_dict(encoded, {header['id'] : payload})
+
+    def test_float_with_nonfinite(self):
+        arr = np.array([1.5, np.nan, np.inf, -np.inf])
+        encoded, decoded = self._roundtrip(arr)
+        self.assertEqual(encoded['dtype'], 'float64')
+        self.assertEqual(encoded['shape'], [4])
+        np.testing.assert_array_equal(decoded, arr)
+
+    def test_int_and_shape(self):
+        arr = np.arange(6, dtype='int32').reshape(2, 3)
+        encoded, decoded = self._roundtrip(arr)
+        self.assertEqual(encoded['dtype'], 'int32')
+        self.assertEqual(encoded['shape'], [2, 3])
+        np.testing.assert_array_equal(decoded, arr)
+        decoded[0, 0] = 10 # decoded arrays are writable
+
+    def test_other_float_widths_sent_as_float64(self):
+        for dtype in ('float16', np.longdouble):
+            arr = np.array([0.5, np.nan, 2], dtype=dtype)
+            encoded, decoded = self._roundtrip(arr)
+            self.assertEqual(encoded['dtype'], 'float64')
+            np.testing.assert_array_equal(decoded, arr.astype('float64'))
+
+    def test_big_endian_sent_little_endian(self):
+        arr = np.array([1, 2, 3], dtype='>i4')
+        buffers = []
+        transform_array(arr, buffers=buffers)
+        self.assertEqual(buffers[0][1], np.array([1, 2, 3], dtype='<i4').tobytes())
+
+    def test_datetime(self):
+        arr = np.array(['2016-01-01', '2016-01-02'], dtype='datetime64[ns]')
+        encoded, decoded = self._roundtrip(arr)
+        self.assertEqual(encoded['dtype'], 'float64')
+        self.assertEqual(decoded.tolist(), transform_array(arr))
+
+    def test_masked(self):
+        arr = np.ma.masked_array([1, 2, 3], mask=[0, 1, 0])
+        encoded, decoded = self._roundtrip(arr)
+        self.assertTrue(np.isnan(decoded[1]))
+        self.assertEqual(decoded[2], 3)
+
+    def test_non_numeric_stays_list(self):
+        buffers = []
+        self.assertEqual(transform_array(np.array(['a', 'b']), buffers=buffers), ['a', 'b'])
+        self.assertEqual(buffers, [])
+
+    def test_column_source_data(self):
+        buffers = []
+        data = dict(a=np.arange(3), b=[1, 2, 3])
+        encoded = transform_column_source_data(data, buffers=buffers)
+        self.assertEqual(len(buffers), 1)
+        self.assertEqual(encoded['b'], [1, 2, 3])
+        decoded = decode_binary_dicts(encoded, dict((h['id'], p) for h, p in buffers))
+        np.testing.assert_array_equal(decoded['a'], data['a'])
+
+    def test_missing_buffer(self):
+        with self.assertRaises(ValueError):
+            decode_binary_dict({'__buffer__' : 'nope', 'shape' : [1], 'dtype' : 'int8'}, {})
+
 if __name__ == "__main__":
     unittest.main()
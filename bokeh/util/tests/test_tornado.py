@@ -1,11 +1,20 @@
 from __future__ import absolute_import, print_function
 
+import inspect
+import os
+import time
 import unittest
+import zlib
+
+import mock
+import pytest
 
 from tornado import gen
 from tornado.ioloop import IOLoop
 
-from bokeh.util.tornado import _CallbackGroup, yield_for_all_futures
+from bokeh.document import PeriodicCallbackStats
+from bokeh.util.tornado import (_AsyncPeriodic, _CallbackGroup, _ReadWriteLock, _WebSocketCompression,
+                                _SELECTIVE_COMPRESSION, yield_for_all_futures)
 
 def _make_invocation_counter(loop, stop_after=1):
     from types import MethodType
@@ -78,6 +87,33 @@ class TestCallbackGroup(unittest.TestCase):
         ctx.group.remove_periodic_callback(func)
         self.assertEqual(0, len(ctx.group._periodic_callbacks))
 
+    def test_periodic_records_stats(self):
+        stats = PeriodicCallbackStats(5)
+        with (LoopAndGroup()) as ctx:
+            counter = _make_invocation_counter(ctx.io_loop, stop_after=4)
+            def func():
+                time.sleep(0.01)
+                counter()
+            ctx.group.add_periodic_callback(func, period_milliseconds=5, stats=stats)
+        self.assertEqual(4, stats.runs)
+        self.assertEqual(4, stats.overruns)
+        self.assertEqual(0, stats.skipped_ticks)
+        self.assertTrue(stats.last_duration >= 10)
+        self.assertTrue(stats.p99_duration >= stats.mean_duration)
+        self.assertTrue(stats.duty_cycle > 1)
+
+    def test_adaptive_periodic_skips_missed_ticks(self):
+        stats = PeriodicCallbackStats(5)
+        with (LoopAndGroup()) as ctx:
+            counter = _make_invocation_counter(ctx.io_loop, stop_after=3)
+            def func():
+                time.sleep(0.012)
+                counter()
+            ctx.group.add_periodic_callback(func, period_milliseconds=5, stats=stats, adaptive=True)
+        self.assertEqual(3, stats.runs)
+        # each run takes between two and three periods
+        self.assertTrue(stats.skipped_ticks >= 4)
+
     def test_next_tick_does_not_run_if_removed_immediately(self):
         with (LoopAndGroup(quit_after=15)) as ctx:
             func = _make_invocation_counter(ctx.io_loop)
@@ -293,3 +329,122 @@ def test__yield_for_all_futures():
     assert 6 == result['value']
 
     loop.close()
+
+def test__async_periodic_warns_about_duty_cycle():
+    loop = IOLoop()
+    calls = []
+    def func():
+        time.sleep(0.003)
+        calls.append(1)
+        if len(calls) == 2:
+            loop.stop()
+    periodic = _AsyncPeriodic(func, 4, loop, duty_cycle_warning=0.5)
+    with mock.patch('bokeh.util.tornado.log') as mock_log:
+        periodic.start()
+        run(loop)
+    periodic.stop()
+    loop.close()
+    assert mock_log.warning.call_count == 1
+    assert periodic.stats.runs == 2
+
+def test__read_write_lock():
+    loop = IOLoop()
+    loop.make_current()
+    lock = _ReadWriteLock()
+    order = []
+
+    @gen.coroutine
+    def hold(name, acquire):
+        with (yield acquire()):
+            order.append(name + " start")
+            yield gen.moment
+            order.append(name + " end")
+
+    @gen.coroutine
+    def run_all():
+        yield [hold("r1", lock.acquire_read),
+               hold("r2", lock.acquire_read),
+               hold("w", lock.acquire_write),
+               hold("r3", lock.acquire_read)]
+
+    loop.run_sync(run_all)
+
+    # readers share the lock, the writer has it alone, and the reader
+    # that arrived after the writer waits for it
+    assert order[:2] == ["r1 start", "r2 start"]
+    assert order[4:] == ["w start", "w end", "r3 start", "r3 end"]
+    assert not lock.locked
+    stats = lock.stats
+    assert stats['read_acquisitions'] == 3
+    assert stats['write_acquisitions'] == 1
+    assert stats['max_write_wait_seconds'] > 0
+    assert stats['write_wait_seconds'] >= stats['max_write_wait_seconds']
+
+    loop.close()
+
+class _FakeCompressor(object):
+    def compress(self, data):
+        return zlib.compress(data)
+
+class _FakeWebSocketProtocol(object):
+    RSV1 = 0x40
+
+    def __init__(self, compressor=None):
+        self._compressor = compressor
+        self.frames = []
+        self.messages = []
+
+    def _write_frame(self, fin, opcode, data, flags=0):
+        self.frames.append((opcode, data, flags))
+
+    def write_message(self, message, binary=False):
+        self.messages.append((message, binary))
+
+def test__websocket_compression_skips_small_and_incompressible_messages():
+    compression = _WebSocketCompression(min_bytes=100)
+    protocol = _FakeWebSocketProtocol(_FakeCompressor())
+
+    compression.write_message(protocol, "{}")
+    json_text = '{"x": [%s]}' % ", ".join(["1.5"] * 1000)
+    compression.write_message(protocol, json_text)
+    noise = os.urandom(8000)
+    compression.write_message(protocol, noise, binary=True)
+
+    assert protocol.frames[0] == (0x1, b"{}", 0)
+    opcode, data, flags = protocol.frames[1]
+    assert (opcode, flags) == (0x1, 0x40)
+    assert zlib.decompress(data) == json_text.encode("utf-8")
+    assert protocol.frames[2] == (0x2, noise, 0)
+
+    stats = compression.stats
+    assert stats['messages_compressed'] == 1
+    assert stats['messages_uncompressed'] == 2
+    assert stats['message_bytes'] == 2 + len(json_text) + len(noise)
+    assert stats['wire_bytes'] == 2 + len(data) + len(noise)
+
+def test__websocket_compression_not_negotiated():
+    compression = _WebSocketCompression(min_bytes=0)
+    protocol = _FakeWebSocketProtocol()
+    compression.write_message(protocol, "a" * 5000)
+    assert protocol.messages == [(b"a" * 5000, False)]
+    assert compression.stats['messages_compressed'] == 0
+
+def test__websocket_compression_falls_back_to_public_write_message():
+    compression = _WebSocketCompression(min_bytes=0)
+    protocol = _FakeWebSocketProtocol(_FakeCompressor())
+    with mock.patch('bokeh.util.tornado._SELECTIVE_COMPRESSION', False):
+        compression.write_message(protocol, "a" * 5000)
+    assert protocol.frames == []
+    assert protocol.messages == [(b"a" * 5000, False)]
+    assert compression.stats['messages_uncompressed'] == 1
+
+def test__websocket_compression_private_api_matches_tornado():
+    from tornado.websocket import WebSocketProtocol13
+    if not _SELECTIVE_COMPRESSION:
+        pytest.skip("this Tornado only uses the public write_message")
+    assert WebSocketProtocol13.RSV1 == 0x40
+    args = inspect.getargspec(WebSocketProtocol13._write_frame).args
+    assert args == ['self', 'fin', 'opcode', 'data', 'flags']
+    protocol = WebSocketProtocol13(mock.Mock(), compression_options={})
+    protocol._create_compressors('server', {})
+    assert hasattr(protocol._compressor, 'compress')
@@ -6,9 +6,18 @@ from __future__ import absolute_import, print_function
 import logging
 log = logging.getLogger(__name__)
 
+from collections import deque
+import math
+import time
+import zlib
+
+import tornado
 from tornado import gen
+from tornado.concurrent import Future, chain_future
+from tornado.escape import utf8
 
-from bokeh.document import NextTickCallback, PeriodicCallback, TimeoutCallback
+from bokeh.document import NextTickCallback, PeriodicCallback, PeriodicCallbackStats, TimeoutCallback
+from bokeh.settings import settings
 
 @gen.coroutine
 def yield_for_all_futures(result):
@@ -33,38 +42,97 @@ class _AsyncPeriodic(object):
         before we call it again.  Plain ioloop.PeriodicCallback
         can "pile up" invocations if they are taking too long.
 
+        If func takes longer than the period, it's normally called
+        again as soon as it finishes. With ``adaptive``, the ticks that
+        passed while it ran are skipped instead, so a slow callback
+        leaves the rest of its period to everything else.
+
+        How long each call takes is recorded in ``stats`` (a
+        ``PeriodicCallbackStats``), and a warning is logged when the
+        calls take more than ``duty_cycle_warning`` of the period on
+        average.
+
     """
-    def __init__(self, func, period, io_loop):
+    def __init__(self, func, period, io_loop, stats=None, adaptive=False, duty_cycle_warning=None):
         self._func = func
         self._loop = io_loop
         self._period = period
         self._started = False
         self._stopped = False
+        self._stats = stats if stats is not None else PeriodicCallbackStats(period)
+        self._adaptive = adaptive
+        if duty_cycle_warning is None:
+            duty_cycle_warning = settings.periodic_callback_duty_cycle_warning()
+        self._duty_cycle_warning = duty_cycle_warning
+        self._warned = False
+
+    @property
+    def stats(self):
+        return self._stats
 
     # this is like gen.sleep but uses our IOLoop instead of the
     # current IOLoop
-    def sleep(self):
+    def sleep(self, milliseconds=None):
+        if milliseconds is None:
+            milliseconds = self._period
         f = gen.Future()
-        self._loop.call_later(self._period / 1000.0, lambda: f.set_result(None))
+        self._loop.call_later(milliseconds / 1000.0, lambda: f.set_result(None))
         return f
 
+    def _record(self, start):
+        self._stats.record((time.time() - start) * 1000)
+        duty_cycle = self._stats.duty_cycle
+        if duty_cycle is None:
+            return
+        if duty_cycle > self._duty_cycle_warning and not self._warned:
+            self._warned = True
+            log.warning("Periodic callback %r takes %d%% of its %d ms period on average (%.1f ms, slowest "
+                        "%.1f ms); consider a longer period%s",
+                        self._func, duty_cycle * 100, self._period, self._stats.mean_duration,
+                        self._stats.p99_duration,
+                        "" if self._adaptive else ", or adaptive=True to skip missed ticks")
+        elif duty_cycle <= self._duty_cycle_warning:
+            self._warned = False
+
     def start(self):
         if self._started:
             raise RuntimeError("called start() twice on _AsyncPeriodic")
         self._started = True
         def invoke():
+            start = time.time()
+            if self._adaptive:
+                # wait until after func, and then until the next tick
+                # that hasn't already passed
+                callback_future = run(start)
+                next_tick = gen.Future()
+                def wait_for_tick(future):
+                    elapsed = (time.time() - start) * 1000
+                    ticks = max(1, int(math.ceil(elapsed / self._period)))
+                    self._stats.skipped_ticks += ticks - 1
+                    self._loop.add_future(self.sleep(ticks * self._period - elapsed),
+                                          lambda sleep_future: chain_future(future, next_tick))
+                self._loop.add_future(callback_future, wait_for_tick)
+                return next_tick
             # important to start the sleep before starting callback
             # so any initial time spent in callback "counts against"
             # the period.
             sleep_future = self.sleep()
-            result = self._func()
+            return gen.multi([sleep_future, run(start)])
+        def run(start):
             try:
+                result = self._func()
                 callback_future = gen.convert_yielded(result)
             except gen.BadYieldError:
                 # result is not a yieldable thing
-                return sleep_future
+                self._record(start)
+                callback_future = gen.Future()
+                callback_future.set_result(None)
+            except Exception:
+                self._record(start)
+                raise
             else:
-                return gen.multi([sleep_future, callback_future])
+                callback_future.add_done_callback(lambda future: self._record(start))
+            return callback_future
         def on_done(future):
             if not self._stopped:
                 self._loop.add_future(invoke(), on_done)
@@ -169,12 +237,14 @@ class _CallbackGroup(object):
         """ Removes a callback added with add_timeout_callback, before it runs."""
         self._remove(callback, self._timeout_callbacks)
 
-    def add_periodic_callback(self, callback, period_milliseconds, cleanup=None):
-        """ Adds a callback to be run every period_milliseconds until it is removed."""
+    def add_periodic_callback(self, callback, period_milliseconds, cleanup=None, stats=None, adaptive=False):
+        """ Adds a callback to be run every period_milliseconds until it is removed.
+        Its timings are recorded in ``stats``, if given, and with ``adaptive``
+        ticks that pass while it runs are skipped."""
         if callback in self._periodic_callbacks:
             raise ValueError("Callback added as a periodic callback twice")
         cb = _AsyncPeriodic(
-            callback, period_milliseconds, io_loop=self._loop
+            callback, period_milliseconds, io_loop=self._loop, stats=stats, adaptive=adaptive
         )
         def remover():
             cb.stop()
@@ -206,7 +276,8 @@ class _DocumentCallbackGroup(object):
             if callback.id in self._removers:
                 del self._removers[callback.id]
         if isinstance(callback, PeriodicCallback):
-            remover = self._group.add_periodic_callback(callback.callback, callback.period, cleanup)
+            remover = self._group.add_periodic_callback(callback.callback, callback.period, cleanup,
+                                                        stats=callback.stats, adaptive=callback.adaptive)
         elif isinstance(callback, TimeoutCallback):
             remover = self._group.add_timeout_callback(callback.callback, callback.timeout, cleanup)
         elif isinstance(callback, NextTickCallback):
@@ -223,3 +294,167 @@ class _DocumentCallbackGroup(object):
         # removed.
         if callback.id in self._removers:
             self._removers[callback.id]()
+
+class _ReadWriteLockReleaser(object):
+    def __init__(self, lock, write):
+        self._lock = lock
+        self._write = write
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._lock._release(self._write)
+
+class _ReadWriteLock(object):
+    """ A lock for coroutines that can be held by any number of readers at
+    once, or by a single writer.
+
+    Waiters are served in order, so readers that arrive while a writer is
+    waiting wait for it, and a steady stream of readers can't starve
+    writers. Like ``tornado.locks.Lock``, it's used as:
+
+    .. code-block:: python
+
+        with (yield lock.acquire_read()):
+            ...
+
+    """
+    def __init__(self):
+        self._readers = 0
+        self._writer = False
+        self._waiters = deque()
+        self._stats = dict(read_acquisitions=0, write_acquisitions=0,
+                           read_wait_seconds=0.0, write_wait_seconds=0.0,
+                           max_read_wait_seconds=0.0, max_write_wait_seconds=0.0)
+
+    @property
+    def stats(self):
+        """ A dict with the number of times the lock was acquired for reading
+        and writing, and the total and longest time spent waiting for it. """
+        return dict(self._stats)
+
+    @property
+    def locked(self):
+        return self._writer or self._readers > 0
+
+    def acquire_read(self):
+        return self._acquire(False)
+
+    def acquire_write(self):
+        return self._acquire(True)
+
+    def _acquire(self, write):
+        future = Future()
+        waiter = (write, future, time.time())
+        if not self._waiters and self._can_grant(write):
+            self._grant(*waiter)
+        else:
+            self._waiters.append(waiter)
+        return future
+
+    def _can_grant(self, write):
+        if write:
+            return not self._writer and self._readers == 0
+        return not self._writer
+
+    def _grant(self, write, future, start):
+        kind = "write" if write else "read"
+        if write:
+            self._writer = True
+        else:
+            self._readers += 1
+        wait = time.time() - start
+        self._stats[kind + "_acquisitions"] += 1
+        self._stats[kind + "_wait_seconds"] += wait
+        self._stats["max_" + kind + "_wait_seconds"] = max(self._stats["max_" + kind + "_wait_seconds"], wait)
+        future.set_result(_ReadWriteLockReleaser(self, write))
+
+    def _release(self, write):
+        if write:
+            self._writer = False
+        else:
+            self._readers -= 1
+        while self._waiters and self._can_grant(self._waiters[0][0]):
+            self._grant(*self._waiters.popleft())
+
+# Choosing per message whether to compress means writing frames with the
+# private _compressor and _write_frame of Tornado's WebSocketProtocol13,
+# which are only known to work this way in these versions
+_SELECTIVE_COMPRESSION = (4, 0) <= tornado.version_info < (5, 0)
+
+class _WebSocketCompression(object):
+    """ Decides message by message whether to compress what is sent over
+    websockets that negotiated permessage-deflate, and keeps statistics.
+
+    Tornado compresses every message once the extension is negotiated,
+    but permessage-deflate also allows sending individual messages
+    uncompressed, which is better for small messages and for binary
+    array buffers that hardly compress at all. Uncompressed messages do
+    not enter the compression window, so skipping some is always safe.
+
+    Other Tornado versions are only given messages through the public
+    ``write_message``, so they compress every message when the extension
+    was negotiated, and the statistics count them as sent uncompressed.
+
+    Args:
+        min_bytes (int) : messages shorter than this are not compressed
+        sample_bytes (int) : how much of each message to trial compress
+        max_sample_ratio (float) : messages are not compressed if the
+            trial compression of the sample is larger than this fraction
+            of its size
+
+    """
+    def __init__(self, min_bytes=1024, sample_bytes=4096, max_sample_ratio=0.9):
+        self.min_bytes = min_bytes
+        self.sample_bytes = sample_bytes
+        self.max_sample_ratio = max_sample_ratio
+        self.messages_compressed = 0
+        self.messages_uncompressed = 0
+        self.message_bytes = 0
+        self.wire_bytes = 0
+        self.compression_seconds = 0.0
+
+    @property
+    def stats(self):
+        return dict(messages_compressed=self.messages_compressed,
+                    messages_uncompressed=self.messages_uncompressed,
+                    message_bytes=self.message_bytes,
+                    wire_bytes=self.wire_bytes,
+                    compression_seconds=self.compression_seconds)
+
+    def should_compress(self, data):
+        if len(data) < self.min_bytes:
+            return False
+        sample = data[:self.sample_bytes]
+        return len(zlib.compress(sample, 1)) < self.max_sample_ratio * len(sample)
+
+    def write_message(self, protocol, message, binary=False):
+        """ Write ``message`` using the Tornado websocket ``protocol`` (the
+        ``ws_connection`` of a handler or the ``protocol`` of a client
+        connection), compressing it only if that is worthwhile.
+
+        """
+        compressor = getattr(protocol, '_compressor', None) if _SELECTIVE_COMPRESSION else None
+        if compressor is None:
+            # compression wasn't negotiated, or is left to Tornado
+            data = utf8(message)
+            self.messages_uncompressed += 1
+            self.message_bytes += len(data)
+            self.wire_bytes += len(data)
+            return protocol.write_message(data, binary)
+
+        data = utf8(message)
+        self.message_bytes += len(data)
+        flags = 0
+        if self.should_compress(data):
+            start = time.time()
+            data = compressor.compress(data)
+            self.compression_seconds += time.time() - start
+            flags = protocol.RSV1
+            self.messages_compressed += 1
+        else:
+            self.messages_uncompressed += 1
+        self.wire_bytes += len(data)
+        opcode = 0x2 if binary else 0x1
+        return protocol._write_frame(True, opcode, data, flags=flags)
@@ -0,0 +1,22 @@
+''' Helpers shared by the benchmark scripts in this directory.
+
+'''
+from __future__ import print_function
+
+import argparse
+import timeit
+
+def best(func, repeat):
+    ''' Return the fastest of ``repeat`` single calls to ``func``, in seconds.
+
+    '''
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+def make_parser(doc, repeat):
+    ''' Create an argument parser described by the first paragraph of a
+    script's docstring, with a ``--repeat`` option.
+
+    '''
+    parser = argparse.ArgumentParser(description=doc.split("\n\n")[0])
+    parser.add_argument('--repeat', type=int, default=repeat)
+    return parser
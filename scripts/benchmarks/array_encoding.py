@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+''' Measure transform_array throughput for large NumPy columns.
+
+Encodes float (all finite, and with a few NaN and infinite values),
+integer and datetime columns, both as JSON lists and as binary buffers.
+
+    python scripts/benchmarks/array_encoding.py --size 10000000
+
+'''
+from __future__ import print_function
+
+import numpy as np
+
+from bokeh.util.serialization import transform_array
+
+from _common import best, make_parser
+
+def make_columns(size):
+    sparse = np.random.random(size)
+    sparse[::max(size // 100, 1)] = np.nan
+    sparse[1::max(size // 100, 1)] = np.inf
+    return [
+        ("float", np.random.random(size)),
+        ("float (non-finite)", sparse),
+        ("int", np.arange(size, dtype=np.int64)),
+        ("datetime", np.arange(size).astype('datetime64[s]')),
+    ]
+
+if __name__ == '__main__':
+    parser = make_parser(__doc__, repeat=3)
+    parser.add_argument('--size', type=int, default=10000000)
+    args = parser.parse_args()
+
+    print("%20s %12s %12s" % ("column", "list (s)", "buffers (s)"))
+    for name, column in make_columns(args.size):
+        as_list = best(lambda: transform_array(column), args.repeat)
+        as_buffers = best(lambda: transform_array(column, buffers=[]), args.repeat)
+        print("%20s %12.4f %12.4f" % (name, as_list, as_buffers))
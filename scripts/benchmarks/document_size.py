@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+''' Measure the cost of changing model references in large documents.
+
+Builds a plot with a growing number of glyph renderers and times
+changes that add or remove models from the document, compared with
+recomputing the full set of document models from the roots.
+
+    python scripts/benchmarks/document_size.py --renderers 100 1000 5000
+
+'''
+from __future__ import print_function
+
+from bokeh.document import Document
+from bokeh.models import Circle, ColumnDataSource, GlyphRenderer, Plot
+
+from _common import best, make_parser
+
+def make_renderer():
+    source = ColumnDataSource(data=dict(x=[1, 2, 3], y=[1, 2, 3]))
+    return GlyphRenderer(data_source=source, glyph=Circle(x='x', y='y'))
+
+def build(renderers):
+    plot = Plot()
+    plot.renderers = [make_renderer() for i in range(renderers)]
+    return plot
+
+if __name__ == '__main__':
+    parser = make_parser(__doc__, repeat=5)
+    parser.add_argument('--renderers', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    print("%10s %10s %14s %14s %14s %14s" %
+          ("renderers", "models", "add_root (s)", "set glyph (s)", "append (s)", "recompute (s)"))
+    for n in args.renderers:
+        plot = build(n)
+        doc = Document()
+
+        add_root = best(lambda: (doc.add_root(plot), doc.remove_root(plot)), args.repeat)
+        doc.add_root(plot)
+
+        renderer = plot.renderers[0]
+        def set_glyph():
+            renderer.glyph = Circle(x='x', y='y')
+        set_glyph_time = best(set_glyph, args.repeat)
+
+        def append():
+            plot.renderers.append(make_renderer())
+        append_time = best(append, args.repeat)
+
+        recompute = best(doc._recompute_all_models, args.repeat)
+
+        print("%10d %10d %14.5f %14.5f %14.5f %14.5f" %
+              (n, len(doc._all_models), add_root, set_glyph_time, append_time, recompute))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+''' Measure how long it takes to add many glyph renderers to one figure.
+
+Adds the renderers one at a time, and in a single ``Figure.batch()``.
+Adding them one at a time takes time quadratic in their number, so it is
+only measured up to ``--unbatched-max`` renderers.
+
+    python scripts/benchmarks/glyph_renderers.py --counts 1000 10000 50000
+
+'''
+from __future__ import print_function
+
+from bokeh.plotting import figure
+
+from _common import best, make_parser
+
+def add_renderers(count, batch):
+    p = figure(tools="pan,box_select,reset")
+    if batch:
+        with p.batch():
+            for i in range(count):
+                p.circle([i], [i], legend="even" if i % 2 else "odd")
+    else:
+        for i in range(count):
+            p.circle([i], [i], legend="even" if i % 2 else "odd")
+    return p
+
+if __name__ == '__main__':
+    parser = make_parser(__doc__, repeat=1)
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--unbatched-max', type=int, default=10000)
+    args = parser.parse_args()
+
+    print("%10s %14s %14s" % ("renderers", "one by one (s)", "batch (s)"))
+    for count in args.counts:
+        if count <= args.unbatched_max:
+            unbatched = "%14.3f" % best(lambda: add_renderers(count, False), args.repeat)
+        else:
+            unbatched = "%14s" % "-"
+        batched = best(lambda: add_renderers(count, True), args.repeat)
+        print("%10d %s %14.3f" % (count, unbatched, batched))
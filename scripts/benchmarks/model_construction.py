@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+''' Measure model construction and serialization throughput.
+
+Reports how many models per second can be created with a handful of
+properties set, serialized with ``properties_with_values``, and rebuilt
+from JSON through ``Document.from_json``.
+
+    python scripts/benchmarks/model_construction.py --count 5000
+
+'''
+from __future__ import print_function
+
+from bokeh.document import Document
+from bokeh.models import Circle, ColumnDataSource, GlyphRenderer, Plot
+
+from _common import best, make_parser
+
+def construct(count):
+    for i in range(count):
+        Circle(x='x', y='y', size=10, fill_color='red', line_alpha=0.5)
+
+def serialize(models):
+    for model in models:
+        model.properties_with_values(include_defaults=False)
+
+def build_document(count):
+    doc = Document()
+    plot = Plot()
+    source = ColumnDataSource(data=dict(x=[1, 2, 3], y=[1, 2, 3]))
+    for i in range(count):
+        glyph = Circle(x='x', y='y', size=10, fill_color='red')
+        plot.renderers.append(GlyphRenderer(data_source=source, glyph=glyph))
+    doc.add_root(plot)
+    return doc
+
+if __name__ == '__main__':
+    parser = make_parser(__doc__, repeat=3)
+    parser.add_argument('--count', type=int, default=2000)
+    args = parser.parse_args()
+
+    n = args.count
+    models = [Circle(x='x', y='y', size=10, fill_color='red') for i in range(n)]
+    json = build_document(n).to_json()
+
+    results = [
+        ("construct", n, best(lambda: construct(n), args.repeat)),
+        ("properties_with_values", n, best(lambda: serialize(models), args.repeat)),
+        ("Document.from_json", len(json['roots']['references']), best(lambda: Document.from_json(json), args.repeat)),
+    ]
+
+    print("%24s %10s %14s" % ("operation", "models", "models/s"))
+    for name, count, t in results:
+        print("%24s %10d %14.0f" % (name, count, count / t))
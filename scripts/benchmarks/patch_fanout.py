@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+''' Measure the cost of sending one document change to many connections
+subscribed to the same server session.
+
+Compares creating a separate PATCH-DOC message for every connection with
+the shared fan-out path used by ``ServerSession``, which
+serializes the patch once and only generates a new msgid per connection.
+
+    python scripts/benchmarks/patch_fanout.py --connections 1 10 100 200
+
+'''
+from __future__ import print_function
+
+import numpy as np
+
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+from bokeh.document import Document
+from bokeh.models import ColumnDataSource
+from bokeh.server.connection import ServerConnection
+from bokeh.server.protocol import Protocol
+from bokeh.server.session import ServerSession
+
+from _common import best, make_parser
+
+class _FakeSocket(object):
+    ''' Encodes every frame of a message like a real socket would, but
+    doesn't write anything anywhere.
+
+    '''
+    def send_message(self, message):
+        message.header_json
+        message.metadata_json
+        message.content_json
+        future = Future()
+        future.set_result(None)
+        return future
+
+def _setup(num_connections, rows):
+    doc = Document()
+    source = ColumnDataSource(data=dict(x=np.random.random(rows), y=np.random.random(rows)))
+    doc.add_root(source)
+    session = ServerSession('bench', doc, io_loop=IOLoop.current())
+    connections = [ServerConnection(Protocol("1.0"), _FakeSocket(), None, session)
+                   for i in range(num_connections)]
+    return doc, source, session, connections
+
+def per_connection(num_connections, rows, repeat):
+    doc, source, session, connections = _setup(num_connections, rows)
+    events = []
+    def on_change(event):
+        events.append(event)
+    doc.on_change(on_change)
+    new_data = dict(x=np.random.random(rows // 10), y=np.random.random(rows // 10))
+    session._pending_events = []
+    source.stream(new_data)
+    session._pending_events = None
+    event = events[-1]
+    def run():
+        for connection in connections:
+            connection.send_patch_document(event)
+    return best(run, repeat)
+
+def fan_out(num_connections, rows, repeat):
+    doc, source, session, connections = _setup(num_connections, rows)
+    new_data = dict(x=np.random.random(rows // 10), y=np.random.random(rows // 10))
+    def run():
+        session._pending_events = []
+        try:
+            source.stream(new_data)
+            session._send_pending_events()
+        finally:
+            session._pending_events = None
+    return best(run, repeat)
+
+if __name__ == '__main__':
+    parser = make_parser(__doc__, repeat=5)
+    parser.add_argument('--connections', type=int, nargs='+', default=[1, 10, 50, 100, 200])
+    parser.add_argument('--rows', type=int, default=10000, help="rows in the source (each stream adds 10%%)")
+    args = parser.parse_args()
+
+    print("%12s %18s %18s %10s" % ("connections", "per-connection (s)", "fan-out (s)", "speedup"))
+    for n in args.connections:
+        before = per_connection(n, args.rows, args.repeat)
+        after = fan_out(n, args.rows, args.repeat)
+        print("%12d %18.4f %18.4f %9.1fx" % (n, before, after, before / after))